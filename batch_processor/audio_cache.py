@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import threading
+from pathlib import Path
+import numpy as np
+from probe_cache import get_media_info
+from ffmpeg_progress import run_ffmpeg_with_progress
+
+# 디코딩된 PCM은 원본 오디오 옆에 저장 ({원본 파일명}.pcm + .pcm.json)
+PCM_SUFFIX = ".pcm"
+PCM_DTYPE = np.int16
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_CHANNELS = 2
+
+# 캐시 형식이 바뀌면 올려서 기존 PCM 캐시를 다시 디코딩 (2: 타임스탬프 공백을 무음으로 채움)
+PCM_CACHE_VERSION = 2
+
+# 출력 확장자별 오디오 코덱과 인코더 옵션 (그 외는 AAC)
+AUDIO_ENCODERS = {
+    '.m4a': ('aac', ['-c:a', 'aac', '-b:a', '192k']),
+    '.mp4': ('aac', ['-c:a', 'aac', '-b:a', '192k']),
+    '.aac': ('aac', ['-c:a', 'aac', '-b:a', '192k']),
+    '.webm': ('opus', ['-c:a', 'libopus', '-b:a', '160k']),
+    '.opus': ('opus', ['-c:a', 'libopus', '-b:a', '160k']),
+    '.ogg': ('opus', ['-c:a', 'libopus', '-b:a', '160k']),
+    '.mp3': ('mp3', ['-c:a', 'libmp3lame', '-b:a', '192k']),
+    '.flac': ('flac', ['-c:a', 'flac']),
+    '.wav': ('pcm_s16le', ['-c:a', 'pcm_s16le'])
+}
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+_decode_locks = {}
+
+class PcmAudio:
+    """메모리 매핑된 PCM 오디오 (samples: (샘플 수, 채널) int16 배열, 읽기 전용)"""
+    
+    def __init__(self, samples, sample_rate, channels):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.channels = channels
+    
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+    
+    def slice(self, start, end):
+        """[start, end) 구간의 샘플 (복사 없는 뷰, 샘플 단위로 정확)"""
+        first = max(0, int(round(start * self.sample_rate)))
+        last = min(len(self.samples), int(round(end * self.sample_rate)))
+        return self.samples[first:max(first, last)]
+
+def get_pcm_paths(audio_path):
+    """원본 오디오의 PCM 캐시 경로 (pcm, 메타데이터)"""
+    pcm_path = f"{audio_path}{PCM_SUFFIX}"
+    return pcm_path, f"{pcm_path}.json"
+
+def get_audio_format(audio_path):
+    """원본 오디오의 샘플레이트/채널 수 (프로브 불가 시 기본값으로 리샘플링)"""
+    sample_rate = DEFAULT_SAMPLE_RATE
+    media_info = get_media_info(audio_path)
+    if media_info:
+        for stream in media_info['streams']:
+            if stream['type'] == 'audio' and stream.get('sample_rate'):
+                sample_rate = stream['sample_rate']
+                break
+    return sample_rate, DEFAULT_CHANNELS
+
+def read_pcm_meta(meta_path, audio_path):
+    """캐시 메타데이터가 현재 원본 파일과 일치하면 반환 (아니면 None)"""
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    stat = os.stat(audio_path)
+    if meta.get('size') != stat.st_size or meta.get('mtime') != stat.st_mtime:
+        return None
+    if meta.get('version') != PCM_CACHE_VERSION:
+        return None
+    return meta
+
+def decode_to_pcm(audio_path):
+    """
+    원본 오디오 트랙을 한 번 디코딩해 s16le PCM 파일로 저장, 반환: 메타데이터 (실패 시 None)
+    부분 다운로드처럼 타임스탬프가 비어 있는 구간은 무음으로 채워 샘플 위치 = 미디어 시간(0초 기준)
+    """
+    pcm_path, meta_path = get_pcm_paths(audio_path)
+    sample_rate, channels = get_audio_format(audio_path)
+    stat = os.stat(audio_path)
+    part_path = f"{pcm_path}.part"
+    
+    print(f"🎵 오디오 디코딩 캐시 생성: {os.path.basename(audio_path)}")
+    result = run_ffmpeg_with_progress([
+        'ffmpeg', '-y',
+        '-i', audio_path,
+        '-map', '0:a:0',
+        '-af', 'aresample=async=1:first_pts=0',
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ar', str(sample_rate),
+        '-ac', str(channels),
+        part_path
+    ], f"오디오 디코딩 {os.path.basename(audio_path)}", (get_media_info(audio_path) or {}).get('duration'), track=False)
+    
+    if result.returncode != 0:
+        print(f"⚠️ 오디오 디코딩 실패 (원본에서 직접 자름): {result.stderr[-300:]}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return None
+    
+    os.replace(part_path, pcm_path)
+    meta = {
+        'version': PCM_CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sample_rate': sample_rate,
+        'channels': channels
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return meta
+
+def get_pcm_audio(audio_path):
+    """
+    원본 오디오의 PCM 캐시를 메모리 매핑해서 반환 (없으면 한 번만 디코딩)
+    같은 원본을 여러 클립 작업이 동시에 요청해도 디코딩은 한 번만 실행
+    반환: PcmAudio (디코딩 실패 시 None)
+    """
+    key = os.path.abspath(audio_path)
+    with _loaded_lock:
+        decode_lock = _decode_locks.setdefault(key, threading.Lock())
+    
+    with decode_lock:
+        with _loaded_lock:
+            cached = _loaded.get(key)
+        pcm_path, meta_path = get_pcm_paths(audio_path)
+        meta = read_pcm_meta(meta_path, audio_path)
+        if cached is not None and meta is not None:
+            return cached
+        
+        if meta is None or not os.path.exists(pcm_path):
+            meta = decode_to_pcm(audio_path)
+            if meta is None:
+                return None
+        
+        channels = meta['channels']
+        if os.path.getsize(pcm_path) < channels * np.dtype(PCM_DTYPE).itemsize:
+            return None
+        samples = np.memmap(pcm_path, dtype=PCM_DTYPE, mode='r').reshape(-1, channels)
+        audio = PcmAudio(samples, meta['sample_rate'], channels)
+        
+        with _loaded_lock:
+            _loaded[key] = audio
+        return audio
+
+def release_pcm_audio(audio_path):
+    """영상 처리가 끝난 PCM 캐시의 메모리 매핑 해제 (사용 중인 작업이 끝나면 닫힘)"""
+    key = os.path.abspath(audio_path)
+    with _loaded_lock:
+        _loaded.pop(key, None)
+        _decode_locks.pop(key, None)
+
+def get_audio_encoder(output_path):
+    """출력 확장자에 맞는 (코덱 이름, 인코더 옵션)"""
+    return AUDIO_ENCODERS.get(Path(output_path).suffix.lower(), AUDIO_ENCODERS['.m4a'])
+
+def write_audio_clip(audio, start, end, output_path, label=None):
+    """PCM 구간을 stdin으로 넘겨 오디오 클립 인코딩 (원본 seek/디코딩 없음)"""
+    clip = audio.slice(start, end)
+    cmd = [
+        'ffmpeg', '-y',
+        '-f', 's16le',
+        '-ar', str(audio.sample_rate),
+        '-ac', str(audio.channels),
+        '-i', 'pipe:0'
+    ] + get_audio_encoder(output_path)[1] + [output_path]
+    
+    # 메모리 매핑 배열의 연속 구간이므로 memoryview로 복사 없이 전달
+    return run_ffmpeg_with_progress(cmd, label, input_data=memoryview(np.ascontiguousarray(clip)), track=False)
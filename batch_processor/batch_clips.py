@@ -5,69 +5,101 @@ import os
 import csv
 import glob
 import re
+import queue
+import argparse
+import threading
 from pathlib import Path
 from collections import defaultdict
 from utils import (
     load_config, extract_video_id, time_to_seconds, 
-    normalize_label, download_youtube_video, create_clip
+    normalize_label, sanitize_filename, download_youtube_video, run_clip_jobs,
+    get_clip_workers, get_encode_settings, get_job_media_seconds, meets_download_target,
+    get_extra_profiles, validate_encode_profiles
+)
+from probe_cache import get_media_info, get_source_duration, check_clip_range
+from download_manager import iter_ordered
+from partial_download import load_coverage, is_covered
+from download_catalog import lookup_download, remove_download, touch_download, flush_touches
+from audio_cache import release_pcm_audio
+from download_store import get_max_bytes, pin_downloads, unpin_download, enforce_download_budget, release_download
+from clip_index import build_clip_index
+from clip_manifest import load_manifest, write_manifest, append_manifest, build_manifest_record
+from clip_fingerprint import (
+    get_source_identity, get_clip_fingerprints, get_stale_outputs, get_rebuild_outputs, get_recorded_fingerprints
+)
+from csv_ingest import iter_video_groups, DEFAULT_RUN_ROWS
+from run_report import start_run_report, finish_run_report, timed_stage
+from ffmpeg_progress import start_progress_tracker, plan_progress, add_progress_listener, make_console_listener
+from job_journal import (
+    open_job_journal, close_job_journal, journal_download, journal_clip,
+    is_journal_done, get_reserved_clip_number, get_reserved_clip_numbers
+)
+from batch_plan import (
+    get_profile_key, load_cached_metadata, get_planned_source, estimate_download_bytes,
+    new_batch_plan, add_video_plan, finish_batch_plan, print_batch_plan, write_batch_plan
 )
 
+# 스트리밍 모드에서 화면에 출력할 최대 무시 행 수 (나머지는 개수만 집계)
+MAX_INVALID_PRINT = 50
+
+def iter_batch_csv(csv_path, config, on_invalid):
+    """일괄처리용 CSV를 한 행씩 검증하며 유효한 클립 반환 (잘못된 행은 on_invalid로 전달)"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        
+        for row_num, row in enumerate(reader, start=2):
+            # 주석 행 건너뛰기
+            if any(str(value).strip().startswith('#') for value in row.values()):
+                continue
+            
+            try:
+                url = row['url'].strip()
+                start = time_to_seconds(row['start'])
+                end = time_to_seconds(row['end'])
+                label = normalize_label(row['label'])
+                
+                # video_id 추출
+                video_id = extract_video_id(url)
+                if not video_id:
+                    on_invalid(f"행 {row_num}: 잘못된 YouTube URL")
+                    continue
+                
+                # 유효성 검사
+                duration = end - start
+                min_dur = config['clips']['min_duration']
+                max_dur = config['clips']['max_duration']
+                
+                if label is None:
+                    on_invalid(f"행 {row_num}: 잘못된 라벨 '{row['label']}'")
+                    continue
+                
+                if duration < min_dur or duration > max_dur:
+                    on_invalid(f"행 {row_num}: 클립 길이 {duration:.1f}초 (허용: {min_dur}-{max_dur}초)")
+                    continue
+                
+                if start >= end:
+                    on_invalid(f"행 {row_num}: 시작시간이 종료시간보다 큼")
+                    continue
+                
+                yield {
+                    'url': url,
+                    'video_id': video_id,
+                    'start': start,
+                    'end': end,
+                    'label': label,
+                    'duration': duration,
+                    'row_num': row_num
+                }
+            
+            except (ValueError, KeyError) as e:
+                on_invalid(f"행 {row_num}: 데이터 파싱 오류 ({e})")
+
 def parse_batch_csv(csv_path, config):
     """일괄처리용 CSV 파싱"""
-    clips_data = []
     invalid_clips = []
     
     try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row_num, row in enumerate(reader, start=2):
-                # 주석 행 건너뛰기
-                if any(str(value).strip().startswith('#') for value in row.values()):
-                    continue
-                
-                try:
-                    url = row['url'].strip()
-                    start = time_to_seconds(row['start'])
-                    end = time_to_seconds(row['end'])
-                    label = normalize_label(row['label'])
-                    
-                    # video_id 추출
-                    video_id = extract_video_id(url)
-                    if not video_id:
-                        invalid_clips.append(f"행 {row_num}: 잘못된 YouTube URL")
-                        continue
-                    
-                    # 유효성 검사
-                    duration = end - start
-                    min_dur = config['clips']['min_duration']
-                    max_dur = config['clips']['max_duration']
-                    
-                    if label is None:
-                        invalid_clips.append(f"행 {row_num}: 잘못된 라벨 '{row['label']}'")
-                        continue
-                        
-                    if duration < min_dur or duration > max_dur:
-                        invalid_clips.append(f"행 {row_num}: 클립 길이 {duration:.1f}초 (허용: {min_dur}-{max_dur}초)")
-                        continue
-                    
-                    if start >= end:
-                        invalid_clips.append(f"행 {row_num}: 시작시간이 종료시간보다 큼")
-                        continue
-                    
-                    clips_data.append({
-                        'url': url,
-                        'video_id': video_id,
-                        'start': start,
-                        'end': end,
-                        'label': label,
-                        'duration': duration,
-                        'row_num': row_num
-                    })
-                    
-                except (ValueError, KeyError) as e:
-                    invalid_clips.append(f"행 {row_num}: 데이터 파싱 오류 ({e})")
-                    
+        clips_data = list(iter_batch_csv(csv_path, config, invalid_clips.append))
     except Exception as e:
         print(f"❌ CSV 읽기 오류: {e}")
         return [], []
@@ -84,48 +116,79 @@ def group_clips_by_video(clips_data):
     
     return dict(grouped)
 
-def check_existing_download(video_id, config):
-    """기존 다운로드 확인"""
+def stream_video_groups(csv_path, config, ingest_stats):
+    """
+    CSV를 한 행씩 검증하면서 영상별 (video_id, clips) 그룹을 하나씩 반환 (batch.streaming_csv)
+    전체 클립 목록을 메모리에 올리지 않고, 집계는 ingest_stats에 누적
+    """
+    batch_config = config.get('batch', {})
+    
+    def on_invalid(message):
+        ingest_stats['invalid'] += 1
+        if ingest_stats['invalid'] <= MAX_INVALID_PRINT:
+            print(f"⚠️ 무시된 클립: {message}")
+        elif ingest_stats['invalid'] == MAX_INVALID_PRINT + 1:
+            print(f"⚠️ 무시된 클립이 {MAX_INVALID_PRINT}개를 넘어 이후는 개수만 집계합니다")
+    
+    def count_clips(clips):
+        for clip in clips:
+            ingest_stats['clips'] += 1
+            # 읽은 행의 영상은 그룹 처리가 끝날 때(release_download)까지 디스크 예산 삭제 대상에서 제외
+            pin_downloads([clip['video_id']])
+            yield clip
+    
+    groups = iter_video_groups(
+        count_clips(iter_batch_csv(csv_path, config, on_invalid)),
+        batch_config.get('csv_sort_run_rows', DEFAULT_RUN_ROWS),
+        batch_config.get('csv_presorted', False)
+    )
+    for video_id, clips in groups:
+        ingest_stats['videos'] += 1
+        yield video_id, clips
+
+def check_existing_download(video_id, config, clips=None, prune=True):
+    """
+    기존 다운로드 확인 (카탈로그 조회)
+    부분 다운로드 폴더는 clips 구간을 모두 포함할 때만, 화질이 기록된 영상은 목표 화질 이상일 때만 유효
+    디스크 예산(download.max_bytes) 때문에 삭제된 영상은 다시 받음
+    prune=False면 파일이 지워진 항목도 카탈로그에서 제거하지 않고 마지막 사용 시각도 갱신하지 않음 (--plan)
+    """
     base_dir = config['download']['base_directory']
     
-    # 모든 다운로드 폴더 확인
     if not os.path.exists(base_dir):
         return False, None, None, None
     
-    for folder_name in os.listdir(base_dir):
-        folder_path = os.path.join(base_dir, folder_name)
-        if not os.path.isdir(folder_path):
-            continue
-        
-        # video_info.txt 파일 확인
-        info_path = os.path.join(folder_path, "video_info.txt")
-        if os.path.exists(info_path):
-            # video_id 확인
-            try:
-                with open(info_path, 'r', encoding='utf-8') as f:
-                    info_content = f.read()
-                    if f"video_id: {video_id}" in info_content:
-                        # 비디오/오디오 파일 확인
-                        video_files = glob.glob(os.path.join(folder_path, f"*_video.mp4"))
-                        audio_files = glob.glob(os.path.join(folder_path, f"*_audio.*"))
-                        
-                        if video_files and audio_files:
-                            return True, video_files[0], audio_files[0], folder_name
-            except:
-                pass
-        
-        # 이전 방식으로도 확인 (video_info.txt가 없는 경우)
-        video_files = glob.glob(os.path.join(folder_path, f"{video_id}_video.mp4"))
-        if video_files:
-            audio_files = glob.glob(os.path.join(folder_path, f"{video_id}_audio.*"))
-            if audio_files:
-                return True, video_files[0], audio_files[0], folder_name
-    
-    return False, None, None, None
+    entry = lookup_download(base_dir, video_id)
+    if not entry:
+        return False, None, None, None
+    
+    if entry['evicted_at']:
+        print("⚠️ 디스크 예산 때문에 삭제된 영상이라 다시 받습니다.")
+        return False, None, None, None
+    
+    # 카탈로그에는 있지만 파일이 지워진 경우
+    if not os.path.exists(entry['video_path']) or not os.path.exists(entry['audio_path']):
+        if prune:
+            remove_download(base_dir, video_id)
+        return False, None, None, None
+    
+    folder_path = os.path.join(base_dir, entry['folder'])
+    if clips is not None and not is_covered(clips, load_coverage(folder_path)):
+        print("⚠️ 부분 다운로드에 없는 구간이 있어 다시 받습니다.")
+        return False, None, None, None
+    
+    # 목표 화질이 높아진 경우에만 다시 받음 (더 높은 화질로 받아 둔 영상은 그대로 사용)
+    if not meets_download_target(entry, config):
+        print(f"⚠️ 다운로드된 화질({entry['video_height']}p {entry['video_fps']}fps)이 목표보다 낮아 다시 받습니다.")
+        return False, None, None, None
+    
+    if prune:
+        touch_download(base_dir, video_id)
+    return True, entry['video_path'], entry['audio_path'], entry['folder']
 
-def get_existing_clips(clips_dir):
-    """기존 클립 정보 스캔"""
-    existing_clips = {'funny': [], 'normal': [], 'boring': []}
+def scan_clip_files(clips_dir):
+    """클립 폴더를 스캔해 파일명에서 클립 정보 추출 (매니페스트가 없을 때만 사용)"""
+    clips = []
     
     for label in ['funny', 'normal', 'boring']:
         video_dir = os.path.join(clips_dir, label, 'video')
@@ -136,9 +199,22 @@ def get_existing_clips(clips_dir):
         for video_file in glob.glob(pattern):
             clip_info = parse_clip_filename(video_file)
             if clip_info:
-                existing_clips[label].append(clip_info)
+                clips.append(clip_info)
+    
+    return clips
+
+def get_existing_clips(clips_dir):
+    """기존 클립 정보 조회 (클립 매니페스트 기준, 중복 확인/번호 할당용 인덱스 반환)"""
+    clips = load_manifest(clips_dir)
     
-    return existing_clips
+    if clips is None:
+        # 매니페스트 도입 전 클립 폴더: 한 번만 스캔해서 매니페스트로 옮김
+        clips = scan_clip_files(clips_dir)
+        if clips:
+            write_manifest(clips_dir, clips)
+            print(f"📚 클립 매니페스트 생성: 기존 클립 {len(clips)}개 등록")
+    
+    return build_clip_index(clips)
 
 def parse_clip_filename(filename):
     """클립 파일명에서 정보 추출"""
@@ -171,103 +247,486 @@ def parse_clip_filename(filename):
 
 def check_duplicate_clip(clip_data, existing_clips, safe_title, video_id):
     """중복 클립 확인"""
-    label = clip_data['label']
-    start = clip_data['start']
-    end = clip_data['end']
-    
-    for existing in existing_clips[label]:
-        # safe_title 또는 video_id가 일치하는지 확인 (둘 중 하나라도 일치하면 중복으로 간주)
-        title_match = existing.get('safe_title') == safe_title
-        id_match = existing.get('video_id') == video_id
-        
-        if ((title_match or id_match) and
-            abs(existing['start'] - start) < 0.1 and
-            abs(existing['end'] - end) < 0.1):
-            return existing
-    
-    return None
+    # safe_title 또는 video_id가 일치하는지 확인 (둘 중 하나라도 일치하면 중복으로 간주)
+    return existing_clips.find_duplicate(clip_data['label'], [safe_title, video_id],
+                                         clip_data['start'], clip_data['end'])
 
 def get_next_clip_number(existing_clips, label):
     """다음 클립 번호 가져오기"""
-    if not existing_clips[label]:
-        return 1
-    
-    max_num = max(clip['clip_num'] for clip in existing_clips[label])
-    return max_num + 1
+    return existing_clips.next_clip_number(label)
 
-def process_video_clips(video_id, clips, video_path, audio_path, safe_title, config, existing_clips):
-    """특정 영상의 클립들 처리"""
-    stats = {'created': 0, 'skipped': 0, 'failed': 0}
+def get_label_prefix(label):
+    """라벨 접두사 (f: funny, n: normal, b: boring)"""
+    if label == 'funny':
+        return 'f'
+    elif label == 'normal':
+        return 'n'
+    else:  # boring
+        return 'b'
+
+def build_output_paths(clips_dir, label, base_filename, audio_suffix, config):
+    """클립 하나의 출력 경로 (현재 설정에 필요한 출력만)"""
+    output_paths = {
+        'video': os.path.join(clips_dir, label, 'video', f"{base_filename}.mp4"),
+        'audio': os.path.join(clips_dir, label, 'audio', f"{base_filename}{audio_suffix}"),
+    }
     
-    # 출력 디렉토리 생성
-    clips_dir = config['clips']['output_directory']
-    for label in ['funny', 'normal', 'boring']:
-        for subdir in ['video', 'audio']:
-            os.makedirs(os.path.join(clips_dir, label, subdir), exist_ok=True)
-        
-        if config['clips'].get('merge_clips', False):
-            os.makedirs(os.path.join(clips_dir, label, 'merged'), exist_ok=True)
+    if config['clips'].get('merge_clips', False):
+        output_paths['merged'] = os.path.join(clips_dir, label, 'merged', f"{base_filename}.mp4")
     
-    print(f"\n🎬 '{safe_title}' 클립 생성 시작... ({len(clips)}개)")
+    # 추가 프로필 클립 (clips/{라벨}/{프로필 이름}/)
+    for profile_name in get_extra_profiles(config):
+        output_paths[profile_name] = os.path.join(clips_dir, label, profile_name, f"{base_filename}.mp4")
     
+    return output_paths
+
+def assign_clip_jobs(video_id, clips, safe_title, audio_path, source_duration, source_identity, config,
+                     existing_clips, stats, quiet=False, probe=True):
+    """
+    중복 확인 및 클립 번호/출력 경로 할당 (ffmpeg 실행 없음, --plan에서도 사용)
+    할당한 클립은 existing_clips에 미리 등록되고, 건너뛴/불가능한 클립은 stats에 집계
+    이미 있는 클립도 원본/구간/인코딩 설정 지문이 달라졌거나 출력 파일이 없으면 같은 번호로 다시 생성
+    audio_path: 원본 오디오 경로 (다운로드 전이면 예정 경로, 확장자와 병합 오디오 코덱 결정용)
+    quiet=True면 클립별 진행 줄은 출력하지 않음
+    probe=False면 ffprobe를 실행하지 않음 (--plan, 프로브 캐시가 없으면 오디오 확장자로 병합 코덱 판단)
+    반환: 클립 작업 목록
+    """
+    clips_dir = config['clips']['output_directory']
+    audio_suffix = Path(audio_path).suffix
+    encode_settings = get_encode_settings(config, audio_path, probe)
+    rebuilding = set()
+    clip_jobs = []
     for i, clip_data in enumerate(clips, 1):
-        print(f"🔄 클립 {i}/{len(clips)} 처리 중... ({clip_data['start']}-{clip_data['end']}초, {clip_data['label']})")
+        if not quiet:
+            print(f"🔄 클립 {i}/{len(clips)} 처리 중... ({clip_data['start']}-{clip_data['end']}초, {clip_data['label']})")
+        
+        # 영상 길이를 넘는 클립은 ffmpeg 실행 전에 거부
+        range_error = check_clip_range(clip_data, source_duration)
+        if range_error:
+            print(f"❌ 불가능한 클립 (행 {clip_data['row_num']}): {range_error}")
+            stats['failed'] += 1
+            continue
         
         # 중복 확인
         duplicate = check_duplicate_clip(clip_data, existing_clips, safe_title, video_id)
         if duplicate:
-            print(f"⚠️ 중복 클립 건너뛰기: {duplicate['filename']}")
+            # 기존 클립: 지문이 달라진 출력만 같은 파일명으로 다시 생성 (클립 번호 유지)
+            base_filename = os.path.splitext(duplicate['filename'])[0]
+            output_paths = build_output_paths(clips_dir, duplicate['label'], base_filename, audio_suffix, config)
+            stale = get_stale_outputs(duplicate, clip_data, output_paths, source_identity, encode_settings)
+            if not stale or duplicate['filename'] in rebuilding:
+                print(f"⚠️ 중복 클립 건너뛰기: {duplicate['filename']}")
+                stats['skipped'] += 1
+                continue
+            
+            print(f"🔁 변경된 출력 다시 생성 ({', '.join(stale)}): {duplicate['filename']}")
+            rebuilding.add(duplicate['filename'])
+            clip_job = {
+                'clip_data': clip_data,
+                'output_paths': {
+                    kind: output_paths[kind] for kind in get_rebuild_outputs(stale, output_paths, encode_settings)
+                },
+                'clip_outputs': output_paths,
+                'base_filename': base_filename,
+                'entry': duplicate,
+                'fingerprints': get_clip_fingerprints(source_identity, clip_data, encode_settings, output_paths),
+                'rebuild': True
+            }
+            clip_jobs.append(clip_job)
+            continue
+        
+        # 겹치는 클립 건너뛰기 (옵션)
+        if (config['clips'].get('skip_overlapping', False) and
+                existing_clips.has_overlap(clip_data['label'], [safe_title, video_id], clip_data['start'], clip_data['end'])):
+            print(f"⚠️ 기존 클립과 구간이 겹쳐 건너뛰기")
             stats['skipped'] += 1
             continue
         
-        # 클립 번호 할당
+        # 클립 번호 할당 (--resume이면 이전 실행에서 할당했던 번호 재사용)
         label = clip_data['label']
-        clip_num = get_next_clip_number(existing_clips, label)
+        clip_num = get_reserved_clip_number(video_id, clip_data) or get_next_clip_number(existing_clips, label)
         
         # 파일명 생성 (safe_title 사용)
-        # 라벨에 따라 접두사 결정 (f: funny, n: normal, b: boring)
-        if label == 'funny':
-            label_prefix = 'f'
-        elif label == 'normal':
-            label_prefix = 'n'
-        else:  # boring
-            label_prefix = 'b'
-            
-        base_filename = f"{label_prefix}_{clip_num:03d}_{safe_title}_{clip_data['start']}_{clip_data['end']}"
+        base_filename = f"{get_label_prefix(label)}_{clip_num:03d}_{safe_title}_{clip_data['start']}_{clip_data['end']}"
         
-        output_paths = {
-            'video': os.path.join(clips_dir, label, 'video', f"{base_filename}.mp4"),
-            'audio': os.path.join(clips_dir, label, 'audio', f"{base_filename}{Path(audio_path).suffix}"),
+        output_paths = build_output_paths(clips_dir, label, base_filename, audio_suffix, config)
+        
+        # 기존 클립 목록에 미리 등록 (같은 배치 내 중복/번호 충돌 방지, 실패 시 제거)
+        clip_entry = {
+            'label': label,
+            'clip_num': clip_num,
+            'safe_title': safe_title,
+            'video_id': video_id,  # video_id 추가
+            'start': clip_data['start'],
+            'end': clip_data['end'],
+            'filename': f"{base_filename}.mp4"
         }
+        existing_clips.add(clip_entry)
+        
+        clip_job = {
+            'clip_data': clip_data,
+            'output_paths': output_paths,
+            'base_filename': base_filename,
+            'entry': clip_entry,
+            'fingerprints': get_clip_fingerprints(source_identity, clip_data, encode_settings, output_paths)
+        }
+        clip_jobs.append(clip_job)
+    
+    return clip_jobs
+
+def process_video_clips(video_id, clips, video_path, audio_path, safe_title, config, existing_clips):
+    """특정 영상의 클립들 처리"""
+    stats = {'created': 0, 'rebuilt': 0, 'skipped': 0, 'failed': 0}
+    
+    # 출력 디렉토리 생성
+    clips_dir = config['clips']['output_directory']
+    for label in ['funny', 'normal', 'boring']:
+        for subdir in ['video', 'audio'] + get_extra_profiles(config):
+            os.makedirs(os.path.join(clips_dir, label, subdir), exist_ok=True)
         
         if config['clips'].get('merge_clips', False):
-            output_paths['merged'] = os.path.join(clips_dir, label, 'merged', f"{base_filename}.mp4")
+            os.makedirs(os.path.join(clips_dir, label, 'merged'), exist_ok=True)
+    
+    print(f"\n🎬 '{safe_title}' 클립 생성 시작... ({len(clips)}개)")
+    
+    # 실제 미디어 길이 조회 (다운로드 폴더의 프로브 캐시)
+    source_duration = get_source_duration(get_media_info(video_path), get_media_info(audio_path))
+    
+    # 원본 식별값 (카탈로그에 기록된 비디오 스트림 itag)
+    entry = lookup_download(config['download']['base_directory'], video_id)
+    source_identity = get_source_identity(video_id, entry.get('video_itag') if entry else None)
+    
+    # 1단계: 중복 확인 및 클립 번호/출력 경로 할당
+    clip_jobs = assign_clip_jobs(video_id, clips, safe_title, audio_path, source_duration, source_identity,
+                                 config, existing_clips, stats)
+    if not clip_jobs:
+        return stats
+    
+    # 2단계: 클립 생성 (batch.clip_workers 만큼 동시 실행)
+    media_seconds = get_job_media_seconds(clip_jobs, config)
+    plan_progress(media_seconds)
+    results = run_clip_jobs(video_path, audio_path, clip_jobs, config)
+    encode_settings = get_encode_settings(config, audio_path)
+    source_paths = {'video': video_path, 'audio': audio_path}
+    
+    # 인코딩 처리량 기록 (--plan의 인코딩 시간 예측에 사용)
+    with timed_stage('encode_clips', video_id=video_id, encode_mode=config['clips'].get('encode_mode', 'reencode'),
+                     profile=get_profile_key(config), clip_workers=get_clip_workers(config),
+                     clips=len(clip_jobs), media_seconds=round(media_seconds, 3)) as stage:
+        for job, success, message in results:
+            if success:
+                print(f"✅ {job['base_filename']} {'다시 생성' if job.get('rebuild') else '생성'} 완료")
+                stats['rebuilt' if job.get('rebuild') else 'created'] += 1
+                
+                # 매니페스트에 기록 (다음 실행 시 폴더 스캔 없이 중복 확인, 다시 생성한 클립은 마지막 기록 사용)
+                with timed_stage('bookkeeping', op='manifest', clip=job['base_filename']):
+                    append_manifest(clips_dir, [
+                        build_manifest_record(job['entry'], job.get('clip_outputs', job['output_paths']),
+                                              source_paths, encode_settings, get_recorded_fingerprints(job),
+                                              source_identity)
+                    ])
+                journal_clip(job, 'done')
+            else:
+                print(f"❌ 클립 생성 실패: {message}")
+                stats['failed'] += 1
+                # 다시 생성에 실패한 기존 클립은 이전 출력이 그대로 남아 있으므로 목록에서 제거하지 않음
+                if not job.get('rebuild'):
+                    existing_clips.remove(job['entry'])
+                journal_clip(job, 'failed')
+        stage.update(created=stats['created'] + stats['rebuilt'], failed=stats['failed'])
+    
+    # 영상의 클립을 모두 만들었으면 오디오 캐시 메모리 매핑 해제
+    release_pcm_audio(audio_path)
+    return stats
+
+def prepare_video_source(video_id, clips, config):
+    """
+    영상 소스 준비 (기존 다운로드 확인 또는 다운로드)
+    반환: (status, source) - status: 'existing' / 'downloaded' / 'failed'
+    """
+    # 기존 다운로드 확인
+    with timed_stage('bookkeeping', op='download_lookup', video_id=video_id):
+        exists, video_path, audio_path, existing_title = check_existing_download(video_id, config, clips)
+    
+    if exists and config.get('batch', {}).get('skip_existing_downloads', True):
+        print("✅ 이미 다운로드됨 - 건너뛰기")
+        return 'existing', {
+            'video_path': video_path,
+            'audio_path': audio_path,
+            'safe_title': existing_title  # 기존 다운로드는 폴더명을 제목으로 사용
+        }
+    
+    # 디스크 예산: 받을 용량(메타데이터 캐시 기준)만큼 오래 사용하지 않은 다운로드를 미리 삭제
+    if get_max_bytes(config):
+        expected = estimate_download_bytes(load_cached_metadata(config, video_id), clips, config)
+        enforce_download_budget(config, expected or 0)
+    
+    # 다운로드 실행
+    print("⬇️ 다운로드 시작...")
+    url = clips[0]['url']  # 첫 번째 클립의 URL 사용
+    download_result = download_youtube_video(url, video_id, config, clips)
+    enforce_download_budget(config)
+    
+    if not download_result:
+        print("❌ 다운로드 실패 - 이 영상의 클립들을 건너뜁니다.")
+        return 'failed', None
+    
+    return 'downloaded', {
+        'video_path': download_result['video_path'],
+        'audio_path': download_result['audio_path'],
+        'safe_title': download_result['safe_title']
+    }
+
+def encode_video_source(video_id, clips, source, config, existing_clips, total_stats):
+    """준비된 소스로 클립 생성 후 통계 합산"""
+    safe_title = source['safe_title']
+    with timed_stage('process_clips', video_id=video_id, clips=len(clips)) as stage:
+        clip_stats = process_video_clips(video_id, clips, source['video_path'], source['audio_path'],
+                                         safe_title, config, existing_clips)
+        stage.update(clip_stats)
+    
+    # 통계 합계
+    for key in ['created', 'rebuilt', 'skipped', 'failed']:
+        total_stats[key] += clip_stats[key]
+    
+    print(f"📊 영상 '{safe_title}' 완료: 생성 {clip_stats['created']}, 다시 생성 {clip_stats['rebuilt']}, "
+          f"건너뜀 {clip_stats['skipped']}, 실패 {clip_stats['failed']}")
+
+def count_source_status(status, total_stats):
+    """다운로드 상태를 통계에 반영"""
+    if status == 'existing':
+        total_stats['skipped_download'] += 1
+    elif status == 'downloaded':
+        total_stats['downloaded'] += 1
+
+def iter_prepared_sources(video_groups, config, before_submit=None):
+    """
+    영상 소스를 준비하면서 순서대로 반환 (video_groups: (video_id, clips) 순회 가능 객체)
+    download.max_concurrent_videos개까지 다음 영상을 미리 다운로드
+    """
+    max_videos = config.get('download', {}).get('max_concurrent_videos', 1)
+    
+    def prepare(item):
+        video_id, clips = item
+        pin_downloads([video_id])
+        journal_download(video_id, 'running')
+        try:
+            with timed_stage('prepare_source', video_id=video_id) as stage:
+                status, source = prepare_video_source(video_id, clips, config)
+                stage['status'] = status
+        except Exception as e:
+            print(f"❌ 다운로드 오류 ({video_id}): {e}")
+            status, source = 'failed', None
         
-        # 클립 생성
-        success, message = create_clip(video_path, audio_path, clip_data, output_paths, config)
+        journal_download(video_id, 'failed' if status == 'failed' else 'done', source=status)
+        return status, source
+    
+    for (video_id, clips), (status, source) in iter_ordered(video_groups, prepare, max_videos, before_submit):
+        yield video_id, clips, status, source
+
+def skip_journal_done(video_groups, total_stats):
+    """
+    작업 저널에서 완료된 행 제외 (--resume, 남은 행이 없는 영상은 다운로드 확인도 생략)
+    남은 영상은 다운로드 작업 대기(pending)로 기록
+    """
+    for video_id, clips in video_groups:
+        remaining = [clip for clip in clips if not is_journal_done(video_id, clip)]
+        total_stats['resumed'] += len(clips) - len(remaining)
+        if remaining:
+            journal_download(video_id, 'pending', clips=len(remaining))
+            yield video_id, remaining
+        else:
+            # 남은 행이 없으면 처리할 일이 없으므로 고정 해제 (스트리밍 모드는 읽을 때 고정됨)
+            unpin_download(video_id)
+
+def run_serial_batch(video_groups, config, existing_clips, total_stats):
+    """영상별로 다운로드 → 클립 생성을 순서대로 실행"""
+    sources = iter_prepared_sources(video_groups, config)
+    while True:
+        try:
+            video_id, clips, status, source = next(sources)
+        except StopIteration:
+            break
+        except Exception as e:
+            # CSV 스트리밍 중 오류 (인코딩/다운로드 오류는 각 단계에서 처리) - 지금까지 처리한 결과로 마무리
+            print(f"❌ 다운로드 단계 오류: {e}")
+            break
         
-        if success:
-            print(f"✅ {base_filename} 생성 완료")
-            stats['created'] += 1
+        print(f"\n" + "=" * 30)
+        print(f"🎥 영상 ID: {video_id}")
+        print(f"📋 클립 개수: {len(clips)}개")
+        
+        count_source_status(status, total_stats)
+        
+        if status == 'failed':
+            release_download(config, video_id)
+            if not config.get('batch', {}).get('continue_on_error', True):
+                break
+            continue
+        
+        try:
+            encode_video_source(video_id, clips, source, config, existing_clips, total_stats)
+        finally:
+            release_download(config, video_id)
+
+def get_source_size(source):
+    """다운로드된 소스 파일 크기 합계 (바이트)"""
+    total = 0
+    for key in ['video_path', 'audio_path']:
+        path = source.get(key) if source else None
+        if path and os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+def run_pipelined_batch(video_groups, config, existing_clips, total_stats):
+    """
+    다운로드 단계와 인코딩 단계를 제한된 큐로 연결해 동시에 실행
+    인코딩 대기 중인 다운로드 용량이 batch.pipeline_disk_budget_mb를 넘으면 다음 다운로드를 미룸
+    """
+    batch_config = config.get('batch', {})
+    queue_size = max(1, batch_config.get('pipeline_queue_size', 2))
+    disk_budget = batch_config.get('pipeline_disk_budget_mb', 0) * 1024 * 1024
+    
+    source_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    disk_lock = threading.Condition()
+    in_flight = {'bytes': 0}
+    
+    def put_item(item):
+        # 인코딩 단계가 중단되면 큐가 비워지지 않으므로 주기적으로 중단 여부 확인
+        while not stop_event.is_set():
+            try:
+                source_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def wait_for_disk_budget():
+        # 디스크 예산 확인 (아직 인코딩되지 않은 다운로드 용량)
+        with disk_lock:
+            while disk_budget and in_flight['bytes'] >= disk_budget and not stop_event.is_set():
+                disk_lock.wait(timeout=0.5)
+        return not stop_event.is_set()
+    
+    def download_stage():
+        sources = iter_prepared_sources(video_groups, config, before_submit=wait_for_disk_budget)
+        try:
+            for video_id, clips, status, source in sources:
+                print(f"\n⬇️ [다운로드 단계] 영상 ID: {video_id} 준비 완료 ({status})")
+                
+                size = get_source_size(source) if status == 'downloaded' else 0
+                with disk_lock:
+                    in_flight['bytes'] += size
+                
+                if not put_item((video_id, clips, status, source, size)):
+                    return
+        except Exception as e:
+            # CSV 스트리밍 중 오류가 나도 인코딩 단계가 멈추지 않도록 종료 신호 전달
+            print(f"❌ 다운로드 단계 오류: {e}")
+        
+        put_item(None)
+    
+    downloader = threading.Thread(target=download_stage, daemon=True)
+    downloader.start()
+    
+    try:
+        while True:
+            item = source_queue.get()
+            if item is None:
+                break
             
-            # 기존 클립 목록 업데이트
-            existing_clips[label].append({
-                'label': label,
-                'clip_num': clip_num,
-                'safe_title': safe_title,
-                'video_id': video_id,  # video_id 추가
-                'start': clip_data['start'],
-                'end': clip_data['end'],
-                'filename': f"{base_filename}.mp4"
-            })
-        else:
-            print(f"❌ 클립 생성 실패: {message}")
-            stats['failed'] += 1
+            video_id, clips, status, source, size = item
+            print(f"\n" + "=" * 30)
+            print(f"🎥 [인코딩 단계] 영상 ID: {video_id}")
+            print(f"📋 클립 개수: {len(clips)}개")
+            
+            count_source_status(status, total_stats)
+            
+            if status == 'failed':
+                release_download(config, video_id)
+                if not config.get('batch', {}).get('continue_on_error', True):
+                    break
+                continue
+            
+            try:
+                encode_video_source(video_id, clips, source, config, existing_clips, total_stats)
+            finally:
+                release_download(config, video_id)
+                with disk_lock:
+                    in_flight['bytes'] -= size
+                    disk_lock.notify_all()
+    finally:
+        stop_event.set()
+        with disk_lock:
+            disk_lock.notify_all()
+        downloader.join(timeout=1.0)
+
+def plan_video(video_id, clips, config, existing_clips):
+    """
+    영상 하나의 실행 계획 (다운로드 확인 → 중복 확인/클립 번호 할당까지, ffmpeg/네트워크 없음)
+    다운로드 전 영상은 메타데이터 캐시의 제목/길이/스트림 크기 사용 (캐시가 없으면 video_id 기준으로만 중복 확인)
+    """
+    exists, video_path, audio_path, existing_title = check_existing_download(video_id, config, clips, prune=False)
+    download = not (exists and config.get('batch', {}).get('skip_existing_downloads', True))
+    metadata = load_cached_metadata(config, video_id)
     
-    return stats
+    if download:
+        # 다운로드될 스트림 기준 (오디오는 확장자만 필요하므로 예정 파일명 사용)
+        safe_title = sanitize_filename(metadata['title']) if metadata else None
+        audio_suffix, video_itag = get_planned_source(metadata, config)
+        audio_path = f"{video_id}_audio{audio_suffix}"
+        source_duration = metadata['length'] if metadata else None
+    else:
+        # 프로브 캐시에 있는 길이만 사용 (ffprobe 실행 안 함)
+        safe_title = existing_title
+        video_itag = (lookup_download(config['download']['base_directory'], video_id) or {}).get('video_itag')
+        source_duration = get_source_duration(get_media_info(video_path, probe=False),
+                                              get_media_info(audio_path, probe=False))
+    
+    stats = {'created': 0, 'rebuilt': 0, 'skipped': 0, 'failed': 0}
+    clip_jobs = assign_clip_jobs(video_id, clips, safe_title or video_id, audio_path, source_duration,
+                                 get_source_identity(video_id, video_itag), config, existing_clips, stats,
+                                 quiet=True, probe=False)
+    
+    return {
+        'video_id': video_id,
+        'title': safe_title,
+        'download': download,
+        'bytes': estimate_download_bytes(metadata, clips, config) if download else None,
+        'clips': len(clips),
+        'encode_clips': len(clip_jobs),
+        'rebuild_clips': sum(1 for job in clip_jobs if job.get('rebuild')),
+        'skipped_clips': stats['skipped'],
+        'failed_clips': stats['failed'],
+        'media_seconds': round(get_job_media_seconds(clip_jobs, config), 3)
+    }
+
+def plan_batch(video_groups, config, existing_clips):
+    """--plan: 다운로드할 영상/용량, 인코딩할 클립, 예상 인코딩 시간 계산 (실제 다운로드/인코딩 없음)"""
+    plan = new_batch_plan(config)
+    try:
+        for video_id, clips in video_groups:
+            add_video_plan(plan, plan_video(video_id, clips, config, existing_clips))
+    except Exception as e:
+        # CSV 스트리밍 중 오류 - 지금까지 읽은 행까지만 계획
+        print(f"❌ CSV 읽기 오류: {e}")
+    return plan
+
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="timestamps.csv의 클립을 일괄 다운로드/생성")
+    parser.add_argument('--plan', action='store_true',
+                        help="다운로드/인코딩 없이 예상 다운로드 용량, 인코딩할 클립, 예상 인코딩 시간만 출력")
+    parser.add_argument('--plan-output', help="실행 계획 JSON 저장 경로 (--plan)")
+    parser.add_argument('--resume', action='store_true',
+                        help="중단된 이전 실행에 이어서 처리 (작업 저널에서 완료된 행은 건너뛰고 클립 번호 재사용)")
+    return parser.parse_args()
 
 def main():
     """메인 실행 함수"""
+    args = parse_args()
+    
     print("🎬 YouTube 일괄 클립 생성기")
     print("=" * 50)
     
@@ -276,6 +735,18 @@ def main():
     print(f"📋 설정 로드 완료")
     print(f"   클립 길이: {config['clips']['min_duration']}-{config['clips']['max_duration']}초")
     print(f"   클립 병합: {'활성화' if config['clips'].get('merge_clips', False) else '비활성화'}")
+    print(f"   인코딩 모드: {config['clips'].get('encode_mode', 'reencode')}")
+    print(f"   동시 클립 작업: {get_clip_workers(config)}개")
+    
+    # 인코딩 프로필 확인 (잘못된 이름이면 클립마다 실패하므로 먼저 중단)
+    try:
+        validate_encode_profiles(config)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if config['clips'].get('video_profile') or get_extra_profiles(config):
+        extra_profiles = ', '.join(get_extra_profiles(config)) or '없음'
+        print(f"   인코딩 프로필: {config['clips'].get('video_profile') or '기본'} (추가: {extra_profiles})")
     
     # CSV 파일 확인
     csv_path = "timestamps.csv"
@@ -284,67 +755,87 @@ def main():
         print("   timestamps.csv 파일을 생성하고 데이터를 입력해주세요.")
         return
     
-    # CSV 파싱
-    print(f"\n📝 {csv_path} 파싱 중...")
-    clips_data, invalid_clips = parse_batch_csv(csv_path, config)
+    # 통계 / 단계별 실행 보고서 (report.enabled)
+    total_stats = {'downloaded': 0, 'skipped_download': 0, 'created': 0, 'rebuilt': 0, 'skipped': 0, 'failed': 0,
+                   'resumed': 0}
+    ingest_stats = None
+    if not args.plan:
+        start_run_report(config, 'batch_clips')
+        
+        # 작업 저널 (이전 실행의 미완성 출력 정리, --resume이면 이어서 기록)
+        open_job_journal(config, args.resume, csv=os.path.abspath(csv_path))
+        
+        # ffmpeg 진행률 (클립별 fps/배속 + 전체 ETA)
+        start_progress_tracker()
+        if config.get('batch', {}).get('show_progress', True):
+            add_progress_listener(make_console_listener())
+    
+    # 기존 클립 스캔
+    with timed_stage('bookkeeping', op='clip_index'):
+        existing_clips = get_existing_clips(config['clips']['output_directory'])
+    for label, clip_num in get_reserved_clip_numbers():
+        existing_clips.reserve_clip_number(label, clip_num)
     
-    if invalid_clips:
-        print("⚠️ 무시된 클립들:")
-        for invalid in invalid_clips:
-            print(f"   {invalid}")
+    if config.get('batch', {}).get('streaming_csv', False):
+        # 스트리밍 모드: 영상 그룹이 준비되는 대로 처리 (전체 CSV를 메모리에 올리지 않음)
+        print(f"\n📝 {csv_path} 스트리밍 처리")
+        ingest_stats = {'clips': 0, 'videos': 0, 'invalid': 0}
+        video_groups = stream_video_groups(csv_path, config, ingest_stats)
+    else:
+        # CSV 파싱
+        print(f"\n📝 {csv_path} 파싱 중...")
+        with timed_stage('csv_parse') as stage:
+            clips_data, invalid_clips = parse_batch_csv(csv_path, config)
+            stage.update(clips=len(clips_data), invalid=len(invalid_clips))
+        
+        if invalid_clips:
+            print("⚠️ 무시된 클립들:")
+            for invalid in invalid_clips:
+                print(f"   {invalid}")
+        
+        if not clips_data:
+            print("❌ 처리할 유효한 클립이 없습니다.")
+            close_job_journal(total_stats)
+            finish_run_report(config, total_stats)
+            return
+        
+        # 영상별 그룹핑
+        grouped_clips = group_clips_by_video(clips_data)
+        print(f"\n📊 총 {len(clips_data)}개 클립, {len(grouped_clips)}개 영상")
+        video_groups = grouped_clips.items()
     
-    if not clips_data:
-        print("❌ 처리할 유효한 클립이 없습니다.")
+    # 실행 계획만 출력 (다운로드 확인/중복 확인까지, ffmpeg/네트워크 없음)
+    if args.plan:
+        plan = plan_batch(video_groups, config, existing_clips)
+        plan['totals']['invalid_rows'] = ingest_stats['invalid'] if ingest_stats is not None else len(invalid_clips)
+        print_batch_plan(finish_batch_plan(plan, config))
+        if args.plan_output:
+            write_batch_plan(plan, args.plan_output)
         return
     
-    # 영상별 그룹핑
-    grouped_clips = group_clips_by_video(clips_data)
-    print(f"\n📊 총 {len(clips_data)}개 클립, {len(grouped_clips)}개 영상")
+    # 각 영상 처리 (파이프라인 모드: 다운로드와 인코딩을 겹쳐서 실행)
+    video_groups = skip_journal_done(video_groups, total_stats)
     
-    # 기존 클립 스캔
-    existing_clips = get_existing_clips(config['clips']['output_directory'])
+    # 디스크 예산: 처리할 행이 남은 영상은 삭제하지 않음
+    # 스트리밍 모드는 아직 읽지 않은 행의 영상을 알 수 없으므로 시작 시 삭제하지 않음 (읽은 행의 영상을 고정하고 다운로드 전에 확인)
+    if get_max_bytes(config) and ingest_stats is None:
+        video_groups = list(video_groups)
+        pin_downloads(video_id for video_id, _ in video_groups)
+        enforce_download_budget(config)
     
-    # 통계
-    total_stats = {'downloaded': 0, 'skipped_download': 0, 'created': 0, 'skipped': 0, 'failed': 0}
+    if config.get('batch', {}).get('pipeline', False):
+        run_pipelined_batch(video_groups, config, existing_clips, total_stats)
+    else:
+        run_serial_batch(video_groups, config, existing_clips, total_stats)
+    flush_touches(config['download']['base_directory'])
     
-    # 각 영상 처리
-    for video_id, clips in grouped_clips.items():
-        print(f"\n" + "=" * 30)
-        print(f"🎥 영상 ID: {video_id}")
-        print(f"📋 클립 개수: {len(clips)}개")
-        
-        # 기존 다운로드 확인
-        exists, video_path, audio_path, existing_title = check_existing_download(video_id, config)
-        
-        if exists and config.get('batch', {}).get('skip_existing_downloads', True):
-            print("✅ 이미 다운로드됨 - 건너뛰기")
-            safe_title = existing_title  # 기존 다운로드는 video_id를 제목으로 사용
-            total_stats['skipped_download'] += 1
-        else:
-            # 다운로드 실행
-            print("⬇️ 다운로드 시작...")
-            url = clips[0]['url']  # 첫 번째 클립의 URL 사용
-            download_result = download_youtube_video(url, video_id, config)
-            
-            if not download_result:
-                print("❌ 다운로드 실패 - 이 영상의 클립들을 건너뜁니다.")
-                if not config.get('batch', {}).get('continue_on_error', True):
-                    break
-                continue
-            
-            video_path = download_result['video_path']
-            audio_path = download_result['audio_path']
-            safe_title = download_result['safe_title']
-            total_stats['downloaded'] += 1
-        
-        # 클립 생성
-        clip_stats = process_video_clips(video_id, clips, video_path, audio_path, safe_title, config, existing_clips)
-        
-        # 통계 합계
-        for key in ['created', 'skipped', 'failed']:
-            total_stats[key] += clip_stats[key]
-        
-        print(f"📊 영상 '{safe_title}' 완료: 생성 {clip_stats['created']}, 건너뜀 {clip_stats['skipped']}, 실패 {clip_stats['failed']}")
+    if ingest_stats is not None:
+        print(f"\n📊 총 {ingest_stats['clips']}개 클립, {ingest_stats['videos']}개 영상 (무시된 행 {ingest_stats['invalid']}개)")
+        if not ingest_stats['clips']:
+            print("❌ 처리할 유효한 클립이 없습니다.")
+            close_job_journal(total_stats)
+            finish_run_report(config, total_stats)
+            return
     
     # 최종 요약
     print(f"\n" + "=" * 50)
@@ -352,10 +843,17 @@ def main():
     print(f"   영상 다운로드: {total_stats['downloaded']}개")
     print(f"   영상 건너뜀: {total_stats['skipped_download']}개")
     print(f"   클립 생성: {total_stats['created']}개")
+    if total_stats['rebuilt']:
+        print(f"   클립 다시 생성: {total_stats['rebuilt']}개")
     print(f"   클립 건너뜀: {total_stats['skipped']}개")
     print(f"   클립 실패: {total_stats['failed']}개")
+    if total_stats['resumed']:
+        print(f"   이전 실행에서 완료: {total_stats['resumed']}개")
+    
+    close_job_journal(total_stats)
+    finish_run_report(config, total_stats)
     
-    if total_stats['created'] > 0:
+    if total_stats['created'] + total_stats['rebuilt'] > 0:
         clips_dir = config['clips']['output_directory']
         print(f"📁 클립 저장 위치:")
         print(f"   Funny: {os.path.join(clips_dir, 'funny', 'video')}")
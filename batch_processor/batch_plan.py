@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import glob
+import json
+from collections import defaultdict
+from utils import select_streams, get_extra_profiles, get_clip_workers
+from metadata_cache import load_metadata, estimate_stream_bytes
+from partial_download import get_clip_windows
+from run_report import DEFAULT_REPORT_DIR
+from ffmpeg_progress import format_eta
+
+# 처리량 기록이 없을 때 사용할 실시간 대비 인코딩 배속
+DEFAULT_REALTIME_FACTOR = 1.0
+
+# 처리량 계산에 사용할 최근 실행 보고서 수
+DEFAULT_HISTORY_RUNS = 20
+
+# 처리량을 기록하는 실행 보고서 단계 (batch_clips.process_video_clips)
+THROUGHPUT_STAGE = 'encode_clips'
+
+# 화면에 출력할 최대 다운로드 예정 영상 수 (나머지는 합계만)
+MAX_PLAN_PRINT = 50
+
+def get_profile_key(config):
+    """처리량 기록/예측용 프로필 이름 (추가 프로필이 있으면 'archive+training_224_2fps' 형식)"""
+    return '+'.join([config['clips'].get('video_profile') or 'default'] + get_extra_profiles(config))
+
+def load_cached_metadata(config, video_id):
+    """다운로드 폴더의 메타데이터 캐시 (--plan은 네트워크를 쓰지 않으므로 TTL과 무관하게 사용)"""
+    return load_metadata(config['download']['base_directory'], video_id, 0)
+
+def get_planned_source(metadata, config):
+    """다운로드될 (오디오 파일 확장자, 비디오 스트림 itag) (메타데이터가 없으면 ('.m4a', None))"""
+    if not metadata:
+        return '.m4a', None
+    video_stream, audio_stream = select_streams(metadata, config)
+    audio_suffix = f".{audio_stream['subtype']}" if audio_stream else '.m4a'
+    return audio_suffix, video_stream['itag'] if video_stream else None
+
+def estimate_download_bytes(metadata, clips, config):
+    """
+    예상 다운로드 크기 (메타데이터 캐시가 없거나 크기를 알 수 없으면 None)
+    download.partial이면 클립 구간(여유 포함) 비율만큼만 계산 (조각화되지 않은 MP4는 전체를 받으므로 최소값)
+    """
+    if not metadata:
+        return None
+    
+    video_stream, audio_stream = select_streams(metadata, config)
+    if not video_stream or not audio_stream:
+        return None
+    
+    length = metadata.get('length')
+    sizes = [estimate_stream_bytes(stream, length) for stream in (video_stream, audio_stream)]
+    if None in sizes:
+        return None
+    total = sum(sizes)
+    
+    if config['download'].get('partial', False) and length:
+        windows = get_clip_windows(clips, config['download'].get('partial_margin', 2.0))
+        covered = sum(min(end, length) - start for start, end in windows if start < length)
+        total = int(total * min(1.0, covered / length))
+    return total
+
+def iter_report_records(report_dir, max_runs):
+    """최근 실행 보고서(JSONL)의 기록 (쓰다 만 줄은 무시)"""
+    paths = sorted(glob.glob(os.path.join(report_dir, 'run_*.jsonl')))[-max_runs:]
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+
+def load_throughput_samples(config):
+    """
+    측정된 인코딩 처리량
+    - 최근 실행 보고서의 encode_clips 기록
+    - plan.benchmark_file이 있으면 benchmark_encode.py 결과도 포함
+    반환: {(encode_mode, profile, clip_workers): [미디어 초 합계, 실행 시간 합계]}
+    """
+    plan_config = config.get('plan', {})
+    samples = defaultdict(lambda: [0.0, 0.0])
+    
+    report_dir = config.get('report', {}).get('directory', DEFAULT_REPORT_DIR)
+    for record in iter_report_records(report_dir, plan_config.get('history_runs', DEFAULT_HISTORY_RUNS)):
+        if record.get('type') != 'stage' or record.get('stage') != THROUGHPUT_STAGE:
+            continue
+        if record.get('success') is False or not record.get('created') or not record.get('seconds'):
+            continue
+        
+        # 실패한 클립이 있으면 성공한 비율만큼만 처리한 것으로 계산
+        media_seconds = record.get('media_seconds', 0) * record['created'] / max(record.get('clips', 1), 1)
+        key = (record.get('encode_mode'), record.get('profile'), record.get('clip_workers'))
+        samples[key][0] += media_seconds
+        samples[key][1] += record['seconds']
+    
+    benchmark_file = plan_config.get('benchmark_file')
+    if benchmark_file:
+        try:
+            with open(benchmark_file, 'r', encoding='utf-8') as f:
+                results = json.load(f).get('results', [])
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 벤치마크 결과를 읽을 수 없습니다 ({benchmark_file}): {e}")
+            results = []
+        
+        for result in results:
+            if not result.get('created') or not result.get('wall_seconds'):
+                continue
+            key = (result.get('encode_mode'), result.get('profile') or 'default', result.get('clip_workers'))
+            samples[key][0] += result['created'] * result['clip_length']
+            samples[key][1] += result['wall_seconds']
+    
+    return samples
+
+def get_realtime_factor(samples, config):
+    """
+    현재 설정의 실시간 대비 인코딩 배속
+    반환: (배속, 근거) - 근거: 'measured' (같은 모드/프로필/동시 작업 수),
+          'scaled' (동시 작업 수만 다른 기록을 작업 수 비율로 보정), 'default' (plan.realtime_factor)
+    """
+    encode_mode = config['clips'].get('encode_mode', 'reencode')
+    profile = get_profile_key(config)
+    workers = get_clip_workers(config)
+    
+    media_seconds, seconds = samples.get((encode_mode, profile, workers), (0.0, 0.0))
+    if seconds > 0:
+        return media_seconds / seconds, 'measured'
+    
+    # 작업 1개당 배속으로 환산 후 현재 작업 수를 곱함 (코어 수를 넘으면 과대 추정)
+    per_worker_media = per_worker_seconds = 0.0
+    for (sample_mode, sample_profile, sample_workers), (media_seconds, seconds) in samples.items():
+        if sample_mode == encode_mode and sample_profile == profile and sample_workers and seconds > 0:
+            per_worker_media += media_seconds / sample_workers
+            per_worker_seconds += seconds
+    if per_worker_seconds > 0:
+        return per_worker_media / per_worker_seconds * workers, 'scaled'
+    
+    return config.get('plan', {}).get('realtime_factor', DEFAULT_REALTIME_FACTOR), 'default'
+
+def new_batch_plan(config):
+    """빈 실행 계획"""
+    return {
+        'encode_mode': config['clips'].get('encode_mode', 'reencode'),
+        'profile': get_profile_key(config),
+        'clip_workers': get_clip_workers(config),
+        'videos': [],
+        'totals': {
+            'videos': 0,
+            'download_videos': 0,
+            'download_bytes': 0,
+            'download_unknown': 0,
+            'existing_videos': 0,
+            'encode_clips': 0,
+            'rebuild_clips': 0,
+            'skipped_clips': 0,
+            'failed_clips': 0,
+            'invalid_rows': 0,
+            'media_seconds': 0.0
+        }
+    }
+
+def add_video_plan(plan, video_plan):
+    """영상 하나의 계획을 추가하고 합계 갱신"""
+    plan['videos'].append(video_plan)
+    totals = plan['totals']
+    totals['videos'] += 1
+    if video_plan['download']:
+        totals['download_videos'] += 1
+        if video_plan['bytes'] is None:
+            totals['download_unknown'] += 1
+        else:
+            totals['download_bytes'] += video_plan['bytes']
+    else:
+        totals['existing_videos'] += 1
+    totals['encode_clips'] += video_plan['encode_clips']
+    totals['rebuild_clips'] += video_plan['rebuild_clips']
+    totals['skipped_clips'] += video_plan['skipped_clips']
+    totals['failed_clips'] += video_plan['failed_clips']
+    totals['media_seconds'] += video_plan['media_seconds']
+
+def finish_batch_plan(plan, config):
+    """측정된 처리량으로 예상 인코딩 시간 계산"""
+    realtime_factor, basis = get_realtime_factor(load_throughput_samples(config), config)
+    plan['totals']['media_seconds'] = round(plan['totals']['media_seconds'], 3)
+    plan['throughput'] = {'realtime_factor': round(realtime_factor, 3), 'basis': basis}
+    plan['estimated_encode_seconds'] = (
+        round(plan['totals']['media_seconds'] / realtime_factor, 1) if realtime_factor > 0 else None
+    )
+    return plan
+
+def format_bytes(size):
+    """바이트 → 'MB'/'GB' 문자열"""
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.2f}GB"
+    return f"{size / 1024 ** 2:.1f}MB"
+
+def print_batch_plan(plan):
+    """실행 계획 출력"""
+    totals = plan['totals']
+    
+    downloads = [video for video in plan['videos'] if video['download']]
+    if downloads:
+        print(f"\n⬇️ 다운로드할 영상 ({len(downloads)}개)")
+        for video in downloads[:MAX_PLAN_PRINT]:
+            size = format_bytes(video['bytes']) if video['bytes'] is not None else '크기 미확인'
+            print(f"   {video['video_id']} {video['title'] or '(제목 미확인)'} - {size}, 클립 {video['encode_clips']}개")
+        if len(downloads) > MAX_PLAN_PRINT:
+            print(f"   ... 외 {len(downloads) - MAX_PLAN_PRINT}개")
+    
+    basis_text = {
+        'measured': '측정값',
+        'scaled': '동시 작업 수 보정',
+        'default': '기록 없음, plan.realtime_factor'
+    }[plan['throughput']['basis']]
+    
+    print(f"\n" + "=" * 50)
+    print(f"📋 실행 계획 (다운로드/인코딩 없음)")
+    print(f"   영상: {totals['videos']}개 (다운로드 {totals['download_videos']}개, 기존 {totals['existing_videos']}개)")
+    download_text = format_bytes(totals['download_bytes'])
+    if totals['download_unknown']:
+        download_text += f" + 크기 미확인 {totals['download_unknown']}개 (메타데이터 캐시 없음)"
+    print(f"   예상 다운로드: {download_text}")
+    print(f"   인코딩할 클립: {totals['encode_clips']}개 (설정/원본 변경으로 다시 생성 {totals['rebuild_clips']}개, "
+          f"미디어 {format_eta(totals['media_seconds'])})")
+    print(f"   건너뛸 클립: {totals['skipped_clips']}개 (중복/겹침)")
+    print(f"   불가능한 클립: {totals['failed_clips']}개, 무시된 행: {totals['invalid_rows']}개")
+    print(f"   인코딩 처리량: 실시간 대비 {plan['throughput']['realtime_factor']}배 "
+          f"({plan['encode_mode']} / {plan['profile']} / 작업 {plan['clip_workers']}개, {basis_text})")
+    print(f"   예상 인코딩 시간: {format_eta(plan['estimated_encode_seconds'])}")
+
+def write_batch_plan(plan, output_path):
+    """실행 계획 JSON 저장"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    print(f"✅ 계획 저장: {output_path}")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from batch_clips import (
+    parse_batch_csv, stream_video_groups, get_existing_clips, check_duplicate_clip,
+    get_next_clip_number, check_existing_download, get_label_prefix
+)
+from clip_manifest import get_manifest_path
+from download_catalog import get_catalog_path
+
+LABELS = ['funny', 'normal', 'boring']
+CLIP_LENGTH = 15.0
+
+# (클립 수, 영상 수) 기본 측정 규모 (10^6 클립은 --scales로 지정)
+DEFAULT_SCALES = '1000:100,10000:1000,100000:10000'
+
+def get_video_names(video_num):
+    """합성 영상 번호 → (video_id, safe_title)"""
+    return f"vid{video_num:08d}", f"video_{video_num:05d}"
+
+def iter_synthetic_clips(clip_count, video_count):
+    """영상별로 고르게 나눈 합성 클립 정보"""
+    for i in range(clip_count):
+        video_num = i % video_count
+        slot = i // video_count
+        start = float(slot * 20)
+        yield {
+            'video_num': video_num,
+            'label': LABELS[i % len(LABELS)],
+            'clip_num': i + 1,
+            'start': start,
+            'end': start + CLIP_LENGTH
+        }
+
+def touch(path):
+    """빈 자리표시 파일 생성"""
+    with open(path, 'w'):
+        pass
+
+def build_synthetic_tree(scale_dir, clip_count, video_count):
+    """
+    빈 파일로 downloads/, clips/ 폴더와 timestamps.csv 생성 (이미 만들었으면 재사용)
+    CSV 행의 절반은 기존 클립과 같은 구간(중복), 절반은 새 구간
+    """
+    done_path = os.path.join(scale_dir, '.built')
+    downloads_dir = os.path.join(scale_dir, 'downloads')
+    clips_dir = os.path.join(scale_dir, 'clips')
+    csv_path = os.path.join(scale_dir, 'timestamps.csv')
+    if os.path.exists(done_path):
+        return downloads_dir, clips_dir, csv_path
+    
+    print(f"🏗️ 합성 폴더 생성: 클립 {clip_count:,}개, 영상 {video_count:,}개")
+    
+    for video_num in range(video_count):
+        video_id, safe_title = get_video_names(video_num)
+        video_dir = os.path.join(downloads_dir, safe_title)
+        os.makedirs(video_dir, exist_ok=True)
+        touch(os.path.join(video_dir, f"{safe_title}_video.mp4"))
+        touch(os.path.join(video_dir, f"{safe_title}_audio.m4a"))
+        with open(os.path.join(video_dir, "video_info.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"video_id: {video_id}\n")
+            f.write(f"title: {safe_title}\n")
+            f.write(f"safe_title: {safe_title}\n")
+            f.write(f"url: https://www.youtube.com/watch?v={video_id}\n")
+    
+    for label in LABELS:
+        os.makedirs(os.path.join(clips_dir, label, 'video'), exist_ok=True)
+    
+    with open(csv_path, 'w', encoding='utf-8') as csv_file:
+        csv_file.write("url,start,end,label\n")
+        for clip in iter_synthetic_clips(clip_count, video_count):
+            video_id, safe_title = get_video_names(clip['video_num'])
+            filename = (f"{get_label_prefix(clip['label'])}_{clip['clip_num']:03d}_{safe_title}_"
+                        f"{clip['start']}_{clip['end']}.mp4")
+            touch(os.path.join(clips_dir, clip['label'], 'video', filename))
+            
+            shift = 0.0 if clip['clip_num'] % 2 else 5.0
+            csv_file.write(f"https://www.youtube.com/watch?v={video_id},"
+                           f"{clip['start'] + shift},{clip['end'] + shift},{clip['label']}\n")
+    
+    touch(done_path)
+    return downloads_dir, clips_dir, csv_path
+
+def remove_if_exists(path):
+    """파일이 있으면 삭제"""
+    if os.path.exists(path):
+        os.remove(path)
+
+def measure(fn):
+    """함수 실행 시간(초)과 결과"""
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+def run_scale(work_dir, clip_count, video_count):
+    """규모 하나에 대해 각 함수 실행 시간 측정, 반환: {함수 이름: 초}"""
+    scale_dir = os.path.join(work_dir, f"scale_{clip_count}_{video_count}")
+    downloads_dir, clips_dir, csv_path = build_synthetic_tree(scale_dir, clip_count, video_count)
+    config = {
+        'download': {'base_directory': downloads_dir},
+        'clips': {'output_directory': clips_dir, 'min_duration': 10.0, 'max_duration': 50.0},
+        'batch': {}
+    }
+    timings = {}
+    
+    # CSV 파싱 (전체 목록 / 스트리밍 그룹)
+    timings['parse_batch_csv'], (clips_data, _) = measure(lambda: parse_batch_csv(csv_path, config))
+    
+    ingest_stats = {'clips': 0, 'videos': 0, 'invalid': 0}
+    timings['stream_video_groups'], _ = measure(
+        lambda: sum(1 for _ in stream_video_groups(csv_path, config, ingest_stats))
+    )
+    
+    # 기존 클립 인덱스 (매니페스트 없음: 폴더 스캔 + 매니페스트 생성 / 매니페스트 있음)
+    remove_if_exists(get_manifest_path(clips_dir))
+    timings['get_existing_clips (scan)'], _ = measure(lambda: get_existing_clips(clips_dir))
+    timings['get_existing_clips (manifest)'], existing_clips = measure(lambda: get_existing_clips(clips_dir))
+    
+    # CSV 클립마다 중복 확인 / 번호 할당
+    def check_all_duplicates():
+        duplicates = 0
+        for clip in clips_data:
+            video_num = int(clip['video_id'][3:])
+            _, safe_title = get_video_names(video_num)
+            if check_duplicate_clip(clip, existing_clips, safe_title, clip['video_id']):
+                duplicates += 1
+        return duplicates
+    
+    timings['check_duplicate_clip'], duplicates = measure(check_all_duplicates)
+    timings['get_next_clip_number'], _ = measure(
+        lambda: [get_next_clip_number(existing_clips, clip['label']) for clip in clips_data]
+    )
+    
+    # 다운로드 확인 (카탈로그 없음: 첫 호출에서 재구성 / 이후 영상별 조회)
+    remove_if_exists(get_catalog_path(downloads_dir))
+    timings['check_existing_download (rebuild)'], _ = measure(
+        lambda: check_existing_download(get_video_names(0)[0], config)
+    )
+    timings['check_existing_download'], found = measure(
+        lambda: sum(1 for video_num in range(video_count)
+                    if check_existing_download(get_video_names(video_num)[0], config)[0])
+    )
+    
+    if duplicates != (clip_count + 1) // 2 or found != video_count:
+        print(f"⚠️ 결과 확인 필요: 중복 {duplicates}개, 다운로드 확인 {found}/{video_count}개")
+    
+    return timings
+
+def get_growth_order(first, last, timings_first, timings_last, name):
+    """두 규모 사이 실행 시간 증가 차수 (1: 선형, 2: 제곱)"""
+    if timings_first[name] <= 0 or first == last:
+        return None
+    return math.log(timings_last[name] / timings_first[name]) / math.log(last / first)
+
+def print_table(scales, results):
+    """규모별 실행 시간과 증가 차수 표 출력"""
+    names = list(results[0].keys())
+    headers = [f"{clips:,}/{videos:,}" for clips, videos in scales]
+    name_width = max(len(name) for name in names) + 2
+    
+    print()
+    print("함수".ljust(name_width) + "".join(header.rjust(16) for header in headers) + "증가 차수".rjust(12))
+    print("-" * (name_width + 16 * len(headers) + 12))
+    for name in names:
+        row = name.ljust(name_width)
+        row += "".join(f"{timings[name]:.4f}s".rjust(16) for timings in results)
+        
+        # 다운로드 확인은 영상 수, 나머지는 클립 수 기준으로 증가 차수 계산
+        order = None
+        if len(scales) > 1:
+            index = 1 if name.startswith('check_existing_download') else 0
+            order = get_growth_order(scales[0][index], scales[-1][index], results[0], results[-1], name)
+        row += (f"{order:.2f}" if order is not None else "-").rjust(12)
+        print(row)
+    print("(열: 클립 수/영상 수, 증가 차수: 1이면 선형, 2면 제곱)")
+
+def parse_scales(value):
+    """'1000:100,10000:1000' → [(1000, 100), (10000, 1000)]"""
+    scales = []
+    for item in value.split(','):
+        clips, videos = item.split(':')
+        scales.append((int(float(clips)), int(float(videos))))
+    return scales
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="CSV 파싱/클립 인덱스/다운로드 확인 규모별 실행 시간 측정")
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="클립수:영상수 목록 (예: 1000:100,1000000:10000)")
+    parser.add_argument('--work-dir', default='benchmark_bookkeeping', help="합성 폴더 위치")
+    parser.add_argument('--output', help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    
+    scales = parse_scales(args.scales)
+    results = []
+    for clip_count, video_count in scales:
+        print(f"⏱️ 측정: 클립 {clip_count:,}개, 영상 {video_count:,}개")
+        results.append(run_scale(args.work_dir, clip_count, video_count))
+    
+    print_table(scales, results)
+    
+    if args.output:
+        report = [
+            {'clips': clips, 'videos': videos, 'timings': timings}
+            for (clips, videos), timings in zip(scales, results)
+        ]
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.output}")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import itertools
+import subprocess
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from utils import run_ffmpeg, run_clip_jobs, validate_encode_profiles
+
+try:
+    import resource
+except ImportError:  # Windows: 최대 메모리 측정 불가
+    resource = None
+
+# 합성 소스 해상도
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080)
+}
+
+ENCODE_MODES = ['reencode', 'single_pass', 'smart_cut']
+
+SOURCE_FPS = 30
+SOURCE_GOP_SECONDS = 2  # 키프레임 간격 (smart_cut 복사 구간이 생기도록 YouTube와 비슷하게)
+
+def generate_source(source_dir, resolution, duration):
+    """lavfi(testsrc2/sine)로 합성 비디오/오디오 소스 생성 (이미 있으면 재사용)"""
+    width, height = RESOLUTIONS[resolution]
+    video_path = os.path.join(source_dir, f"{resolution}_{duration:g}s_video.mp4")
+    audio_path = os.path.join(source_dir, f"{resolution}_{duration:g}s_audio.m4a")
+    
+    if not os.path.exists(video_path):
+        print(f"🎞️ 합성 비디오 생성: {resolution}, {duration:g}초")
+        result = run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate={SOURCE_FPS}",
+            '-t', str(duration),
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-g', str(SOURCE_FPS * SOURCE_GOP_SECONDS),
+            video_path
+        ])
+        if result.returncode != 0:
+            raise RuntimeError(f"합성 비디오 생성 실패: {result.stderr[-500:]}")
+    
+    if not os.path.exists(audio_path):
+        result = run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'lavfi', '-i', "sine=frequency=440:sample_rate=44100",
+            '-t', str(duration),
+            '-c:a', 'aac', '-b:a', '128k',
+            audio_path
+        ])
+        if result.returncode != 0:
+            raise RuntimeError(f"합성 오디오 생성 실패: {result.stderr[-500:]}")
+    
+    return video_path, audio_path
+
+def build_clip_jobs(output_dir, clip_length, clip_count, source_duration):
+    """소스 전체에 고르게 퍼진 클립 작업 생성 (시작 시간은 키프레임과 어긋나게)"""
+    spacing = (source_duration - clip_length - 1.0) / max(clip_count, 1)
+    if spacing < 0:
+        raise ValueError(f"소스 길이({source_duration:g}초)가 클립 길이({clip_length:g}초)보다 짧습니다")
+    
+    clip_jobs = []
+    for i in range(clip_count):
+        start = round(0.7 + i * spacing, 3)
+        end = start + clip_length
+        output_paths = {
+            kind: os.path.join(output_dir, kind, f"clip_{i:03d}.{ext}")
+            for kind, ext in [('video', 'mp4'), ('audio', 'm4a'), ('merged', 'mp4')]
+        }
+        for path in output_paths.values():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        clip_jobs.append({
+            'clip_data': {'start': start, 'end': end, 'label': 'normal'},
+            'output_paths': output_paths
+        })
+    
+    return clip_jobs
+
+def get_peak_rss_mb():
+    """자식 프로세스(ffmpeg) 최대 메모리 사용량 (MB, 측정 불가 시 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+
+def run_case(case):
+    """
+    벤치마크 케이스 1개 실행 (케이스마다 새 프로세스에서 실행해 자식 프로세스 메모리/CPU를 분리 측정)
+    반환: 측정 결과 dict
+    """
+    config = {
+        'clips': {
+            'merge_clips': case['merge_clips'],
+            'encode_mode': case['encode_mode'],
+            'video_crf': case['crf'],
+            'video_preset': case['preset'],
+            'video_profile': case['profile'],
+            'profiles': case['profiles']
+        },
+        'batch': {'clip_workers': case['clip_workers']}
+    }
+    
+    output_dir = case['output_dir']
+    shutil.rmtree(output_dir, ignore_errors=True)
+    clip_jobs = build_clip_jobs(output_dir, case['clip_length'], case['clip_count'], case['source_duration'])
+    
+    cpu_before = os.times()
+    started = time.perf_counter()
+    results = list(run_clip_jobs(case['video_path'], case['audio_path'], clip_jobs, config))
+    elapsed = time.perf_counter() - started
+    cpu_after = os.times()
+    
+    cpu_seconds = (cpu_after.children_user - cpu_before.children_user) + \
+                  (cpu_after.children_system - cpu_before.children_system)
+    
+    output_bytes = 0
+    for job in clip_jobs:
+        for path in job['output_paths'].values():
+            if os.path.exists(path):
+                output_bytes += os.path.getsize(path)
+    
+    created = sum(1 for _, success, _ in results if success)
+    clip_seconds = created * case['clip_length']
+    
+    return {
+        'resolution': case['resolution'],
+        'encode_mode': case['encode_mode'],
+        'profile': case['profile'],
+        'preset': case['preset'],
+        'crf': case['crf'],
+        'clip_length': case['clip_length'],
+        'clip_count': case['clip_count'],
+        'clip_workers': case['clip_workers'],
+        'merge_clips': case['merge_clips'],
+        'created': created,
+        'failed': len(results) - created,
+        'wall_seconds': round(elapsed, 3),
+        'clips_per_sec': round(created / elapsed, 3) if elapsed else None,
+        'realtime_factor': round(clip_seconds / elapsed, 3) if elapsed else None,
+        'cpu_seconds_per_clip': round(cpu_seconds / created, 3) if created else None,
+        'peak_rss_mb': get_peak_rss_mb(),
+        'output_bytes': output_bytes
+    }
+
+def get_ffmpeg_version():
+    """ffmpeg 버전 문자열 (첫 줄)"""
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+        return result.stdout.splitlines()[0] if result.stdout else None
+    except FileNotFoundError:
+        return None
+
+def load_profiles(config_path):
+    """설정 파일의 인코딩 프로필 정의 (clips.profiles, 파일이 없으면 빈 dict)"""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+    return config.get('clips', {}).get('profiles') or {}
+
+def parse_list(value, cast=str):
+    """'a,b,c' → [a, b, c]"""
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="합성 소스로 클립 인코딩 처리량 측정 (네트워크 불필요)")
+    parser.add_argument('--resolutions', default='720p,1080p', help="소스 해상도 (720p,1080p)")
+    parser.add_argument('--modes', default=','.join(ENCODE_MODES), help="인코딩 모드")
+    parser.add_argument('--presets', default='fast', help="libx264 preset 목록")
+    parser.add_argument('--crfs', default='23', help="CRF 목록")
+    parser.add_argument('--profiles', default='', help="인코딩 프로필 목록 (설정 파일의 clips.profiles, 프로필의 crf/preset이 우선)")
+    parser.add_argument('--config', default='config.yaml', help="인코딩 프로필을 읽을 설정 파일")
+    parser.add_argument('--lengths', default='10,30', help="클립 길이(초) 목록")
+    parser.add_argument('--clips', type=int, default=4, help="케이스당 클립 수")
+    parser.add_argument('--workers', type=int, default=1, help="batch.clip_workers")
+    parser.add_argument('--source-duration', type=float, default=180.0, help="합성 소스 길이(초)")
+    parser.add_argument('--no-merge', action='store_true', help="병합 클립 생성 안 함")
+    parser.add_argument('--work-dir', default='benchmark_work', help="합성 소스/출력 폴더")
+    parser.add_argument('--output', help="결과 JSON 저장 경로 (없으면 표준 출력)")
+    return parser.parse_args()
+
+def main():
+    """메인 실행 함수"""
+    args = parse_args()
+    
+    if shutil.which('ffmpeg') is None:
+        print("❌ ffmpeg를 찾을 수 없습니다.")
+        return 1
+    
+    resolutions = parse_list(args.resolutions)
+    for resolution in resolutions:
+        if resolution not in RESOLUTIONS:
+            print(f"❌ 지원하지 않는 해상도: {resolution} (가능: {', '.join(RESOLUTIONS)})")
+            return 1
+    
+    profiles = load_profiles(args.config)
+    profile_names = parse_list(args.profiles) or [None]
+    try:
+        for name in profile_names:
+            validate_encode_profiles({'clips': {'video_profile': name, 'profiles': profiles}})
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    source_dir = os.path.join(args.work_dir, 'sources')
+    os.makedirs(source_dir, exist_ok=True)
+    sources = {
+        resolution: generate_source(source_dir, resolution, args.source_duration)
+        for resolution in resolutions
+    }
+    
+    cases = []
+    matrix = itertools.product(
+        resolutions, parse_list(args.modes), profile_names, parse_list(args.presets),
+        parse_list(args.crfs, int), parse_list(args.lengths, float)
+    )
+    for resolution, encode_mode, profile, preset, crf, clip_length in matrix:
+        video_path, audio_path = sources[resolution]
+        cases.append({
+            'resolution': resolution,
+            'encode_mode': encode_mode,
+            'profile': profile,
+            'profiles': profiles,
+            'preset': preset,
+            'crf': crf,
+            'clip_length': clip_length,
+            'clip_count': args.clips,
+            'clip_workers': args.workers,
+            'merge_clips': not args.no_merge,
+            'source_duration': args.source_duration,
+            'video_path': os.path.abspath(video_path),
+            'audio_path': os.path.abspath(audio_path),
+            'output_dir': os.path.abspath(os.path.join(args.work_dir, 'output'))
+        })
+    
+    results = []
+    for i, case in enumerate(cases, start=1):
+        profile_text = f"profile={case['profile']} " if case['profile'] else ""
+        print(f"⏱️ [{i}/{len(cases)}] {case['resolution']} {case['encode_mode']} {profile_text}"
+              f"preset={case['preset']} crf={case['crf']} {case['clip_length']:g}초 x {case['clip_count']}")
+        
+        # 자식 프로세스 통계(ru_maxrss 등)가 케이스 간에 섞이지 않도록 케이스마다 새 프로세스 사용
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_case, case).result()
+        results.append(result)
+        
+        print(f"   {result['clips_per_sec']} clips/s, 실시간 대비 {result['realtime_factor']}x, "
+              f"클립당 CPU {result['cpu_seconds_per_clip']}초, 출력 {result['output_bytes'] / 1024 / 1024:.1f}MB"
+              + (f" (실패 {result['failed']}개)" if result['failed'] else ""))
+    
+    report = {
+        'environment': {
+            'ffmpeg': get_ffmpeg_version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'source_duration': args.source_duration,
+        'results': results
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
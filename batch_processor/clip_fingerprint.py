@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+
+# 지문 계산 방식이 바뀌면 올려서 전체 재생성
+FINGERPRINT_VERSION = 1
+
+def get_source_identity(video_id, video_itag=None):
+    """원본 식별값 (같은 영상이라도 다른 화질 스트림으로 다시 받으면 달라짐, itag를 모르면 None)"""
+    return {'video_id': video_id, 'video_itag': video_itag}
+
+def get_output_settings(encode_settings, kind):
+    """출력 종류별로 결과에 영향을 주는 인코딩 설정 (이전 매니페스트에 없는 값은 당시 기본값으로 간주)"""
+    video = {
+        'encode_mode': encode_settings.get('encode_mode', 'reencode'),
+        'video_args': encode_settings.get('video_args')
+    }
+    audio = {'audio_cache': bool(encode_settings.get('audio_cache', False))}
+    
+    if kind == 'video':
+        return video
+    if kind == 'audio':
+        return audio
+    if kind == 'merged':
+        return dict(video, **audio, merge_audio_codec=encode_settings.get('merge_audio_codec'))
+    # 추가 프로필: 같은 디코딩 결과를 프로필 설정으로 인코딩
+    return {'profile_args': (encode_settings.get('extra_profiles') or {}).get(kind)}
+
+def get_clip_fingerprints(source_identity, clip_data, encode_settings, output_kinds):
+    """
+    출력 종류별 지문 (원본 식별값 + 클립 구간 + 해당 출력의 인코딩 설정)
+    반환: {출력 종류: 16자리 해시}
+    """
+    fingerprints = {}
+    for kind in output_kinds:
+        key = json.dumps({
+            'version': FINGERPRINT_VERSION,
+            'source': source_identity,
+            'start': round(clip_data['start'], 3),
+            'end': round(clip_data['end'], 3),
+            'kind': kind,
+            'settings': get_output_settings(encode_settings, kind)
+        }, sort_keys=True)
+        fingerprints[kind] = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return fingerprints
+
+def get_rebuild_outputs(stale, output_kinds, encode_settings):
+    """
+    다시 생성할 출력 종류 (지문이 달라진 출력만, 다른 출력의 입력으로 필요한 출력은 함께 생성)
+    - smart_cut: 먼저 만든 비디오 클립이 merged/추가 프로필의 입력이므로 전체
+    - 오디오 캐시: merged가 먼저 만든 오디오 클립을 입력으로 쓰므로 audio 포함
+    """
+    if encode_settings.get('encode_mode') == 'smart_cut':
+        return list(output_kinds)
+    
+    kinds = set(stale)
+    if encode_settings.get('audio_cache') and 'merged' in kinds:
+        kinds.add('audio')
+    return [kind for kind in output_kinds if kind in kinds]
+
+def get_recorded_fingerprints(job):
+    """
+    매니페스트에 기록할 지문 (실제로 새로 만든 출력 + 다시 생성하지 않은(지문이 같은) 출력)
+    만들지 못한 출력(onfail=ignore로 실패한 merged 등)은 빼서 다음 실행에서 다시 생성
+    """
+    committed = set(job.get('committed_outputs') or [])
+    return {
+        kind: fingerprint for kind, fingerprint in job['fingerprints'].items()
+        if kind in committed or kind not in job['output_paths']
+    }
+
+def get_stale_outputs(record, clip_data, output_paths, source_identity, encode_settings):
+    """
+    다시 만들어야 하는 출력 종류 목록 (현재 설정에 필요한 출력 중 파일이 없거나 지문이 달라진 것)
+    지문이 없는 이전 기록은 기록된 인코딩 설정으로 지문을 계산해 비교 (설정 기록도 없으면 파일 유무만 확인)
+    원본 식별값을 모르면 (다운로드 전 계획 등) 기록된 식별값과 같은 것으로 간주
+    """
+    if source_identity is None or source_identity.get('video_itag') is None:
+        source_identity = record.get('source_identity') or source_identity
+    
+    current = get_clip_fingerprints(source_identity, clip_data, encode_settings, output_paths)
+    stored = record.get('fingerprints')
+    if stored is None and record.get('encode'):
+        stored = get_clip_fingerprints(source_identity, clip_data, record['encode'], output_paths)
+    
+    stale = []
+    for kind, path in output_paths.items():
+        if not os.path.exists(path):
+            stale.append(kind)
+        elif stored is not None and stored.get(kind) != current[kind]:
+            stale.append(kind)
+    return stale
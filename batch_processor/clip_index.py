@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+# 같은 클립으로 간주하는 시작/종료 시간 오차(초)
+DUPLICATE_TOLERANCE = 0.1
+
+# 클립을 영상별로 묶는 필드 (batch: video_id/safe_title, single: video_name)
+KEY_FIELDS = ('video_id', 'safe_title', 'video_name')
+
+class ClipIndex:
+    """
+    (영상 키, 라벨)별 클립 구간 인덱스
+    - 시작 시간순 정렬 목록: 중복(오차 0.1초) 조회 O(log n)
+    - 구간 합집합 목록: 겹침 여부 조회 O(log n)
+    - 라벨별 최대 클립 번호: 다음 번호 O(1)
+    """
+    
+    def __init__(self):
+        self.starts = defaultdict(list)    # (key, label) -> 정렬된 시작 시간
+        self.entries = defaultdict(list)   # (key, label) -> starts와 같은 순서의 클립 정보
+        self.coverage = defaultdict(list)  # (key, label) -> 겹치지 않는 [start, end] 구간 (정렬)
+        self.max_clip_num = defaultdict(int)
+        self.count = 0
+    
+    def get_keys(self, entry):
+        """클립 정보에서 영상 키 목록 추출 (중복 제거)"""
+        keys = []
+        for field in KEY_FIELDS:
+            value = entry.get(field)
+            if value is not None and value not in keys:
+                keys.append(value)
+        return keys
+    
+    def add(self, entry):
+        """클립 등록"""
+        label = entry['label']
+        for key in self.get_keys(entry):
+            slot = (key, label)
+            position = bisect_right(self.starts[slot], entry['start'])
+            self.starts[slot].insert(position, entry['start'])
+            self.entries[slot].insert(position, entry)
+            self.add_coverage(slot, entry['start'], entry['end'])
+        
+        self.max_clip_num[label] = max(self.max_clip_num[label], entry['clip_num'])
+        self.count += 1
+    
+    def remove(self, entry):
+        """클립 등록 취소 (생성 실패 시)"""
+        label = entry['label']
+        for key in self.get_keys(entry):
+            slot = (key, label)
+            for position in range(bisect_left(self.starts[slot], entry['start']), len(self.starts[slot])):
+                if self.entries[slot][position] is entry:
+                    del self.starts[slot][position]
+                    del self.entries[slot][position]
+                    break
+            # 합집합은 빼기가 안 되므로 해당 슬롯만 다시 계산
+            self.coverage[slot] = []
+            for other in self.entries[slot]:
+                self.add_coverage(slot, other['start'], other['end'])
+        
+        # 마지막 번호였다면 다음 클립이 같은 번호를 다시 사용
+        if self.max_clip_num[label] == entry['clip_num']:
+            self.max_clip_num[label] = entry['clip_num'] - 1
+        self.count -= 1
+    
+    def add_coverage(self, slot, start, end):
+        """구간 합집합에 [start, end] 추가 (겹치는 구간은 병합)"""
+        intervals = self.coverage[slot]
+        position = bisect_left(intervals, [start, start])
+        
+        # 왼쪽 이웃과 겹치면 그 구간부터 병합
+        if position > 0 and intervals[position - 1][1] >= start:
+            position -= 1
+        
+        last = position
+        while last < len(intervals) and intervals[last][0] <= end:
+            start = min(start, intervals[last][0])
+            end = max(end, intervals[last][1])
+            last += 1
+        
+        intervals[position:last] = [[start, end]]
+    
+    def find_duplicate(self, label, keys, start, end, tolerance=DUPLICATE_TOLERANCE):
+        """시작/종료 시간이 오차 이내인 기존 클립 조회 (없으면 None)"""
+        for key in keys:
+            slot = (key, label)
+            starts = self.starts.get(slot)
+            if not starts:
+                continue
+            low = bisect_left(starts, start - tolerance)
+            high = bisect_right(starts, start + tolerance)
+            for existing in self.entries[slot][low:high]:
+                if abs(existing['start'] - start) < tolerance and abs(existing['end'] - end) < tolerance:
+                    return existing
+        return None
+    
+    def has_overlap(self, label, keys, start, end):
+        """기존 클립과 구간이 겹치는지 확인"""
+        for key in keys:
+            intervals = self.coverage.get((key, label))
+            if not intervals:
+                continue
+            position = bisect_right(intervals, [start, float('inf')])
+            # start 이전에 시작한 구간이 start 이후까지 이어지는지
+            if position > 0 and intervals[position - 1][1] > start:
+                return True
+            # start 이후에 시작한 구간이 end 전에 시작하는지
+            if position < len(intervals) and intervals[position][0] < end:
+                return True
+        return False
+    
+    def next_clip_number(self, label):
+        """라벨별 다음 클립 번호"""
+        return self.max_clip_num[label] + 1
+    
+    def reserve_clip_number(self, label, clip_num):
+        """이미 할당된 클립 번호 예약 (이어서 실행할 때 다른 클립에 같은 번호가 할당되지 않도록)"""
+        self.max_clip_num[label] = max(self.max_clip_num[label], clip_num)
+    
+    def __len__(self):
+        return self.count
+
+def build_clip_index(clips):
+    """클립 정보 목록으로 인덱스 생성"""
+    index = ClipIndex()
+    for clip in clips:
+        index.add(clip)
+    return index
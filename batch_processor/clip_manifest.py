@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+
+MANIFEST_FILENAME = "manifest.jsonl"
+
+_manifest_lock = threading.Lock()
+
+def get_manifest_path(clips_dir):
+    """클립 폴더의 매니페스트 경로"""
+    return os.path.join(clips_dir, MANIFEST_FILENAME)
+
+def load_manifest(clips_dir):
+    """
+    매니페스트를 한 번 순차로 읽어 클립 목록 반환 (매니페스트가 없으면 None)
+    같은 비디오 파일에 대한 기록이 여러 개면 마지막 기록 사용
+    """
+    manifest_path = get_manifest_path(clips_dir)
+    if not os.path.exists(manifest_path):
+        return None
+    
+    records = {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 중단된 쓰기로 잘린 마지막 줄은 무시
+                continue
+            records[(record.get('label'), record.get('filename'))] = record
+    
+    return list(records.values())
+
+def append_manifest(clips_dir, records):
+    """매니페스트에 기록 추가 (한 줄에 JSON 하나)"""
+    os.makedirs(clips_dir, exist_ok=True)
+    lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    with _manifest_lock:
+        with open(get_manifest_path(clips_dir), 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+
+def write_manifest(clips_dir, records):
+    """매니페스트 새로 작성 (기존 클립 폴더에서 옮겨올 때)"""
+    os.makedirs(clips_dir, exist_ok=True)
+    manifest_path = get_manifest_path(clips_dir)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, manifest_path)
+
+def build_manifest_record(entry, output_paths, source_paths, encode_settings, fingerprints=None, source_identity=None):
+    """생성된 클립의 매니페스트 기록 (출력 파일 크기, 인코딩 설정, 출력별 지문 포함)"""
+    sizes = {}
+    for kind, path in output_paths.items():
+        if os.path.exists(path):
+            sizes[kind] = os.path.getsize(path)
+    
+    record = dict(entry)
+    record.update({
+        'outputs': output_paths,
+        'sizes': sizes,
+        'source': source_paths,
+        'encode': encode_settings,
+        'fingerprints': fingerprints,
+        'source_identity': source_identity,
+        'created_at': time.time()
+    })
+    return record
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import heapq
+import tempfile
+from itertools import groupby
+
+# 메모리에 모아 정렬할 최대 클립 수 (넘으면 디스크에 정렬된 런으로 내보냄)
+DEFAULT_RUN_ROWS = 100000
+
+def clip_sort_key(clip):
+    """외부 정렬 키: video_id, 같은 영상 안에서는 CSV 행 순서"""
+    return clip['video_id'], clip['row_num']
+
+def write_sorted_run(clips, run_dir, run_index):
+    """클립 묶음을 정렬해 JSONL 런 파일로 저장"""
+    clips.sort(key=clip_sort_key)
+    run_path = os.path.join(run_dir, f"run_{run_index:05d}.jsonl")
+    with open(run_path, 'w', encoding='utf-8') as f:
+        for clip in clips:
+            f.write(json.dumps(clip, ensure_ascii=False) + '\n')
+    return run_path
+
+def iter_run_file(run_path):
+    """런 파일의 클립을 순서대로 읽기"""
+    with open(run_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+def iter_sorted_clips(clips, run_rows=DEFAULT_RUN_ROWS):
+    """
+    클립 스트림을 video_id 순으로 외부 정렬
+    run_rows개까지는 메모리에서 정렬하고, 넘으면 정렬된 런으로 디스크에 내보낸 뒤 병합
+    """
+    run_rows = max(1, run_rows)
+    buffer = []
+    
+    with tempfile.TemporaryDirectory(prefix="clip_runs_") as run_dir:
+        run_paths = []
+        for clip in clips:
+            buffer.append(clip)
+            if len(buffer) >= run_rows:
+                run_paths.append(write_sorted_run(buffer, run_dir, len(run_paths)))
+                buffer = []
+        
+        # 런이 없으면 디스크를 거치지 않음
+        if not run_paths:
+            buffer.sort(key=clip_sort_key)
+            yield from buffer
+            return
+        
+        if buffer:
+            run_paths.append(write_sorted_run(buffer, run_dir, len(run_paths)))
+            buffer = []
+        
+        print(f"📦 CSV 외부 정렬: {len(run_paths)}개 런 병합")
+        yield from heapq.merge(*(iter_run_file(path) for path in run_paths), key=clip_sort_key)
+
+def iter_video_groups(clips, run_rows=DEFAULT_RUN_ROWS, presorted=False):
+    """
+    클립 스트림을 영상별 (video_id, clips) 그룹으로 하나씩 반환
+    presorted: CSV가 이미 영상별로 모여 있으면 정렬 없이 video_id가 바뀔 때마다 바로 반환
+               (뒤에서 같은 영상이 다시 나오면 별도 그룹으로 처리되며, 중복 클립은 건너뜀)
+    """
+    if not presorted:
+        clips = iter_sorted_clips(clips, run_rows)
+    
+    for video_id, group in groupby(clips, key=lambda clip: clip['video_id']):
+        yield video_id, list(group)
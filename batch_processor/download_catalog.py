@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import glob
+import time
+import sqlite3
+import threading
+
+CATALOG_FILENAME = "catalog.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    video_id TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    video_file TEXT NOT NULL,
+    audio_file TEXT NOT NULL,
+    video_size INTEGER,
+    audio_size INTEGER,
+    title TEXT,
+    safe_title TEXT,
+    url TEXT,
+    updated_at REAL,
+    video_height INTEGER,
+    video_fps INTEGER,
+    video_itag INTEGER,
+    last_used_at REAL,
+    evicted_at REAL
+)
+"""
+
+COLUMNS = ['video_id', 'folder', 'video_file', 'audio_file', 'video_size', 'audio_size',
+           'title', 'safe_title', 'url', 'updated_at', 'video_height', 'video_fps', 'video_itag',
+           'last_used_at', 'evicted_at']
+
+# 이전 카탈로그에 없는 열 (연결 시 추가)
+ADDED_COLUMNS = {
+    'video_height': 'INTEGER',
+    'video_fps': 'INTEGER',
+    'video_itag': 'INTEGER',
+    'last_used_at': 'REAL',
+    'evicted_at': 'REAL'
+}
+
+# video_info.txt 키 → 화질 열
+QUALITY_INFO_KEYS = {
+    'resolution': 'video_height',
+    'fps': 'video_fps',
+    'itag': 'video_itag'
+}
+
+# 카탈로그별 스키마 확인 세대 (파일이 새로 만들어지면 증가, 스레드별 연결을 다시 열게 함)
+_generations = {}
+_init_lock = threading.Lock()
+# 스레드별 연결 {카탈로그 경로: (연결, 세대)} - sqlite 연결은 만든 스레드에서만 사용
+_local = threading.local()
+# 아직 기록하지 않은 마지막 사용 시각 {카탈로그 경로: {video_id: 시각}}
+_pending_touches = {}
+_touch_lock = threading.Lock()
+
+def get_catalog_path(base_dir):
+    """다운로드 폴더의 카탈로그 경로"""
+    return os.path.join(base_dir, CATALOG_FILENAME)
+
+def init_catalog(base_dir):
+    """카탈로그 스키마 생성/마이그레이션 (없으면 생성 후 기존 video_info.txt로 재구성)"""
+    os.makedirs(base_dir, exist_ok=True)
+    catalog_path = get_catalog_path(base_dir)
+    is_new = not os.path.exists(catalog_path)
+    
+    conn = sqlite3.connect(catalog_path, timeout=30)
+    try:
+        conn.execute(SCHEMA)
+        migrate_schema(conn)
+        conn.commit()
+        
+        if is_new:
+            count = rebuild_catalog(base_dir, conn)
+            if count:
+                print(f"📚 다운로드 카탈로그 생성: {count}개 영상 등록")
+    finally:
+        conn.close()
+
+def connect_catalog(base_dir):
+    """
+    카탈로그 DB 연결 (스레드별로 재사용하므로 닫지 않음)
+    스키마 확인은 프로세스에서 처음 연결할 때와 카탈로그 파일이 삭제된 경우에만 실행
+    """
+    catalog_path = get_catalog_path(base_dir)
+    with _init_lock:
+        if catalog_path not in _generations or not os.path.exists(catalog_path):
+            init_catalog(base_dir)
+            _generations[catalog_path] = _generations.get(catalog_path, 0) + 1
+        generation = _generations[catalog_path]
+    
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    cached = connections.get(catalog_path)
+    if cached and cached[1] == generation:
+        return cached[0]
+    if cached:
+        cached[0].close()
+    
+    conn = sqlite3.connect(catalog_path, timeout=30)
+    connections[catalog_path] = (conn, generation)
+    return conn
+
+def migrate_schema(conn):
+    """이전 카탈로그에 새 열 추가 (기존 항목의 값은 NULL = 알 수 없음)"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(downloads)")}
+    for column, column_type in ADDED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} {column_type}")
+
+def row_to_entry(base_dir, row):
+    """DB 행 → 다운로드 정보 (파일 경로는 base_dir 기준 절대 경로로 변환)"""
+    entry = dict(zip(COLUMNS, row))
+    folder_path = os.path.join(base_dir, entry['folder'])
+    entry['video_path'] = os.path.join(folder_path, entry['video_file'])
+    entry['audio_path'] = os.path.join(folder_path, entry['audio_file'])
+    return entry
+
+def lookup_download(base_dir, video_id):
+    """video_id로 다운로드 정보 조회 (없으면 None)"""
+    row = connect_catalog(base_dir).execute(
+        f"SELECT {', '.join(COLUMNS)} FROM downloads WHERE video_id = ?", (video_id,)
+    ).fetchone()
+    return row_to_entry(base_dir, row) if row else None
+
+def upsert_entry(conn, entry):
+    """다운로드 정보 저장 (같은 video_id면 교체)"""
+    conn.execute(
+        f"INSERT OR REPLACE INTO downloads ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+        [entry.get(column) for column in COLUMNS]
+    )
+
+def build_entry(video_id, video_path, audio_path, title=None, safe_title=None, url=None, quality=None):
+    """다운로드 파일 경로로 카탈로그 항목 생성 (quality: video_height/video_fps/video_itag)"""
+    entry = {
+        'video_id': video_id,
+        'folder': os.path.basename(os.path.dirname(os.path.abspath(video_path))),
+        'video_file': os.path.basename(video_path),
+        'audio_file': os.path.basename(audio_path),
+        'video_size': os.path.getsize(video_path) if os.path.exists(video_path) else None,
+        'audio_size': os.path.getsize(audio_path) if os.path.exists(audio_path) else None,
+        'title': title,
+        'safe_title': safe_title,
+        'url': url,
+        'updated_at': time.time(),
+        'last_used_at': time.time()
+    }
+    entry.update(quality or {})
+    return entry
+
+def record_download(base_dir, video_id, video_path, audio_path, title=None, safe_title=None, url=None, quality=None):
+    """다운로드 완료 기록 (트랜잭션 단위로 원자적 저장, quality: 선택한 비디오 스트림 화질)"""
+    entry = build_entry(video_id, video_path, audio_path, title, safe_title, url, quality)
+    conn = connect_catalog(base_dir)
+    with conn:
+        upsert_entry(conn, entry)
+    return entry
+
+def remove_download(base_dir, video_id):
+    """카탈로그에서 항목 삭제"""
+    conn = connect_catalog(base_dir)
+    with conn:
+        conn.execute("DELETE FROM downloads WHERE video_id = ?", (video_id,))
+
+def list_downloads(base_dir):
+    """디스크에 남아 있는 (삭제 기록이 없는) 다운로드 목록 (모아 둔 마지막 사용 시각을 먼저 기록)"""
+    flush_touches(base_dir)
+    rows = connect_catalog(base_dir).execute(
+        f"SELECT {', '.join(COLUMNS)} FROM downloads WHERE evicted_at IS NULL"
+    ).fetchall()
+    return [row_to_entry(base_dir, row) for row in rows]
+
+def touch_download(base_dir, video_id):
+    """
+    마지막 사용 시각 갱신 (디스크 예산 초과 시 오래 사용하지 않은 영상부터 삭제)
+    조회마다 커밋하지 않도록 메모리에 모아 두었다가 flush_touches에서 한 번에 기록
+    """
+    with _touch_lock:
+        _pending_touches.setdefault(get_catalog_path(base_dir), {})[video_id] = time.time()
+
+def flush_touches(base_dir):
+    """모아 둔 마지막 사용 시각을 한 트랜잭션으로 기록"""
+    with _touch_lock:
+        touches = _pending_touches.pop(get_catalog_path(base_dir), None)
+    if not touches:
+        return
+    conn = connect_catalog(base_dir)
+    with conn:
+        conn.executemany("UPDATE downloads SET last_used_at = ? WHERE video_id = ?",
+                         [(used_at, video_id) for video_id, used_at in touches.items()])
+
+def mark_evicted(base_dir, video_id):
+    """디스크 예산 때문에 파일을 삭제했다고 기록 (다음에 필요하면 다시 다운로드)"""
+    conn = connect_catalog(base_dir)
+    with conn:
+        conn.execute("UPDATE downloads SET evicted_at = ? WHERE video_id = ?", (time.time(), video_id))
+
+def read_video_info(info_path):
+    """video_info.txt 파싱 ('key: value' 형식)"""
+    info = {}
+    with open(info_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                info[key.strip()] = value.strip()
+    return info
+
+def parse_quality_info(info):
+    """video_info.txt의 화질 정보 ('720p', '30', '136') → 카탈로그 열 값"""
+    quality = {}
+    for key, column in QUALITY_INFO_KEYS.items():
+        value = info.get(key, '').rstrip('p')
+        if value.isdigit():
+            quality[column] = int(value)
+    return quality
+
+def scan_download_folder(folder_path):
+    """다운로드 폴더 하나를 읽어 카탈로그 항목 생성 (불완전한 폴더는 None)"""
+    video_files = glob.glob(os.path.join(folder_path, "*_video.mp4"))
+    # 다운로드 중인 .part와 오디오 캐시(.pcm, .pcm.json)는 제외
+    audio_files = [path for path in glob.glob(os.path.join(folder_path, "*_audio.*"))
+                   if not path.endswith(('.part', '.pcm', '.pcm.json'))]
+    if not video_files or not audio_files:
+        return None
+    
+    info_path = os.path.join(folder_path, "video_info.txt")
+    if os.path.exists(info_path):
+        try:
+            info = read_video_info(info_path)
+        except (OSError, UnicodeDecodeError):
+            return None
+        if not info.get('video_id'):
+            return None
+        return build_entry(info['video_id'], video_files[0], audio_files[0],
+                           info.get('title'), info.get('safe_title'), info.get('url'), parse_quality_info(info))
+    
+    # 이전 방식 ({video_id}_video.mp4, video_info.txt 없음)
+    video_id = os.path.basename(video_files[0])[:-len("_video.mp4")]
+    return build_entry(video_id, video_files[0], audio_files[0])
+
+def rebuild_catalog(base_dir, conn=None):
+    """기존 다운로드 폴더 전체를 읽어 카탈로그 재구성, 반환: 등록된 영상 수"""
+    if conn is None:
+        return rebuild_catalog(base_dir, connect_catalog(base_dir))
+    
+    entries = []
+    for folder_name in os.listdir(base_dir):
+        folder_path = os.path.join(base_dir, folder_name)
+        if not os.path.isdir(folder_path):
+            continue
+        entry = scan_download_folder(folder_path)
+        if entry:
+            entries.append(entry)
+    
+    with conn:
+        conn.execute("DELETE FROM downloads")
+        for entry in entries:
+            upsert_entry(conn, entry)
+    
+    return len(entries)
+
+if __name__ == "__main__":
+    # 사용법: python download_catalog.py [downloads 폴더]
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else 'downloads'
+    if not os.path.isdir(target_dir):
+        print(f"❌ 디렉토리를 찾을 수 없습니다: {target_dir}")
+    else:
+        print(f"✅ 카탈로그 재구성 완료: {rebuild_catalog(target_dir)}개 영상")
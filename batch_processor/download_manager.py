@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import glob
+import time
+import random
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from run_report import record_stage
+
+# YouTube는 큰 단일 요청을 스로틀링하므로 Range 단위로 나눠 요청
+DEFAULT_CHUNK_SIZE_MB = 10
+READ_BLOCK_SIZE = 64 * 1024
+
+# download.bandwidth_limit_mbps 단위 변환 (1 Mbit/s = 125,000 바이트/초)
+MEGABIT_BYTES = 1000 * 1000 // 8
+
+# 재시도할 HTTP 상태 코드 (그 외 4xx는 URL 만료 등으로 재시도해도 실패)
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_limiters = None
+_limiters_lock = threading.Lock()
+
+class TokenBucket:
+    """토큰 버킷 속도 제한 (rate: 초당 토큰, capacity: 최대 버스트, rate가 0이면 제한 없음)"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def consume(self, amount=1):
+        """토큰이 충분해질 때까지 대기 후 차감"""
+        if not self.rate:
+            return
+        
+        # 버스트보다 큰 요청은 나눠서 차감
+        while amount > 0:
+            part = min(amount, self.capacity)
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= part:
+                        self.tokens -= part
+                        break
+                    wait = (part - self.tokens) / self.rate
+                time.sleep(wait)
+            amount -= part
+
+class DownloadError(Exception):
+    """재시도 가능한 다운로드 오류"""
+
+def get_download_limiters(config):
+    """프로세스 전체에서 공유하는 속도 제한기/동시 연결 제한 (설정은 처음 호출 시 고정)"""
+    global _limiters
+    
+    with _limiters_lock:
+        if _limiters is None:
+            download_config = config.get('download', {})
+            bandwidth = download_config.get('bandwidth_limit_mbps', 0) * MEGABIT_BYTES
+            requests_per_second = download_config.get('requests_per_second', 0)
+            _limiters = {
+                # 1초 분량까지 버스트 허용
+                'bandwidth': TokenBucket(bandwidth, bandwidth),
+                'requests': TokenBucket(requests_per_second, max(1, requests_per_second)),
+                'streams': threading.BoundedSemaphore(max(1, download_config.get('max_concurrent_streams', 4)))
+            }
+        return _limiters
+
+def parse_content_range(header):
+    """'bytes 0-1023/4096' → 전체 크기 4096 (알 수 없으면 None)"""
+    match = re.match(r'bytes\s+\d+-\d+/(\d+)', header or '')
+    return int(match.group(1)) if match else None
+
+def fetch_ranges(url, part_path, config, expected_size=None):
+    """
+    Range 요청으로 part 파일에 이어받기 (이미 받은 부분은 건너뜀)
+    반환: 전체 파일 크기
+    """
+    limiters = get_download_limiters(config)
+    download_config = config.get('download', {})
+    chunk_size = int(download_config.get('chunk_size_mb', DEFAULT_CHUNK_SIZE_MB) * 1024 * 1024)
+    timeout = download_config.get('timeout', 30)
+    
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    total = expected_size
+    
+    while total is None or offset < total:
+        range_end = offset + chunk_size - 1
+        if total is not None:
+            range_end = min(range_end, total - 1)
+        
+        request = urllib.request.Request(url, headers={'Range': f"bytes={offset}-{range_end}"})
+        limiters['requests'].consume()
+        
+        try:
+            response = urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            # 이미 끝까지 받은 경우
+            if e.code == 416 and offset > 0 and (total is None or offset >= total):
+                return offset
+            if e.code in RETRY_STATUS_CODES:
+                raise DownloadError(f"HTTP {e.code}")
+            raise
+        
+        with response:
+            if response.status == 206:
+                mode = 'ab'
+                total = parse_content_range(response.headers.get('Content-Range')) or total
+            else:
+                # 서버가 Range를 무시하면 처음부터 전체를 받음
+                mode = 'wb'
+                offset = 0
+                length = response.headers.get('Content-Length')
+                total = int(length) if length else None
+            
+            received = 0
+            with open(part_path, mode) as f:
+                while True:
+                    block = response.read(READ_BLOCK_SIZE)
+                    if not block:
+                        break
+                    limiters['bandwidth'].consume(len(block))
+                    f.write(block)
+                    received += len(block)
+            
+            offset += received
+            
+            if response.status != 206:
+                if total is not None and offset < total:
+                    raise DownloadError(f"응답이 중간에 끊김 ({offset}/{total} 바이트)")
+                return offset
+            
+            if received == 0:
+                raise DownloadError("빈 응답")
+    
+    return offset
+
+def call_with_retries(fn, config, label):
+    """
+    네트워크 작업 실행 (네트워크 오류/일시적 HTTP 오류는 지수 백오프로 재시도)
+    반환: (success, fn 결과)
+    """
+    download_config = config.get('download', {})
+    max_retries = download_config.get('max_retries', 5)
+    backoff = download_config.get('retry_backoff', 2.0)
+    attempt = 0
+    
+    while True:
+        try:
+            return True, fn()
+        
+        except (DownloadError, urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError) as e:
+            if isinstance(e, urllib.error.HTTPError) and e.code not in RETRY_STATUS_CODES:
+                print(f"❌ {label} 다운로드 실패: HTTP {e.code}")
+                return False, None
+            
+            attempt += 1
+            if attempt > max_retries:
+                print(f"❌ {label} 다운로드 실패 (재시도 {max_retries}회 초과): {e}")
+                return False, None
+            
+            # 지수 백오프 + 지터 (동시에 재시도가 몰리지 않도록)
+            delay = min(60.0, backoff * (2 ** (attempt - 1))) * (1 + random.random() * 0.25)
+            print(f"⚠️ {label} 다운로드 오류, {delay:.1f}초 후 재시도 ({attempt}/{max_retries}): {e}")
+            time.sleep(delay)
+
+def get_part_path(dest_path, itag=None, expected_size=None):
+    """이어받기용 part 파일 경로 (스트림 itag/크기를 파일명에 넣어 다른 스트림의 part는 이어받지 않음)"""
+    if itag is None and expected_size is None:
+        return f"{dest_path}.part"
+    return f"{dest_path}.{itag}-{expected_size}.part"
+
+def remove_stale_parts(dest_path, part_path):
+    """같은 파일의 다른 스트림 part 삭제 (다시 받을 때 다른 itag/크기의 스트림이 선택된 경우)"""
+    for path in glob.glob(glob.escape(dest_path) + "*.part"):
+        if path != part_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def fetch_to_file(url, dest_path, config, expected_size=None, label=None, itag=None):
+    """
+    URL을 파일로 다운로드 (.part 파일에 받은 뒤 완료 시 이름 변경)
+    재시도/재실행 시 같은 스트림(itag, 크기)의 part만 이어받음
+    반환: (success, bytes)
+    """
+    limiters = get_download_limiters(config)
+    label = label or os.path.basename(dest_path)
+    part_path = get_part_path(dest_path, itag, expected_size)
+    remove_stale_parts(dest_path, part_path)
+    started = time.time()
+    
+    def fetch():
+        with limiters['streams']:
+            return fetch_ranges(url, part_path, config, expected_size)
+    
+    success, size = call_with_retries(fetch, config, label)
+    elapsed = max(time.time() - started, 1e-6)
+    if not success:
+        record_stage('download', elapsed, file=os.path.basename(dest_path), success=False)
+        return False, 0
+    
+    os.replace(part_path, dest_path)
+    record_stage('download', elapsed, file=os.path.basename(dest_path), bytes=size,
+                 mb_per_sec=round(size / 1024 / 1024 / elapsed, 2), success=True)
+    print(f"✅ {label} 다운로드 완료 ({size / 1024 / 1024:.1f}MB, {size / 1024 / 1024 / elapsed:.1f}MB/s)")
+    return True, size
+
+def read_range(url, start, end, config):
+    """바이트 범위 [start, end] 요청 (end 포함, 재시도는 호출 측에서)"""
+    limiters = get_download_limiters(config)
+    timeout = config.get('download', {}).get('timeout', 30)
+    
+    request = urllib.request.Request(url, headers={'Range': f"bytes={start}-{end}"})
+    limiters['requests'].consume()
+    
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code in RETRY_STATUS_CODES:
+            raise DownloadError(f"HTTP {e.code}")
+        raise
+    
+    with response:
+        if response.status != 206:
+            raise DownloadError(f"Range 요청이 지원되지 않음 (HTTP {response.status})")
+        
+        blocks = []
+        received = 0
+        while True:
+            block = response.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            limiters['bandwidth'].consume(len(block))
+            blocks.append(block)
+            received += len(block)
+    
+    if received != end - start + 1:
+        raise DownloadError(f"범위 응답 크기 불일치 ({received}/{end - start + 1} 바이트)")
+    
+    return b''.join(blocks)
+
+def download_streams(tasks, config):
+    """
+    여러 스트림을 동시에 다운로드
+    tasks: [{'url': ..., 'path': ..., 'size': ..., 'label': ..., 'itag': ...}, ...]
+    반환: 모두 성공하면 True
+    """
+    if not tasks:
+        return True
+    
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = [
+            executor.submit(fetch_to_file, task['url'], task['path'], config, task.get('size'), task.get('label'),
+                            task.get('itag'))
+            for task in tasks
+        ]
+        results = [future.result() for future in futures]
+    
+    return all(success for success, _ in results)
+
+def iter_ordered(items, work_fn, max_workers, before_submit=None):
+    """
+    items를 최대 max_workers개까지 미리 실행하면서 입력 순서대로 (item, result) 반환
+    before_submit: 새 작업 제출 전에 호출 (False를 반환하면 제출 중단)
+    """
+    items = iter(items)
+    pending = deque()
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        def fill():
+            while len(pending) < max(1, max_workers):
+                if before_submit and before_submit() is False:
+                    return
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                pending.append((item, executor.submit(work_fn, item)))
+        
+        fill()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+            fill()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import threading
+from download_catalog import list_downloads, touch_download, mark_evicted
+from audio_cache import get_pcm_paths, release_pcm_audio
+from run_report import timed_stage
+
+# 이번 배치에서 처리할 행이 남은 영상 (디스크 예산을 넘어도 삭제하지 않음)
+_pinned = set()
+_store_lock = threading.Lock()
+
+def get_max_bytes(config):
+    """다운로드 폴더 용량 한도 (download.max_bytes, 0이면 제한 없음)"""
+    return config['download'].get('max_bytes', 0) or 0
+
+def pin_downloads(video_ids):
+    """처리할 행이 남은 영상 고정"""
+    with _store_lock:
+        _pinned.update(video_ids)
+
+def unpin_download(video_id):
+    """영상의 행을 모두 처리했으면 고정 해제"""
+    with _store_lock:
+        _pinned.discard(video_id)
+
+def get_entry_bytes(entry):
+    """
+    다운로드 하나의 용량: 카탈로그에 기록된 원본 크기 + 오디오 캐시(.pcm)
+    다운로드 중인 .part, 프로브 캐시, .metadata는 세지 않음 (받을 용량은 reserve_bytes로 미리 확보)
+    """
+    total = (entry['video_size'] or 0) + (entry['audio_size'] or 0)
+    try:
+        total += os.path.getsize(get_pcm_paths(entry['audio_path'])[0])
+    except OSError:
+        pass
+    return total
+
+def delete_download_folder(entry):
+    """다운로드 폴더 삭제 (열려 있는 오디오 캐시는 먼저 해제), 폴더가 남으면 False"""
+    release_pcm_audio(entry['audio_path'])
+    folder_path = os.path.dirname(entry['video_path'])
+    shutil.rmtree(folder_path, ignore_errors=True)
+    return not os.path.exists(folder_path)
+
+def enforce_download_budget(config, reserve_bytes=0):
+    """
+    다운로드 폴더가 download.max_bytes(+ 곧 받을 reserve_bytes)를 넘으면
+    고정되지 않은 영상을 마지막 사용 시각이 오래된 순서로 폴더째 삭제하고 카탈로그에 기록
+    반환: 삭제한 video_id 목록
+    """
+    max_bytes = get_max_bytes(config)
+    base_dir = config['download']['base_directory']
+    if not max_bytes or not os.path.exists(base_dir):
+        return []
+    
+    evicted = []
+    with _store_lock:
+        entries = list_downloads(base_dir)
+        sizes = {entry['video_id']: get_entry_bytes(entry) for entry in entries}
+        total = sum(sizes.values())
+        if total + reserve_bytes <= max_bytes:
+            return evicted
+        
+        candidates = sorted(
+            (entry for entry in entries if entry['video_id'] not in _pinned and entry['folder']),
+            key=lambda entry: entry['last_used_at'] or entry['updated_at'] or 0
+        )
+        for entry in candidates:
+            if total + reserve_bytes <= max_bytes:
+                break
+            
+            video_id = entry['video_id']
+            with timed_stage('bookkeeping', op='evict_download', video_id=video_id, bytes=sizes[video_id]):
+                deleted = delete_download_folder(entry)
+                if deleted:
+                    mark_evicted(base_dir, video_id)
+            if not deleted:
+                # 사용 중인 파일이 있으면 삭제 기록을 남기지 않고 다음 확인 때 다시 시도
+                print(f"⚠️ 다운로드 삭제 실패 (사용 중인 파일): {entry['folder']}")
+                continue
+            total -= sizes[video_id]
+            evicted.append(video_id)
+            print(f"🧹 디스크 예산 초과: 다운로드 삭제 {entry['folder']} ({sizes[video_id] / 1024 / 1024:.1f}MB)")
+        
+        if total + reserve_bytes > max_bytes:
+            print(f"⚠️ 다운로드 폴더 {total / 1024 / 1024:.1f}MB가 download.max_bytes를 넘지만 "
+                  f"남은 영상은 처리할 행이 남아 있거나 사용 중이라 삭제하지 않습니다")
+    
+    return evicted
+
+def release_download(config, video_id):
+    """영상 처리 완료: 마지막 사용 시각 갱신, 고정 해제 후 디스크 예산 확인"""
+    unpin_download(video_id)
+    if not get_max_bytes(config):
+        return
+    base_dir = config['download']['base_directory']
+    if os.path.exists(base_dir):
+        touch_download(base_dir, video_id)
+    enforce_download_budget(config)
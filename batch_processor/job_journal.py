@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+# 저널은 클립 폴더에 저장 (매니페스트와 같은 위치)
+JOURNAL_FILENAME = "journal.jsonl"
+
+# 클립 출력은 같은 폴더의 숨김 임시 파일(.{파일명}.part{확장자})에 쓴 뒤 이름 변경
+TEMP_PREFIX = "."
+TEMP_SUFFIX = ".part"
+
+_journal = None
+_journal_lock = threading.Lock()
+
+def get_journal_path(clips_dir):
+    """클립 폴더의 작업 저널 경로"""
+    return os.path.join(clips_dir, JOURNAL_FILENAME)
+
+def get_temp_output_path(path):
+    """출력 파일의 임시 경로 (ffmpeg가 형식을 알 수 있도록 확장자 유지, 클립 스캔에 걸리지 않도록 숨김 파일)"""
+    path = Path(path)
+    return str(path.with_name(f"{TEMP_PREFIX}{path.stem}{TEMP_SUFFIX}{path.suffix}"))
+
+def get_output_name(path):
+    """출력 파일 이름 (임시 경로면 최종 파일 이름, 진행률/오류 메시지용)"""
+    name = os.path.basename(path)
+    stem, suffix = os.path.splitext(name)
+    if stem.startswith(TEMP_PREFIX) and stem.endswith(TEMP_SUFFIX):
+        return stem[len(TEMP_PREFIX):-len(TEMP_SUFFIX)] + suffix
+    return name
+
+def get_row_key(video_id, clip_data):
+    """CSV 행 식별값 (행 번호와 무관하게 같은 영상/라벨/구간이면 같은 행)"""
+    return f"{video_id}|{clip_data['label']}|{clip_data['start']:.3f}|{clip_data['end']:.3f}"
+
+def replay_journal(journal_path):
+    """
+    저널을 처음부터 읽어 작업별 마지막 상태 복원 (중단으로 잘린 마지막 줄은 무시)
+    반환: (클립 작업 {job: 기록}, 다운로드 {video_id: 기록}, 마지막 실행이 정상 종료됐는지)
+    """
+    jobs = {}
+    downloads = {}
+    finished = True
+    if not os.path.exists(journal_path):
+        return jobs, downloads, finished
+    
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            
+            if record.get('type') == 'clip':
+                jobs[record['job']] = dict(jobs.get(record['job'], {}), **record)
+            elif record.get('type') == 'download':
+                downloads[record['video_id']] = record
+            elif record.get('type') == 'run_start':
+                finished = False
+            elif record.get('type') == 'run_end':
+                finished = True
+    
+    return jobs, downloads, finished
+
+def cleanup_unfinished_outputs(jobs):
+    """
+    완료되지 않은 클립 작업의 출력 삭제
+    - 임시 파일은 항상 삭제
+    - 최종 파일은 이름 변경(committed) 후 매니페스트 기록 전에 중단된 새 클립만 삭제
+      (다시 생성 중이던 기존 클립은 매니페스트에 남아 있으므로 유지, 지문이 다르면 다음 실행에서 다시 생성)
+    반환: 삭제한 파일 수
+    """
+    removed = 0
+    for record in jobs.values():
+        if record.get('state') == 'done':
+            continue
+        remove_final = record.get('state') == 'committed' and not record.get('rebuild')
+        for path in (record.get('outputs') or {}).values():
+            candidates = [get_temp_output_path(path), path] if remove_final else [get_temp_output_path(path)]
+            for candidate in candidates:
+                if os.path.exists(candidate):
+                    os.remove(candidate)
+                    removed += 1
+    return removed
+
+class JobJournal:
+    """
+    다운로드/클립 작업 상태를 기록하는 write-ahead 저널 (JSONL, 기록마다 fsync)
+    - 클립: pending (번호/출력 경로 할당) → running (ffmpeg 실행) → committed (이름 변경)
+            → done (매니페스트 기록) / failed
+    - 다운로드: pending → running → done / failed
+    """
+    
+    def __init__(self, journal_path, previous_jobs=None):
+        self.journal_path = journal_path
+        self.lock = threading.Lock()
+        
+        # --resume: 이전 실행에서 완료된 행, 완료되지 않은 행에 할당했던 클립 번호
+        self.done_keys = set()
+        self.reserved = {}
+        for record in (previous_jobs or {}).values():
+            if record.get('state') == 'done':
+                self.done_keys.add(record['key'])
+            else:
+                self.reserved[record['key']] = (record['label'], record['clip_num'])
+        
+        os.makedirs(os.path.dirname(journal_path) or '.', exist_ok=True)
+        self.file = open(journal_path, 'a' if previous_jobs is not None else 'w', encoding='utf-8')
+    
+    def write(self, record):
+        """JSONL 한 줄 기록 (다음 단계를 시작하기 전에 디스크에 반영)"""
+        line = json.dumps(dict(record, ts=round(time.time(), 3)), ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+    
+    def close(self, stats=None):
+        """실행 종료 기록 후 파일 닫기"""
+        self.write({'type': 'run_end', 'stats': stats or {}})
+        with self.lock:
+            self.file.close()
+
+def open_job_journal(config, resume=False, **fields):
+    """
+    작업 저널 시작 (batch.journal이 false면 None, 이후 기록은 무시됨)
+    이전 실행이 남긴 미완성 출력은 항상 정리하고, resume이면 이전 저널에 이어서 기록
+    """
+    global _journal
+    
+    journal_path = get_journal_path(config['clips']['output_directory'])
+    jobs, downloads, finished = replay_journal(journal_path)
+    
+    removed = cleanup_unfinished_outputs(jobs)
+    if removed:
+        print(f"🧹 중단된 클립 작업의 미완성 출력 {removed}개 삭제")
+    
+    if not config.get('batch', {}).get('journal', True):
+        return None
+    
+    if resume:
+        if not jobs and not downloads:
+            print("ℹ️ 이어서 실행할 작업 저널이 없어 처음부터 실행합니다")
+        elif finished:
+            print("ℹ️ 이전 실행은 정상 종료되었습니다 (완료된 행은 건너뜀)")
+        else:
+            done = sum(1 for record in jobs.values() if record.get('state') == 'done')
+            print(f"🔁 이전 실행에 이어서 처리 (완료된 클립 {done}개 건너뜀)")
+    elif jobs and not finished:
+        print("⚠️ 이전 실행이 중단되었습니다. 같은 CSV를 이어서 처리하려면 --resume을 사용하세요")
+    
+    with _journal_lock:
+        _journal = JobJournal(journal_path, jobs if resume else None)
+        _journal.write(dict(fields, type='run_start', resume=resume))
+    return _journal
+
+def close_job_journal(stats=None):
+    """작업 저널 종료 (정상 종료 기록)"""
+    global _journal
+    
+    with _journal_lock:
+        journal = _journal
+        _journal = None
+    if journal is not None:
+        journal.close(stats)
+
+def journal_download(video_id, state, **fields):
+    """다운로드 작업 상태 기록 (저널이 없으면 무시)"""
+    journal = _journal
+    if journal is not None:
+        journal.write(dict(fields, type='download', video_id=video_id, state=state))
+
+def journal_clip(job, state, **fields):
+    """클립 작업 상태 기록 (pending이면 다시 시작할 때 정리할 출력 경로와 다시 생성 여부도 기록)"""
+    journal = _journal
+    if journal is None:
+        return
+    
+    record = dict(fields, type='clip', job=job['base_filename'], state=state)
+    if state == 'pending':
+        entry = job['entry']
+        record.update({
+            'key': get_row_key(entry['video_id'], job['clip_data']),
+            'label': entry['label'],
+            'clip_num': entry['clip_num'],
+            'outputs': job['output_paths'],
+            'rebuild': bool(job.get('rebuild'))
+        })
+    journal.write(record)
+
+def is_journal_done(video_id, clip_data):
+    """--resume: 이전 실행에서 완료된 행인지"""
+    journal = _journal
+    return journal is not None and get_row_key(video_id, clip_data) in journal.done_keys
+
+def get_reserved_clip_number(video_id, clip_data):
+    """--resume: 이전 실행에서 이 행에 할당했던 클립 번호 (없으면 None)"""
+    journal = _journal
+    if journal is None:
+        return None
+    reserved = journal.reserved.get(get_row_key(video_id, clip_data))
+    return reserved[1] if reserved else None
+
+def get_reserved_clip_numbers():
+    """--resume: 다시 사용할 (라벨, 클립 번호) 목록 (새 행에 같은 번호가 할당되지 않도록 미리 예약)"""
+    journal = _journal
+    if journal is None:
+        return []
+    return list(journal.reserved.values())
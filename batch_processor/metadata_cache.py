@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+
+# 메타데이터는 다운로드 폴더 아래 video_id별 JSON으로 저장 (downloads/.metadata/{video_id}.json)
+METADATA_DIRNAME = ".metadata"
+DEFAULT_TTL_HOURS = 24
+
+# 스트림 URL 만료까지 남은 시간(초)이 이보다 짧으면 다운로드 전에 새로 조회
+URL_EXPIRY_MARGIN = 600
+
+# 캐시 파일명으로 쓰기 전에 확인 (경로 구분자 등이 들어간 값으로 다른 위치에 쓰지 않도록)
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def get_metadata_path(base_dir, video_id):
+    """video_id의 메타데이터 캐시 경로 (YouTube video_id 형식이 아니면 ValueError)"""
+    if not VIDEO_ID_PATTERN.match(video_id or ''):
+        raise ValueError(f"잘못된 video_id: {video_id!r}")
+    return os.path.join(base_dir, METADATA_DIRNAME, f"{video_id}.json")
+
+def stream_to_dict(stream):
+    """pytubefix Stream → 캐시용 dict (추가 네트워크 요청 없이 읽을 수 있는 값만)"""
+    return {
+        'itag': stream.itag,
+        'type': stream.type,
+        'subtype': stream.subtype,
+        'mime_type': stream.mime_type,
+        'is_adaptive': stream.is_adaptive,
+        'resolution': getattr(stream, 'resolution', None),
+        'fps': getattr(stream, 'fps', None),
+        'video_codec': stream.video_codec,
+        'audio_codec': stream.audio_codec,
+        'abr': getattr(stream, 'abr', None),
+        'bitrate': stream.bitrate,
+        # 공개 filesize 속성은 contentLength가 없으면 HEAD 요청을 보내므로 매니페스트 값만 저장
+        # (없으면 estimate_stream_bytes가 비트레이트 × 길이로 추정, 다운로드는 응답의 Content-Range 사용)
+        'filesize': getattr(stream, '_filesize', 0) or None,
+        'url': stream.url
+    }
+
+def build_metadata(yt, video_id):
+    """YouTube 객체 → 캐시할 메타데이터 (제목, 길이, 전체 스트림 목록)"""
+    return {
+        'video_id': video_id,
+        'title': yt.title,
+        'length': yt.length,
+        'fetched_at': time.time(),
+        'streams': [stream_to_dict(stream) for stream in yt.streams]
+    }
+
+def load_metadata(base_dir, video_id, ttl_hours=DEFAULT_TTL_HOURS):
+    """캐시된 메타데이터 (없거나 손상됐거나 TTL이 지났으면 None, ttl_hours=0이면 만료 없음)"""
+    try:
+        with open(get_metadata_path(base_dir, video_id), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if ttl_hours and time.time() - metadata.get('fetched_at', 0) > ttl_hours * 3600:
+        return None
+    return metadata
+
+def save_metadata(base_dir, metadata):
+    """메타데이터 저장 (임시 파일에 쓴 뒤 교체)"""
+    path = get_metadata_path(base_dir, metadata['video_id'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    
+    # 같은 영상을 여러 스레드가 동시에 조회해도 서로의 임시 파일을 덮어쓰지 않도록 스레드별 이름 사용
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def filter_streams(streams, kind, subtype=None, adaptive=None):
+    """스트림 목록 필터 (kind: 'video'/'audio', subtype: 'mp4'/'m4a'/'webm' 등)"""
+    return [
+        stream for stream in streams
+        if stream['type'] == kind
+        and (subtype is None or stream['subtype'] == subtype)
+        and (adaptive is None or stream['is_adaptive'] == adaptive)
+    ]
+
+def estimate_stream_bytes(stream, length):
+    """스트림 크기 (매니페스트에 없으면 비트레이트 × 길이로 추정, 알 수 없으면 None)"""
+    if stream.get('filesize'):
+        return stream['filesize']
+    if stream.get('bitrate') and length:
+        return int(stream['bitrate'] * length / 8)
+    return None
+
+def get_url_expiry(url):
+    """스트림 URL의 만료 시각 (expire 파라미터, 없으면 None)"""
+    values = parse_qs(urlparse(url or '').query).get('expire')
+    if values and values[0].isdigit():
+        return int(values[0])
+    return None
+
+def has_fresh_urls(streams, margin=URL_EXPIRY_MARGIN):
+    """스트림 URL이 모두 다운로드에 쓸 수 있을 만큼 남아 있는지 (만료 정보가 없으면 새로 조회)"""
+    now = time.time()
+    for stream in streams:
+        expiry = get_url_expiry(stream.get('url'))
+        if expiry is None or expiry - now < margin:
+            return False
+    return True
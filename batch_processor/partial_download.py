@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from download_manager import call_with_retries, read_range, get_download_limiters, fetch_to_file
+from run_report import record_stage
+
+COVERAGE_FILENAME = "partial_coverage.json"
+
+# 처음 요청할 헤더 크기 (ftyp + moov + sidx가 보통 이 안에 있음)
+HEAD_PROBE_BYTES = 256 * 1024
+MAX_HEAD_BYTES = 8 * 1024 * 1024
+
+# tfhd 플래그: base-data-offset이 절대 위치면 조각을 옮길 수 없음
+TFHD_BASE_DATA_OFFSET_PRESENT = 0x000001
+
+def iter_boxes(data, start=0, end=None):
+    """MP4 박스 순회: (type, box_start, box_size, header_size)"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+        header_size = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield box_type.decode('latin-1'), pos, size, header_size
+        pos += size
+
+def parse_sidx(data, box_start, header_size):
+    """sidx 박스 파싱 → 타임스케일, 시작 시간, 세그먼트(바이트 크기/길이/SAP) 목록"""
+    pos = box_start + header_size
+    version = data[pos]
+    pos += 4  # version + flags
+    _reference_id, timescale = struct.unpack('>II', data[pos:pos + 8])
+    pos += 8
+    if version == 0:
+        earliest_time, first_offset = struct.unpack('>II', data[pos:pos + 8])
+        pos += 8
+    else:
+        earliest_time, first_offset = struct.unpack('>QQ', data[pos:pos + 16])
+        pos += 16
+    pos += 2  # reserved
+    reference_count = struct.unpack('>H', data[pos:pos + 2])[0]
+    pos += 2
+    
+    references = []
+    for _ in range(reference_count):
+        ref, duration, sap = struct.unpack('>III', data[pos:pos + 12])
+        pos += 12
+        references.append({
+            'hierarchical': bool(ref >> 31),
+            'size': ref & 0x7FFFFFFF,
+            'duration': duration,
+            'sap': sap
+        })
+    
+    return {
+        'timescale': timescale,
+        'earliest_time': earliest_time,
+        'first_offset': first_offset,
+        'references': references
+    }
+
+def build_segment_index(sidx, sidx_end):
+    """sidx 참조 목록을 (start_sec, end_sec, byte_start, byte_end, ref) 세그먼트 목록으로 변환"""
+    segments = []
+    byte_pos = sidx_end + sidx['first_offset']
+    time_pos = sidx['earliest_time']
+    timescale = float(sidx['timescale'])
+    
+    for ref in sidx['references']:
+        segments.append({
+            'start': time_pos / timescale,
+            'end': (time_pos + ref['duration']) / timescale,
+            'time': time_pos,
+            'byte_start': byte_pos,
+            'byte_end': byte_pos + ref['size'] - 1,
+            'ref': ref
+        })
+        byte_pos += ref['size']
+        time_pos += ref['duration']
+    
+    return segments
+
+def merge_windows(windows):
+    """겹치는 구간 병합"""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(window) for window in merged]
+
+def get_clip_windows(clips, margin):
+    """클립 구간에 여유(margin)를 더하고 겹치는 구간을 병합"""
+    return merge_windows((max(0.0, clip['start'] - margin), clip['end'] + margin) for clip in clips)
+
+def select_segments(segments, windows):
+    """구간(window)과 겹치는 세그먼트만 선택 (DASH 세그먼트는 키프레임으로 시작)"""
+    return [
+        segment for segment in segments
+        if any(segment['start'] < end and segment['end'] > start for start, end in windows)
+    ]
+
+def build_sidx(segments, timescale):
+    """
+    선택된 세그먼트만 가리키는 sidx 박스 생성
+    세그먼트 사이의 빈 시간은 앞 세그먼트 길이에 포함시켜 원래 타임라인을 유지
+    """
+    references = b''
+    for i, segment in enumerate(segments):
+        if i + 1 < len(segments):
+            duration = segments[i + 1]['time'] - segment['time']
+        else:
+            duration = segment['ref']['duration']
+        references += struct.pack('>III', segment['ref']['size'], duration, segment['ref']['sap'])
+    
+    body = struct.pack('>B3sII', 1, b'\x00\x00\x00', 1, timescale)
+    body += struct.pack('>QQ', segments[0]['time'], 0)
+    body += struct.pack('>HH', 0, len(segments))
+    body += references
+    return struct.pack('>I4s', 8 + len(body), b'sidx') + body
+
+def is_relocatable_fragment(fragment):
+    """moof의 tfhd가 절대 base-data-offset을 쓰지 않는지 확인 (조각 이동 가능 여부)"""
+    for box_type, start, size, header in iter_boxes(fragment):
+        if box_type != 'moof':
+            continue
+        for child_type, child_start, child_size, child_header in iter_boxes(fragment, start + header, start + size):
+            if child_type != 'traf':
+                continue
+            for leaf_type, leaf_start, _, leaf_header in iter_boxes(fragment, child_start + child_header, child_start + child_size):
+                if leaf_type == 'tfhd':
+                    flags = struct.unpack('>I', fragment[leaf_start + leaf_header:leaf_start + leaf_header + 4])[0] & 0xFFFFFF
+                    if flags & TFHD_BASE_DATA_OFFSET_PRESENT:
+                        return False
+        return True
+    return False
+
+def fetch_bytes(url, start, end, config, label):
+    """재시도 포함 바이트 범위 요청 (실패 시 None)"""
+    def fetch():
+        with get_download_limiters(config)['streams']:
+            return read_range(url, start, end, config)
+    
+    success, data = call_with_retries(fetch, config, label)
+    return data if success else None
+
+def fetch_index(url, config, label, file_size=None):
+    """
+    헤더 부분을 받아 초기화 세그먼트(ftyp+moov)와 sidx 인덱스 조회
+    반환: (init_bytes, sidx, segments) - 조각화된 MP4가 아니면 None
+    """
+    head_size = HEAD_PROBE_BYTES
+    while head_size <= MAX_HEAD_BYTES:
+        if file_size:
+            head_size = min(head_size, file_size)
+        head = fetch_bytes(url, 0, head_size - 1, config, label)
+        if head is None:
+            return None
+        
+        has_moov = False
+        for box_type, start, size, header in iter_boxes(head):
+            if box_type == 'moov':
+                has_moov = True
+            elif box_type == 'sidx':
+                if start + size > len(head):
+                    break  # sidx가 잘렸으면 더 받아서 다시 시도
+                if not has_moov:
+                    return None
+                sidx = parse_sidx(head, start, header)
+                if any(ref['hierarchical'] for ref in sidx['references']):
+                    return None
+                return head[:start], sidx, build_segment_index(sidx, start + size)
+            elif box_type in ('moof', 'mdat'):
+                # sidx 없이 조각/데이터가 시작되면 인덱스 없음
+                return None
+        
+        if len(head) < head_size or head_size == file_size:
+            return None
+        head_size *= 4
+    
+    return None
+
+def download_partial_mp4(url, dest_path, windows, config, label=None, file_size=None):
+    """
+    조각화된 MP4(DASH)에서 구간에 해당하는 조각만 받아 재생 가능한 희소(sparse) 파일 생성
+    레이아웃: 원본 초기화 세그먼트 + 새 sidx + 선택된 moof/mdat 조각 (타임스탬프는 원본 그대로)
+    반환: (success, bytes) - 부분 다운로드가 불가능하면 (False, 0)이므로 전체 다운로드로 대체
+    """
+    label = label or os.path.basename(dest_path)
+    started = time.time()
+    
+    index = fetch_index(url, config, label, file_size)
+    if index is None:
+        print(f"⚠️ {label}: 조각 인덱스(sidx)가 없어 부분 다운로드 불가")
+        return False, 0
+    init_bytes, sidx, segments = index
+    
+    selected = select_segments(segments, windows)
+    if not selected:
+        print(f"⚠️ {label}: 클립 구간에 해당하는 조각이 없음")
+        return False, 0
+    
+    chunk_size = int(config.get('download', {}).get('chunk_size_mb', 10) * 1024 * 1024)
+    part_path = f"{dest_path}.part"
+    total = len(init_bytes)
+    
+    with open(part_path, 'wb') as f:
+        f.write(init_bytes)
+        f.write(build_sidx(selected, sidx['timescale']))
+        
+        # 연속된 세그먼트는 하나의 범위로 묶어서 요청
+        ranges = []
+        for segment in selected:
+            if ranges and ranges[-1][1] + 1 == segment['byte_start']:
+                ranges[-1][1] = segment['byte_end']
+            else:
+                ranges.append([segment['byte_start'], segment['byte_end']])
+        
+        checked = False
+        failed = False
+        for range_start, range_end in ranges:
+            pos = range_start
+            while pos <= range_end and not failed:
+                chunk_end = min(range_end, pos + chunk_size - 1)
+                data = fetch_bytes(url, pos, chunk_end, config, label)
+                if data is None:
+                    failed = True
+                    break
+                
+                # 첫 조각으로 이동 가능 여부 확인
+                if not checked:
+                    checked = True
+                    if not is_relocatable_fragment(data):
+                        print(f"⚠️ {label}: 조각이 절대 오프셋을 사용해 부분 다운로드 불가")
+                        failed = True
+                        break
+                
+                f.write(data)
+                total += len(data)
+                pos = chunk_end + 1
+            
+            if failed:
+                break
+    
+    if failed:
+        os.remove(part_path)
+        return False, 0
+    
+    os.replace(part_path, dest_path)
+    full_size = segments[-1]['byte_end'] + 1
+    elapsed = max(time.time() - started, 1e-6)
+    record_stage('download_partial', elapsed, file=os.path.basename(dest_path), bytes=total,
+                 full_bytes=full_size, mb_per_sec=round(total / 1024 / 1024 / elapsed, 2), success=True)
+    print(f"✅ {label} 부분 다운로드 완료 ({len(selected)}/{len(segments)}개 조각, "
+          f"{total / 1024 / 1024:.1f}MB / 전체 {full_size / 1024 / 1024:.1f}MB)")
+    return True, total
+
+def load_coverage(video_dir):
+    """부분 다운로드 폴더의 확보 구간 목록 (전체 다운로드면 None)"""
+    coverage_path = os.path.join(video_dir, COVERAGE_FILENAME)
+    if not os.path.exists(coverage_path):
+        return None
+    try:
+        with open(coverage_path, 'r', encoding='utf-8') as f:
+            return [tuple(window) for window in json.load(f)['windows']]
+    except (OSError, ValueError, KeyError):
+        return []
+
+def save_coverage(video_dir, windows):
+    """부분 다운로드로 확보한 구간 기록 (None이면 전체 다운로드이므로 기록 삭제)"""
+    coverage_path = os.path.join(video_dir, COVERAGE_FILENAME)
+    if windows is None:
+        if os.path.exists(coverage_path):
+            os.remove(coverage_path)
+        return
+    
+    tmp_path = f"{coverage_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'windows': [list(window) for window in windows]}, f)
+    os.replace(tmp_path, coverage_path)
+
+def is_covered(clips, coverage):
+    """모든 클립이 부분 다운로드 구간 안에 있는지 확인 (coverage가 None이면 전체 다운로드)"""
+    if coverage is None:
+        return True
+    return all(
+        any(start <= clip['start'] and clip['end'] <= end for start, end in coverage)
+        for clip in clips
+    )
+
+
+def download_streams_partial(tasks, windows, config):
+    """
+    스트림들을 동시에 받되, 조각화된 MP4는 구간만 부분 다운로드 (불가능하면 전체 다운로드)
+    tasks: download_manager.download_streams와 같은 형식
+    반환: (모두 성공 여부, 부분 다운로드된 스트림이 있는지)
+    """
+    def run(task):
+        if task['path'].endswith(('.mp4', '.m4a')):
+            success, _ = download_partial_mp4(task['url'], task['path'], windows, config,
+                                              task.get('label'), task.get('size'))
+            if success:
+                return True, True
+        success, _ = fetch_to_file(task['url'], task['path'], config, task.get('size'), task.get('label'),
+                                   task.get('itag'))
+        return success, False
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(tasks))) as executor:
+        results = list(executor.map(run, tasks))
+    
+    return all(success for success, _ in results), any(partial for _, partial in results)
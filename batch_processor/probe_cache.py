@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import subprocess
+import threading
+
+PROBE_CACHE_FILENAME = "probe_cache.json"
+
+# 키프레임 인덱스는 smart_cut에서만 필요하므로 처음 요청할 때 따로 스캔해 별도 항목({파일명}#keyframes)으로 캐시
+KEYFRAMES_KEY_SUFFIX = "#keyframes"
+
+# 클립 종료 시간이 실제 길이를 이 값(초)보다 넘으면 불가능한 클립으로 판단
+DURATION_TOLERANCE = 0.1
+
+# 캐시 파일 읽기/쓰기용 (ffprobe 실행 중에는 잡지 않음)
+_cache_lock = threading.Lock()
+# 파일별 프로브 잠금 (같은 파일을 여러 작업이 동시에 요청해도 ffprobe는 한 번만 실행)
+_probe_locks = {}
+
+def run_ffprobe(args):
+    """ffprobe 실행 후 stdout 반환 (실패 시 None)"""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error'] + args,
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+    except FileNotFoundError:
+        return None
+    
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+def parse_frame_rate(rate):
+    """'30000/1001' 형식의 프레임 레이트를 float로 변환"""
+    try:
+        if '/' in str(rate):
+            num, den = str(rate).split('/')
+            return float(num) / float(den) if float(den) else None
+        return float(rate)
+    except (ValueError, TypeError):
+        return None
+
+def probe_keyframes(video_path, start=None, end=None):
+    """
+    비디오 키프레임 타임스탬프(초) 목록
+    start/end를 주면 해당 구간 주변만 읽음 (패킷 헤더만 읽으므로 디코딩 없음)
+    """
+    args = [
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0'
+    ]
+    if start is not None and end is not None:
+        args += ['-read_intervals', f"{max(start, 0):.3f}%{end:.3f}"]
+    
+    output = run_ffprobe(args + [video_path])
+    if output is None:
+        return None
+    
+    keyframes = []
+    for line in output.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2 or 'K' not in parts[1]:
+            continue
+        try:
+            keyframes.append(float(parts[0]))
+        except ValueError:
+            continue
+    
+    return sorted(keyframes)
+
+def probe_media_file(media_path):
+    """ffprobe로 길이, 스트림 코덱, 프레임 레이트 조회 (컨테이너 헤더만 읽음, 키프레임 인덱스는 get_keyframe_index)"""
+    output = run_ffprobe([
+        '-show_entries', 'format=duration:stream=codec_type,codec_name,avg_frame_rate,width,height,pix_fmt,sample_rate',
+        '-of', 'json',
+        media_path
+    ])
+    if output is None:
+        return None
+    
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return None
+    
+    streams = []
+    fps = None
+    for stream in data.get('streams', []):
+        info = {
+            'type': stream.get('codec_type'),
+            'codec': stream.get('codec_name')
+        }
+        if stream.get('codec_type') == 'video':
+            info['width'] = stream.get('width')
+            info['height'] = stream.get('height')
+            info['fps'] = parse_frame_rate(stream.get('avg_frame_rate'))
+            info['pix_fmt'] = stream.get('pix_fmt')
+            if fps is None:
+                fps = info['fps']
+        elif stream.get('codec_type') == 'audio':
+            info['sample_rate'] = int(stream.get('sample_rate') or 0) or None
+        streams.append(info)
+    
+    try:
+        duration = float(data.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    
+    return {
+        'duration': duration,
+        'streams': streams,
+        'fps': fps
+    }
+
+def get_cache_path(media_path):
+    """미디어 파일이 있는 다운로드 폴더의 프로브 캐시 경로"""
+    return os.path.join(os.path.dirname(os.path.abspath(media_path)), PROBE_CACHE_FILENAME)
+
+def load_probe_cache(cache_path):
+    """프로브 캐시 로드 (없거나 손상되면 빈 캐시)"""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_probe_cache(cache_path, cache):
+    """프로브 캐시 저장 (임시 파일 후 교체)"""
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def get_cached_info(cache_path, key, stat):
+    """프로브 캐시의 미디어 정보 (파일 크기/수정 시간이 다르거나 없으면 None)"""
+    with _cache_lock:
+        entry = load_probe_cache(cache_path).get(key)
+    if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+        return entry['info']
+    return None
+
+def get_cached_probe(media_path, probe_fn, key_suffix='', probe=True):
+    """
+    캐시된 프로브 결과 조회 (파일 크기/수정 시간이 같으면 재사용, 다르면 probe_fn으로 다시 프로브)
+    ffprobe를 사용할 수 없거나, probe=False인데 캐시가 없으면 None
+    """
+    if not media_path or not os.path.exists(media_path):
+        return None
+    
+    stat = os.stat(media_path)
+    key = os.path.basename(media_path) + key_suffix
+    cache_path = get_cache_path(media_path)
+    
+    info = get_cached_info(cache_path, key, stat)
+    if info is not None or not probe:
+        return info
+    
+    with _cache_lock:
+        probe_lock = _probe_locks.setdefault(os.path.abspath(media_path) + key_suffix, threading.Lock())
+    
+    with probe_lock:
+        # 기다리는 동안 다른 작업이 프로브했으면 재사용
+        info = get_cached_info(cache_path, key, stat)
+        if info is not None:
+            return info
+        
+        info = probe_fn(media_path)
+        if info is None:
+            return None
+        
+        # 같은 폴더의 다른 파일 프로브 결과를 덮어쓰지 않도록 다시 읽어서 저장
+        with _cache_lock:
+            cache = load_probe_cache(cache_path)
+            cache[key] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'info': info
+            }
+            try:
+                save_probe_cache(cache_path, cache)
+            except OSError as e:
+                print(f"⚠️ 프로브 캐시 저장 실패: {e}")
+    
+    return info
+
+def get_media_info(media_path, probe=True):
+    """캐시된 미디어 정보 (길이, 스트림 코덱, 프레임 레이트)"""
+    return get_cached_probe(media_path, probe_media_file, probe=probe)
+
+def get_keyframe_index(video_path):
+    """캐시된 키프레임 인덱스 (smart_cut 전용, 처음 요청할 때만 패킷 헤더 전체 스캔)"""
+    return get_cached_probe(video_path, probe_keyframes, KEYFRAMES_KEY_SUFFIX)
+
+def get_source_duration(*media_infos):
+    """비디오/오디오 중 짧은 쪽의 길이 (알 수 없으면 None)"""
+    durations = [info['duration'] for info in media_infos if info and info.get('duration')]
+    return min(durations) if durations else None
+
+def check_clip_range(clip_data, source_duration):
+    """실제 미디어 길이를 넘는 클립이면 오류 메시지 반환"""
+    if source_duration is None:
+        return None
+    
+    if clip_data['end'] > source_duration + DURATION_TOLERANCE:
+        return f"종료시간 {clip_data['end']}초가 영상 길이 {source_duration:.1f}초를 초과"
+    return None
+
+def get_keyframes_between(keyframes, start, end):
+    """키프레임 인덱스에서 구간 내 키프레임 조회 (인덱스가 없으면 None)"""
+    if not keyframes:
+        return None
+    return [k for k in keyframes if start <= k <= end]
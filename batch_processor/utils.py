@@ -3,11 +3,25 @@
 
 import os
 import re
+import time
 import yaml
 import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pytubefix import YouTube
-from pytubefix.cli import on_progress
+from probe_cache import get_media_info, get_keyframe_index, get_keyframes_between, probe_keyframes
+from download_manager import get_download_limiters, download_streams
+from download_catalog import record_download
+from run_report import record_stage, timed_stage
+from ffmpeg_progress import run_ffmpeg_with_progress
+from audio_cache import get_pcm_audio, write_audio_clip, get_audio_encoder
+from metadata_cache import (
+    DEFAULT_TTL_HOURS, build_metadata, load_metadata, save_metadata, filter_streams, has_fresh_urls
+)
+from partial_download import (
+    get_clip_windows, merge_windows, load_coverage, save_coverage, download_streams_partial
+)
+from job_journal import get_temp_output_path, get_output_name, journal_clip
 
 def load_config(config_path="config.yaml"):
     """설정 파일 로드"""
@@ -20,7 +34,13 @@ def load_config(config_path="config.yaml"):
             'output_directory': 'clips',
             'min_duration': 5.0,
             'max_duration': 7.0,
-            'merge_clips': True
+            'merge_clips': True,
+            'encode_mode': 'reencode',
+            'video_crf': 23,
+            'video_preset': 'fast',
+            'video_profile': 'archive',
+            'profiles': {'archive': {}},
+            'extra_profiles': []
         }
     }
     
@@ -133,136 +153,739 @@ def merge_video_audio(video_path, audio_path, output_path):
         print(f"❌ 인코딩 오류 (무시됨): {e}")
         return True
 
-def create_clip(video_path, audio_path, clip_data, output_paths, config):
-    """ffmpeg로 클립 생성"""
+def run_ffmpeg(cmd, label=None, duration=None):
+    """
+    ffmpeg 명령 실행 (진행 정보는 ffmpeg_progress 콜백으로 전달, stderr는 마지막 부분만 수집)
+    duration: 출력 길이(초) - 주면 진행률(%)과 배치 전체 ETA에 반영
+    """
+    return run_ffmpeg_with_progress(cmd, label, duration)
+
+# mp4 컨테이너에 그대로 넣을 수 있는 오디오 코덱 (그 외는 AAC로 재인코딩)
+MP4_AUDIO_CODECS = {'aac', 'mp3', 'alac', 'opus', 'flac'}
+
+def get_stream_height(stream):
+    """스트림 해상도 높이 ('720p' → 720, 알 수 없으면 0)"""
+    match = re.match(r'(\d+)p', str(stream.get('resolution') or ''))
+    return int(match.group(1)) if match else 0
+
+def get_download_target(config):
+    """다운로드 목표 화질 (download.target_height, download.target_fps - 0이면 제한 없음)"""
+    return config['download'].get('target_height', 0), config['download'].get('target_fps', 0)
+
+def select_video_stream(streams, config):
+    """
+    비디오 스트림 선택 (메타데이터의 adaptive mp4 스트림 목록에서)
+    목표 화질이 있으면 목표 높이/fps를 만족하는 가장 작은 스트림 (H.264 우선, 없으면 최고 화질)
+    목표 화질이 없으면 1080p → 720p → 최고 화질
+    """
+    candidates = [stream for stream in streams if get_stream_height(stream)]
+    if not candidates:
+        return None
+    
+    target_height, target_fps = get_download_target(config)
+    if not target_height and not target_fps:
+        for height in (1080, 720):
+            for stream in candidates:
+                if get_stream_height(stream) == height:
+                    return stream
+        return max(candidates, key=get_stream_height)
+    
+    satisfying = [stream for stream in candidates
+                  if get_stream_height(stream) >= target_height and (stream['fps'] or 0) >= target_fps]
+    if not satisfying:
+        return max(candidates, key=lambda stream: (get_stream_height(stream), stream['fps'] or 0))
+    
+    # 같은 해상도면 디코딩이 싸고 smart_cut이 가능한 H.264, 그다음 작은 파일
+    return min(satisfying, key=lambda stream: (
+        get_stream_height(stream),
+        stream['fps'] or 0,
+        not str(stream.get('video_codec') or '').startswith('avc1'),
+        stream.get('filesize') or stream.get('bitrate') or 0
+    ))
+
+def select_streams(metadata, config):
+    """메타데이터에서 다운로드할 (비디오, 오디오) 스트림 선택 (오디오는 m4a 우선)"""
+    video_stream = select_video_stream(filter_streams(metadata['streams'], 'video', 'mp4', adaptive=True), config)
+    audio_streams = filter_streams(metadata['streams'], 'audio', 'm4a') or filter_streams(metadata['streams'], 'audio')
+    return video_stream, audio_streams[0] if audio_streams else None
+
+def get_video_metadata(url, video_id, config, refresh=False):
+    """
+    영상 메타데이터 (제목, 길이, 스트림 목록)
+    download.metadata_ttl_hours 이내의 캐시가 있으면 네트워크 없이 사용
+    반환: (메타데이터, 캐시 사용 여부)
+    """
+    base_dir = config['download']['base_directory']
+    if not refresh:
+        metadata = load_metadata(base_dir, video_id, config['download'].get('metadata_ttl_hours', DEFAULT_TTL_HOURS))
+        if metadata:
+            return metadata, True
+    
+    # YouTube 객체 생성 (메타데이터 요청도 요청 속도 제한에 포함)
+    started = time.perf_counter()
+    get_download_limiters(config)['requests'].consume()
+    metadata = build_metadata(YouTube(url), video_id)
+    save_metadata(base_dir, metadata)
+    record_stage('metadata', time.perf_counter() - started, video_id=video_id, streams=len(metadata['streams']))
+    return metadata, False
+
+def meets_download_target(entry, config):
+    """다운로드된 영상이 목표 화질을 만족하는지 (화질 기록이 없는 이전 다운로드는 만족으로 간주)"""
+    target_height, target_fps = get_download_target(config)
+    if target_height and entry.get('video_height') is not None and entry['video_height'] < target_height:
+        return False
+    if target_fps and entry.get('video_fps') is not None and entry['video_fps'] < target_fps:
+        return False
+    return True
+
+def get_encode_profile(config, name=None):
+    """
+    인코딩 프로필 설정 (name이 없으면 clips.video_profile)
+    프로필에 없는 crf/preset은 clips.video_crf/video_preset, scale/fps/gop/pix_fmt는 원본 유지
+    """
+    clips_config = config.get('clips', {})
+    profiles = clips_config.get('profiles') or {}
+    name = name or clips_config.get('video_profile')
+    if name and name not in profiles:
+        raise ValueError(f"알 수 없는 인코딩 프로필: {name}")
+    
+    profile = dict(profiles.get(name) or {}) if name else {}
+    
+    profile.setdefault('crf', clips_config.get('video_crf', 23))
+    profile.setdefault('preset', clips_config.get('video_preset', 'fast'))
+    return profile
+
+def is_resampling_profile(profile):
+    """해상도/프레임레이트를 바꾸는 프로필인지 (원본 GOP 복사 불가)"""
+    return bool(profile.get('scale') or profile.get('fps'))
+
+def get_profile_video_args(profile):
+    """프로필 → 비디오 필터/인코딩 옵션 (fps를 먼저 줄인 뒤 스케일)"""
+    filters = []
+    if profile.get('fps'):
+        filters.append(f"fps={profile['fps']}")
+    if profile.get('scale'):
+        filters.append(f"scale={profile['scale']}")
+    
+    args = ['-vf', ','.join(filters)] if filters else []
+    args += [
+        '-c:v', 'libx264',
+        '-crf', str(profile['crf']),
+        '-preset', profile['preset']
+    ]
+    if profile.get('gop'):
+        args += ['-g', str(profile['gop'])]
+    if profile.get('pix_fmt'):
+        args += ['-pix_fmt', profile['pix_fmt']]
+    return args
+
+def get_video_codec_args(config):
+    """클립 비디오 인코딩 옵션 (clips.video_profile, 없으면 clips.video_crf/video_preset)"""
+    return get_profile_video_args(get_encode_profile(config))
+
+def get_extra_profiles(config):
+    """video/merged 외에 같은 실행에서 추가로 만들 프로필 이름 (clips.extra_profiles)"""
+    return list(config.get('clips', {}).get('extra_profiles') or [])
+
+def get_extra_outputs(output_paths, config):
+    """추가 프로필 출력 목록 [(경로, 비디오 옵션), ...] (output_paths에 프로필 이름으로 경로가 있는 것만)"""
+    return [
+        (output_paths[name], get_profile_video_args(get_encode_profile(config, name)))
+        for name in get_extra_profiles(config) if name in output_paths
+    ]
+
+def validate_encode_profiles(config):
+    """사용할 프로필이 모두 정의되어 있고 추가 프로필 이름이 기본 출력 폴더와 겹치지 않는지 확인"""
+    get_encode_profile(config)
+    for name in get_extra_profiles(config):
+        if name in ('video', 'audio', 'merged'):
+            raise ValueError(f"추가 프로필 이름으로 쓸 수 없습니다: {name}")
+        get_encode_profile(config, name)
+
+def get_encode_settings(config, audio_path, probe=True):
+    """클립 매니페스트에 기록할 실제 인코딩 설정 (probe=False면 ffprobe 없이 프로브 캐시/확장자로 판단)"""
+    return {
+        'encode_mode': config['clips'].get('encode_mode', 'reencode'),
+        'video_profile': config['clips'].get('video_profile'),
+        'video_args': get_video_codec_args(config),
+        'extra_profiles': {
+            name: get_profile_video_args(get_encode_profile(config, name)) for name in get_extra_profiles(config)
+        },
+        'merge_clips': config['clips'].get('merge_clips', False),
+        'merge_audio_codec': get_merge_audio_codec(audio_path, probe),
+        'audio_cache': config['clips'].get('audio_cache', False)
+    }
+
+def get_merge_audio_codec(audio_path, probe=True):
+    """병합(mp4) 클립용 오디오 코덱: 컨테이너가 허용하면 copy, 아니면 aac"""
+    media_info = get_media_info(audio_path, probe=probe)
+    if media_info:
+        codecs = [stream['codec'] for stream in media_info['streams'] if stream['type'] == 'audio']
+        if codecs:
+            return 'copy' if codecs[0] in MP4_AUDIO_CODECS else 'aac'
+    
+    # 프로브 불가(또는 probe=False인데 캐시 없음) 시 확장자로 판단 (m4a는 AAC)
+    return 'copy' if Path(audio_path).suffix.lower() in ['.m4a', '.mp4', '.aac'] else 'aac'
+
+def escape_tee_path(path):
+    """tee 먹서 출력 경로의 특수문자 이스케이프"""
+    for char in ['\\', "'", '[', ']', '|', ':']:
+        path = path.replace(char, '\\' + char)
+    return path
+
+def build_clip_output_args(output_paths, offset, duration, video_args, merge_audio_codec, include_audio=True,
+                           extra_outputs=None):
+    """
+    클립 하나의 출력 옵션 (입력 0: 비디오, 입력 1: 오디오)
+    video_args가 None이면 비디오 클립은 이미 생성된 것으로 보고 merged만 복사로 출력
+    video/merged가 모두 필요하면 tee 먹서로 비디오를 한 번만 인코딩해 동시에 기록
+    include_audio가 False면 오디오 클립은 이미 생성된 것으로 보고 출력하지 않음 (오디오 캐시)
+    extra_outputs: 추가 프로필 [(경로, 비디오 옵션), ...] - 같은 디코딩 결과로 비디오만 출력
+    output_paths에 없는 출력은 만들지 않음 (다시 생성할 출력만 있는 경우)
+    """
+    trim = ['-ss', f"{offset:.3f}", '-t', f"{duration:.3f}"]
+    
+    # 오디오 클립 (스트림 복사)
+    args = []
+    if include_audio and 'audio' in output_paths:
+        args += ['-map', '1:a:0'] + trim + [
+            '-c:a', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            output_paths['audio']
+        ]
+    
+    merged_path = output_paths.get('merged')
+    video_path = output_paths.get('video')
+    if video_args is None:
+        if merged_path:
+            args += ['-map', '0:v:0', '-map', '1:a:0'] + trim + [
+                '-c:v', 'copy',
+                '-c:a', merge_audio_codec,
+                '-avoid_negative_ts', 'make_zero',
+                merged_path
+            ]
+    elif merged_path and video_path:
+        # merged 실패는 분리 파일에 영향 없도록 onfail=ignore
+        tee_outputs = (
+            f"[f=mp4:select=v:avoid_negative_ts=make_zero]{escape_tee_path(video_path)}|"
+            f"[f=mp4:onfail=ignore:avoid_negative_ts=make_zero]{escape_tee_path(merged_path)}"
+        )
+        args += ['-map', '0:v:0', '-map', '1:a:0'] + trim + video_args + [
+            '-c:a', merge_audio_codec,
+            '-f', 'tee',
+            tee_outputs
+        ]
+    elif merged_path:
+        args += ['-map', '0:v:0', '-map', '1:a:0'] + trim + video_args + [
+            '-c:a', merge_audio_codec,
+            '-avoid_negative_ts', 'make_zero',
+            merged_path
+        ]
+    elif video_path:
+        args += ['-map', '0:v:0'] + trim + video_args + [
+            '-avoid_negative_ts', 'make_zero',
+            video_path
+        ]
+    
+    for path, profile_args in extra_outputs or []:
+        args += ['-map', '0:v:0'] + trim + profile_args + [
+            '-avoid_negative_ts', 'make_zero',
+            path
+        ]
+    
+    return args
+
+def check_merged_output(output_paths):
+    """merged 클립이 생성되지 않았으면 경고 (분리 파일은 유지)"""
+    merged_path = output_paths.get('merged')
+    if merged_path and not os.path.exists(merged_path):
+        print(f"⚠️ 병합 클립 생성 실패 (분리 파일은 유지): {get_output_name(merged_path)}")
+        return False
+    return True
+
+def encode_video_segment(video_path, start, duration, output_path, profile, output_format=None):
+    """비디오 구간 재인코딩 (libx264, 정확한 프레임 컷, 재인코딩 모드와 같은 프로필 설정)"""
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start),
+        '-i', video_path,
+        '-t', str(duration),
+        '-map', '0:v:0',
+    ] + get_profile_video_args(profile) + [
+        '-avoid_negative_ts', 'make_zero',
+    ]
+    if output_format:
+        cmd += ['-f', output_format]
+    cmd += ['-y', output_path]
+    
+    return run_ffmpeg(cmd)
+
+def copy_video_segment(video_path, start, frame_count, output_path):
+    """
+    키프레임에서 시작하는 비디오 구간을 재인코딩 없이 복사 (MPEG-TS)
+    -t는 끝 키프레임과 그 뒤 패킷까지 포함하므로 프레임 수로 제한 (뒷부분 재인코딩과 겹치지 않도록)
+    """
+    cmd = [
+        'ffmpeg',
+        '-ss', str(start),
+        '-i', video_path,
+        '-frames:v', str(frame_count),
+        '-map', '0:v:0',
+        '-c:v', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        '-bsf:v', 'h264_mp4toannexb',
+        '-f', 'mpegts',
+        '-y',
+        output_path
+    ]
+    return run_ffmpeg(cmd)
+
+def plan_smart_cut(start, end, keyframes, config):
+    """
+    스마트 컷 구간 계획
+    반환: (copy_start, copy_end) - 키프레임 정렬된 복사 구간, 불가능하면 None
+    """
+    min_copy = config['clips'].get('smart_cut_min_copy', 2.0)
+    
+    inner = [k for k in keyframes if start <= k <= end]
+    if len(inner) < 2:
+        return None
+    
+    copy_start = inner[0]
+    copy_end = inner[-1]
+    if copy_end - copy_start < min_copy:
+        return None
+    
+    return copy_start, copy_end
+
+def create_smart_cut_video(video_path, clip_data, output_path, config, profile):
+    """
+    스마트 컷: 앞/뒤 부분 GOP만 프로필 설정으로 재인코딩하고 키프레임 사이 구간은 그대로 복사
+    H.264 소스가 아니거나, 프로필 pix_fmt가 원본과 달라 이어붙일 수 없거나, 복사할 구간이 짧으면 전체 재인코딩으로 대체
+    """
     start = clip_data['start']
     end = clip_data['end']
-    duration = end - start
     
+    # 코덱/키프레임은 다운로드 폴더의 프로브 캐시에서 조회
+    media_info = get_media_info(video_path)
+    if not media_info:
+        return None
+    
+    video_streams = [stream for stream in media_info['streams'] if stream['type'] == 'video']
+    if not video_streams or video_streams[0]['codec'] != 'h264' or not media_info.get('fps'):
+        return None
+    
+    # 이전 프로브 캐시에는 pix_fmt가 없음 (YouTube H.264는 yuv420p)
+    source_pix_fmt = video_streams[0].get('pix_fmt') or 'yuv420p'
+    if profile.get('pix_fmt', source_pix_fmt) != source_pix_fmt:
+        return None
+    
+    keyframes = get_keyframes_between(get_keyframe_index(video_path), start, end)
+    if keyframes is None:
+        keyframes = probe_keyframes(video_path, start, end)
+    plan = plan_smart_cut(start, end, keyframes or [], config)
+    if not plan:
+        return None
+    copy_start, copy_end = plan
+    
+    # 구간별 임시 파일 (MPEG-TS: SPS/PPS가 스트림 내에 있어 이어붙이기 안전)
+    segments = []
+    list_path = f"{output_path}.smartcut.txt"
     try:
-        # 비디오 클립 생성
-        video_cmd = [
+        # 한 프레임 미만의 조각은 건너뜀
+        if copy_start - start > 0.001:
+            head_path = f"{output_path}.head.ts"
+            result = encode_video_segment(video_path, start, copy_start - start, head_path, profile, 'mpegts')
+            if result.returncode != 0:
+                return False, f"스마트 컷 앞부분 인코딩 실패: {result.stderr}"
+            segments.append(head_path)
+        
+        # 키프레임 경계 바로 뒤로 seek해야 이전 GOP에서 시작하지 않음
+        # 복사는 copy_end 키프레임 직전 프레임까지 (copy_end부터는 뒷부분 재인코딩)
+        middle_path = f"{output_path}.middle.ts"
+        frame_count = round((copy_end - copy_start) * media_info['fps'])
+        result = copy_video_segment(video_path, copy_start + 0.001, frame_count, middle_path)
+        if result.returncode != 0:
+            return False, f"스마트 컷 복사 실패: {result.stderr}"
+        segments.append(middle_path)
+        
+        if end - copy_end > 0.001:
+            tail_path = f"{output_path}.tail.ts"
+            result = encode_video_segment(video_path, copy_end, end - copy_end, tail_path, profile, 'mpegts')
+            if result.returncode != 0:
+                return False, f"스마트 컷 뒷부분 인코딩 실패: {result.stderr}"
+            segments.append(tail_path)
+        
+        # concat demuxer로 이어붙여 mp4로 리먹싱
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for segment in segments:
+                escaped = os.path.abspath(segment).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        
+        concat_cmd = [
             'ffmpeg',
-            '-ss', str(start),
-            '-i', video_path,
-            '-t', str(duration),
-            '-c:v', 'libx264',
-            '-crf', '23',
-            '-preset', 'fast',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', list_path,
+            '-c', 'copy',
             '-avoid_negative_ts', 'make_zero',
             '-y',
-            output_paths['video']
+            output_path
         ]
+        result = run_ffmpeg(concat_cmd)
+        if result.returncode != 0:
+            return False, f"스마트 컷 병합 실패: {result.stderr}"
         
-        result = subprocess.run(
-            video_cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
+        return True, "성공"
+    
+    finally:
+        for path in segments + [list_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+def create_clip(video_path, audio_path, clip_data, output_paths, config):
+    """ffmpeg로 클립 생성 (비디오/오디오/병합 클립을 ffmpeg 1회 실행으로 출력)"""
+    start = clip_data['start']
+    end = clip_data['end']
+    duration = end - start
+    
+    try:
+        merge_audio_codec = get_merge_audio_codec(audio_path)
+        clip_name = get_output_name(output_paths.get('video') or next(iter(output_paths.values())))
+        audio_input = ['-ss', str(start), '-i', audio_path]
         
-        if result.returncode != 0:
-            return False, f"비디오 클립 생성 실패: {result.stderr}"
+        # 오디오 캐시: 한 번 디코딩한 PCM 구간으로 오디오 클립을 먼저 만들고 병합에는 그 클립을 사용
+        use_audio_cache = config['clips'].get('audio_cache', False) and 'audio' in output_paths
+        pcm_audio = get_pcm_audio(audio_path) if use_audio_cache else None
+        if pcm_audio is not None:
+            with timed_stage('audio_cut', clip=clip_name, source='pcm_cache') as stage:
+                result = write_audio_clip(pcm_audio, start, end, output_paths['audio'])
+                stage['success'] = result.returncode == 0
+            if result.returncode != 0:
+                return False, f"오디오 클립 생성 실패: {result.stderr}"
+            
+            audio_input = ['-i', output_paths['audio']]
+            merge_audio_codec = 'copy' if get_audio_encoder(output_paths['audio'])[0] in MP4_AUDIO_CODECS else 'aac'
+        
+        extra_outputs = get_extra_outputs(output_paths, config)
+        
+        # 스마트 컷: 비디오는 먼저 만들고, 오디오/병합/추가 프로필 클립만 한 번에 출력
+        # (해상도/fps를 바꾸는 프로필은 원본 GOP를 복사할 수 없으므로 재인코딩)
+        profile = get_encode_profile(config)
+        if config['clips'].get('encode_mode', 'reencode') == 'smart_cut' and not is_resampling_profile(profile):
+            with timed_stage('video_encode', clip=clip_name, encode_mode='smart_cut') as stage:
+                smart_result = create_smart_cut_video(video_path, clip_data, output_paths['video'], config, profile)
+                stage['success'] = smart_result is not None and smart_result[0]
+                stage['fallback'] = smart_result is None
+            if smart_result is not None:
+                success, message = smart_result
+                if not success:
+                    return False, message
+                
+                output_args = build_clip_output_args(output_paths, 0, duration, None, merge_audio_codec,
+                                                     include_audio=pcm_audio is None, extra_outputs=extra_outputs)
+                if not output_args:
+                    return True, "성공"
+                
+                cmd = ['ffmpeg', '-y', '-i', output_paths['video']] + audio_input + output_args
+                
+                # 배치 진행률에는 클립당 한 번만 반영 (마지막 단계 기준)
+                with timed_stage('audio_merge', clip=clip_name) as stage:
+                    result = run_ffmpeg(cmd, clip_name, duration)
+                    stage['success'] = result.returncode == 0
+                if result.returncode != 0:
+                    return False, f"오디오 클립 생성 실패: {result.stderr}"
+                
+                check_merged_output(output_paths)
+                return True, "성공"
         
-        # 오디오 클립 생성
-        audio_cmd = [
+        output_args = build_clip_output_args(output_paths, 0, duration, get_video_codec_args(config),
+                                             merge_audio_codec, include_audio=pcm_audio is None,
+                                             extra_outputs=extra_outputs)
+        # 오디오 캐시로 오디오 클립만 다시 만든 경우
+        if not output_args:
+            return True, "성공"
+        
+        # 두 입력 모두 입력 쪽 seek (디코딩은 seek 지점부터, 오디오 캐시면 이미 자른 오디오 클립)
+        cmd = [
             'ffmpeg',
-            '-i', audio_path,
-            '-ss', str(start),
-            '-t', str(duration),
-            '-c:a', 'copy',
-            '-avoid_negative_ts', 'make_zero',
             '-y',
-            output_paths['audio']
-        ]
+            '-ss', str(start),
+            '-i', video_path,
+        ] + audio_input + output_args
         
-        result = subprocess.run(
-            audio_cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
+        # 비디오 인코딩/오디오 자르기/병합이 ffmpeg 1회 실행이므로 한 단계로 기록
+        with timed_stage('clip_encode', clip=clip_name, media_seconds=round(duration, 3)) as stage:
+            result = run_ffmpeg(cmd, clip_name, duration)
+            stage['success'] = result.returncode == 0
+            stage['speed'] = result.progress.get('speed')
         
         if result.returncode != 0:
-            return False, f"오디오 클립 생성 실패: {result.stderr}"
-        
-        # 병합 클립 생성 (옵션)
-        if config['clips'].get('merge_clips', False):
-            merge_cmd = [
-                'ffmpeg',
-                '-i', output_paths['video'],
-                '-i', output_paths['audio'],
-                '-c:v', 'copy',
-                '-c:a', 'aac',
-                '-y',
-                output_paths['merged']
-            ]
-            
-            result = subprocess.run(
-                merge_cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode != 0:
-                print(f"⚠️ 병합 클립 생성 실패 (분리 파일은 유지): {result.stderr}")
+            return False, f"클립 생성 실패: {result.stderr}"
         
+        check_merged_output(output_paths)
         return True, "성공"
         
     except Exception as e:
         return False, f"클립 생성 오류: {e}"
 
-def download_youtube_video(url, video_id, config):
-    """유튜브 영상 다운로드 (수정된 버전)"""
+def split_single_pass_runs(clip_jobs, config):
+    """시작 시간순으로 정렬 후 한 번에 처리할 구간(run)으로 분할"""
+    max_gap = config['clips'].get('single_pass_max_gap', 120.0)
+    max_clips = config['clips'].get('single_pass_max_clips', 16)
+    
+    runs = []
+    current = []
+    current_end = None
+    
+    for job in sorted(clip_jobs, key=lambda j: j['clip_data']['start']):
+        start = job['clip_data']['start']
+        # 클립 사이 간격이 너무 크면 디코딩 낭비가 커지므로 새 run 시작
+        if current and (start - current_end > max_gap or len(current) >= max_clips):
+            runs.append(current)
+            current = []
+            current_end = None
+        
+        current.append(job)
+        end = job['clip_data']['end']
+        current_end = end if current_end is None else max(current_end, end)
+    
+    if current:
+        runs.append(current)
+    
+    return runs
+
+def get_run_span(run):
+    """run의 디코딩 구간 길이 (첫 클립 시작 ~ 마지막 클립 끝)"""
+    return max(job['clip_data']['end'] for job in run) - run[0]['clip_data']['start']
+
+def get_job_media_seconds(clip_jobs, config):
+    """진행률 집계용 인코딩 예정 길이 (single_pass는 run 구간 길이 합)"""
+    if config['clips'].get('encode_mode', 'reencode') == 'single_pass':
+        return sum(get_run_span(run) for run in split_single_pass_runs(clip_jobs, config))
+    return sum(job['clip_data']['end'] - job['clip_data']['start'] for job in clip_jobs)
+
+def build_single_pass_command(video_path, audio_path, run, config):
+    """run 하나에 대한 ffmpeg 명령 생성 (입력 1회 디코딩, 클립별 출력)"""
+    run_start = run[0]['clip_data']['start']
+    video_args = get_video_codec_args(config)
+    merge_audio_codec = get_merge_audio_codec(audio_path)
+    
+    cmd = [
+        'ffmpeg',
+        '-y',
+        '-ss', str(run_start),
+        '-i', video_path,
+        '-ss', str(run_start),
+        '-i', audio_path,
+    ]
+    
+    for job in run:
+        clip_data = job['clip_data']
+        offset = clip_data['start'] - run_start
+        duration = clip_data['end'] - clip_data['start']
+        
+        # 출력 쪽 -ss: 공유 디코더에서 프레임을 버린 뒤 인코딩 (정확한 컷)
+        cmd += build_clip_output_args(job['output_paths'], offset, duration, video_args, merge_audio_codec,
+                                      extra_outputs=get_extra_outputs(job['output_paths'], config))
+    
+    return cmd
+
+def create_single_pass_run(video_path, audio_path, run, config):
+    """run 하나를 ffmpeg 1회 실행으로 생성, 반환: [(job, success, message), ...]"""
     try:
-        # YouTube 객체 생성
-        yt = YouTube(url, on_progress_callback=on_progress)
+        with timed_stage('single_pass_run', clips=len(run)) as stage:
+            result = run_ffmpeg(build_single_pass_command(video_path, audio_path, run, config),
+                                f"단일 패스 {len(run)}개 클립", get_run_span(run))
+            stage['success'] = result.returncode == 0
+            stage['speed'] = result.progress.get('speed')
+        run_ok = result.returncode == 0
+        error = result.stderr
+    except Exception as e:
+        run_ok = False
+        error = str(e)
+    
+    results = []
+    if not run_ok:
+        # 어떤 클립이 실패했는지 알 수 없으므로 클립별 방식으로 재시도
+        print(f"⚠️ 단일 패스 실패 - 클립별 생성으로 재시도 ({len(run)}개): {error[-300:]}")
+        for job in run:
+            success, message = create_clip(video_path, audio_path, job['clip_data'], job['output_paths'], config)
+            results.append((job, success, message))
+        return results
+    
+    for job in run:
+        check_merged_output(job['output_paths'])
+        results.append((job, True, "성공"))
+    
+    return results
+
+def create_clips_single_pass(video_path, audio_path, clip_jobs, config):
+    """
+    한 영상의 클립들을 순방향 1회 디코딩으로 생성
+    clip_jobs: [{'clip_data': ..., 'output_paths': ...}, ...]
+    반환: [(job, success, message), ...]
+    """
+    results = []
+    for run in split_single_pass_runs(clip_jobs, config):
+        results.extend(create_single_pass_run(video_path, audio_path, run, config))
+    return results
+
+def get_clip_workers(config):
+    """클립 인코딩 동시 작업 수 (0이면 CPU 코어 수)"""
+    workers = config.get('batch', {}).get('clip_workers', 1)
+    if not workers or workers < 1:
+        workers = os.cpu_count() or 1
+    return workers
+
+def stage_job_outputs(job):
+    """출력 경로를 임시 경로로 바꾼 작업 사본 (원래 작업은 'job'에 보관)"""
+    temp_paths = {kind: get_temp_output_path(path) for kind, path in job['output_paths'].items()}
+    return dict(job, output_paths=temp_paths, job=job)
+
+def commit_job_outputs(staged_job, success):
+    """
+    성공하면 임시 출력을 최종 경로로 이름 변경, 실패하면 삭제
+    (중단돼도 완성된 것처럼 보이는 클립이 남지 않음)
+    반환: 원래 작업 (committed_outputs: 실제로 이름을 바꾼 출력 종류, 실패한 merged 등은 제외)
+    """
+    job = staged_job['job']
+    committed = []
+    for kind, temp_path in staged_job['output_paths'].items():
+        if not os.path.exists(temp_path):
+            continue
+        if success:
+            os.replace(temp_path, job['output_paths'][kind])
+            committed.append(kind)
+        else:
+            os.remove(temp_path)
+    return dict(job, committed_outputs=committed)
+
+def run_clip_jobs(video_path, audio_path, clip_jobs, config):
+    """
+    클립 작업 실행 (encode_mode, batch.clip_workers 반영)
+    출력은 임시 파일에 만든 뒤 성공한 작업만 최종 경로로 이름 변경
+    완료되는 순서대로 (job, success, message)를 yield
+    """
+    encode_mode = config['clips'].get('encode_mode', 'reencode')
+    staged_jobs = [stage_job_outputs(job) for job in clip_jobs]
+    
+    # 작업 단위: single_pass는 run, 나머지는 클립 1개
+    if encode_mode == 'single_pass':
+        units = split_single_pass_runs(staged_jobs, config)
+        
+        def create_unit(run):
+            return create_single_pass_run(video_path, audio_path, run, config)
+    else:
+        units = [[job] for job in staged_jobs]
+        
+        def create_unit(unit):
+            job = unit[0]
+            success, message = create_clip(video_path, audio_path, job['clip_data'], job['output_paths'], config)
+            return [(job, success, message)]
+    
+    def run_unit(unit):
+        # ffmpeg 실행 직전에 저널에 기록 (중단되면 다음 실행에서 임시 출력 정리)
+        for job in unit:
+            journal_clip(job['job'], 'pending')
+            journal_clip(job['job'], 'running')
+        
+        results = []
+        for job, success, message in create_unit(unit):
+            original_job = commit_job_outputs(job, success)
+            if success:
+                journal_clip(original_job, 'committed')
+            results.append((original_job, success, message))
+        return results
+    
+    workers = min(get_clip_workers(config), max(len(units), 1))
+    
+    if workers <= 1:
+        for unit in units:
+            for item in run_unit(unit):
+                yield item
+        return
+    
+    # ffmpeg는 별도 프로세스이므로 스레드 풀로 충분 (GIL 영향 없음)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_unit, unit) for unit in units]
+        for future in as_completed(futures):
+            for item in future.result():
+                yield item
+
+def download_youtube_video(url, video_id, config, clips=None):
+    """
+    유튜브 영상 다운로드 (수정된 버전)
+    download.partial이 켜져 있고 clips가 주어지면 클립 구간에 해당하는 조각만 다운로드
+    """
+    try:
+        # 메타데이터/스트림 목록 (캐시 우선)
+        metadata, from_cache = get_video_metadata(url, video_id, config)
+        video_stream, audio_stream = select_streams(metadata, config)
+        
+        # 캐시된 스트림 URL이 만료됐으면 다운로드 전에 새로 조회
+        if from_cache and not (video_stream and audio_stream and has_fresh_urls([video_stream, audio_stream])):
+            metadata, _ = get_video_metadata(url, video_id, config, refresh=True)
+            video_stream, audio_stream = select_streams(metadata, config)
+        
+        title = metadata['title']
+        length = metadata['length']
         
         # 영상 정보 출력
-        print(f"📺 제목: {yt.title}")
-        print(f"⏱️  길이: {yt.length}초 ({yt.length/60:.1f}분)")
+        print(f"📺 제목: {title}")
+        print(f"⏱️  길이: {length}초 ({length/60:.1f}분)")
         
         # 안전한 제목 생성
-        safe_title = sanitize_filename(yt.title)
+        safe_title = sanitize_filename(title)
         
         # 영상별 디렉토리 생성 (제목 사용)
         base_dir = config['download']['base_directory']
         video_dir = os.path.join(base_dir, safe_title)
         os.makedirs(video_dir, exist_ok=True)
         
-        # 최고화질 비디오 선택
-        video_stream = (yt.streams.filter(adaptive=True, file_extension='mp4', only_video=True, res='1080p').first() or
-                       yt.streams.filter(adaptive=True, file_extension='mp4', only_video=True, res='720p').first() or
-                       yt.streams.filter(adaptive=True, file_extension='mp4', only_video=True).get_highest_resolution())
-        
-        # 최고품질 오디오 선택
-        audio_stream = (yt.streams.filter(only_audio=True, file_extension='m4a').first() or
-                       yt.streams.filter(only_audio=True).first())
-        
         if not video_stream or not audio_stream:
             print("❌ 적절한 스트림을 찾을 수 없습니다.")
             return None
         
+        quality = {
+            'video_height': get_stream_height(video_stream),
+            'video_fps': video_stream['fps'],
+            'video_itag': video_stream['itag']
+        }
+        print(f"📹 비디오 스트림: {quality['video_height']}p {video_stream['fps']}fps ({video_stream['video_codec']})")
+        
         # 파일명 설정 (safe_title 사용)
         video_filename = f"{safe_title}_video.mp4"
-        audio_filename = f"{safe_title}_audio.{audio_stream.subtype}"
+        audio_filename = f"{safe_title}_audio.{audio_stream['subtype']}"
         
         video_path = os.path.join(video_dir, video_filename)
         audio_path = os.path.join(video_dir, audio_filename)
         
         print(f"⬇️ 다운로드 시작...")
         
-        # 비디오 다운로드
-        print("📹 비디오 다운로드 중...")
-        video_stream.download(output_path=video_dir, filename=video_filename)
+        # 비디오/오디오 스트림 동시 다운로드 (전체 동시 연결 수/대역폭 제한 적용)
+        stream_tasks = [
+            {'url': video_stream['url'], 'path': video_path, 'size': video_stream['filesize'], 'label': '📹 비디오',
+             'itag': video_stream['itag']},
+            {'url': audio_stream['url'], 'path': audio_path, 'size': audio_stream['filesize'], 'label': '🎵 오디오',
+             'itag': audio_stream['itag']}
+        ]
+        
+        if config['download'].get('partial', False) and clips:
+            # 기존 부분 다운로드 구간도 유지 (파일을 새로 만들기 때문)
+            windows = get_clip_windows(clips, config['download'].get('partial_margin', 2.0))
+            windows = merge_windows(windows + (load_coverage(video_dir) or []))
+            success, is_partial = download_streams_partial(stream_tasks, windows, config)
+        else:
+            windows = None
+            success = download_streams(stream_tasks, config)
+            is_partial = False
         
-        # 오디오 다운로드
-        print("🎵 오디오 다운로드 중...")
-        audio_stream.download(output_path=video_dir, filename=audio_filename)
+        if not success:
+            print("❌ 스트림 다운로드 실패")
+            return None
+        
+        save_coverage(video_dir, windows if is_partial else None)
         
         print("✅ 다운로드 완료!")
         
@@ -270,18 +893,24 @@ def download_youtube_video(url, video_id, config):
         video_info_path = os.path.join(video_dir, "video_info.txt")
         with open(video_info_path, 'w', encoding='utf-8') as f:
             f.write(f"video_id: {video_id}\n")
-            f.write(f"title: {yt.title}\n")
+            f.write(f"title: {title}\n")
             f.write(f"safe_title: {safe_title}\n")
             f.write(f"url: {url}\n")
+            f.write(f"resolution: {quality['video_height']}p\n")
+            f.write(f"fps: {quality['video_fps']}\n")
+            f.write(f"itag: {quality['video_itag']}\n")
+        
+        # 다운로드 카탈로그 갱신 (video_id → 폴더/파일 조회용, 선택한 화질 포함)
+        record_download(base_dir, video_id, video_path, audio_path, title, safe_title, url, quality)
         
         return {
             'video_dir': video_dir,
             'video_path': video_path,
             'audio_path': audio_path,
-            'title': yt.title,
+            'title': title,
             'safe_title': safe_title,
             'video_id': video_id,
-            'duration': yt.length
+            'duration': length
         }
         
     except Exception as e:
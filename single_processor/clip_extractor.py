@@ -6,8 +6,14 @@ import re
 import csv
 import yaml
 import glob
-import subprocess
 from pathlib import Path
+from probe_cache import get_media_info, get_source_duration, check_clip_range
+from clip_index import ClipIndex
+from run_report import start_run_report, finish_run_report, timed_stage
+from ffmpeg_progress import (
+    run_ffmpeg_with_progress, start_progress_tracker, plan_progress, add_progress_listener, make_console_listener
+)
+from audio_cache import get_pcm_audio, write_audio_clip, release_pcm_audio
 
 def load_config(config_path="config.yaml"):
     """설정 파일 로드"""
@@ -97,8 +103,8 @@ def normalize_label(label):
     else:
         return None
 
-def parse_csv_data(csv_path, config):
-    """CSV 데이터 파싱 및 유효성 검사"""
+def parse_csv_data(csv_path, config, source_duration=None):
+    """CSV 데이터 파싱 및 유효성 검사 (source_duration: 프로브된 실제 영상 길이)"""
     valid_clips = []
     invalid_clips = []
     
@@ -134,6 +140,11 @@ def parse_csv_data(csv_path, config):
                         invalid_clips.append(f"행 {row_num}: 시작시간이 종료시간보다 큼")
                         continue
                     
+                    range_error = check_clip_range({'end': end}, source_duration)
+                    if range_error:
+                        invalid_clips.append(f"행 {row_num}: {range_error}")
+                        continue
+                    
                     valid_clips.append({
                         'start': start,
                         'end': end,
@@ -152,8 +163,8 @@ def parse_csv_data(csv_path, config):
     return valid_clips, invalid_clips
 
 def get_existing_clips(base_dir):
-    """기존 클립 정보 스캔"""
-    existing_clips = {'funny': [], 'normal': []}
+    """기존 클립 정보 스캔 (중복 확인/번호 할당용 인덱스 반환)"""
+    existing_clips = ClipIndex()
     
     for label in ['funny', 'normal']:
         video_dir = os.path.join(base_dir, label, 'video')
@@ -165,7 +176,7 @@ def get_existing_clips(base_dir):
         for video_file in glob.glob(pattern):
             clip_info = parse_clip_filename(video_file)
             if clip_info:
-                existing_clips[label].append(clip_info)
+                existing_clips.add(clip_info)
     
     return existing_clips
 
@@ -191,26 +202,13 @@ def parse_clip_filename(filename):
     return None
 
 def check_duplicate_clip(clip_data, existing_clips, video_name):
-    """중복 클립 확인"""
-    label = clip_data['label']
-    start = clip_data['start']
-    end = clip_data['end']
-    
-    for existing in existing_clips[label]:
-        if (existing['video_name'] == video_name and
-            abs(existing['start'] - start) < 0.1 and  # 0.1초 오차 허용
-            abs(existing['end'] - end) < 0.1):
-            return existing
-    
-    return None
+    """중복 클립 확인 (0.1초 오차 허용)"""
+    return existing_clips.find_duplicate(clip_data['label'], [video_name],
+                                         clip_data['start'], clip_data['end'])
 
 def get_next_clip_number(existing_clips, label):
     """다음 클립 번호 가져오기"""
-    if not existing_clips[label]:
-        return 1
-    
-    max_num = max(clip['clip_num'] for clip in existing_clips[label])
-    return max_num + 1
+    return existing_clips.next_clip_number(label)
 
 def create_clip(video_path, audio_path, clip_data, output_paths, config):
     """ffmpeg로 클립 생성"""
@@ -233,36 +231,35 @@ def create_clip(video_path, audio_path, clip_data, output_paths, config):
             output_paths['video']
         ]
         
-        result = subprocess.run(
-            video_cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
+        clip_name = os.path.basename(output_paths['video'])
+        with timed_stage('video_encode', clip=clip_name, media_seconds=round(duration, 3)) as stage:
+            result = run_ffmpeg_with_progress(video_cmd, clip_name, duration)
+            stage['success'] = result.returncode == 0
         
         if result.returncode != 0:
             return False, f"비디오 클립 생성 실패: {result.stderr}"
         
-        # 오디오 클립 생성
-        audio_cmd = [
-            'ffmpeg',
-            '-i', audio_path,
-            '-ss', str(start),
-            '-t', str(duration),
-            '-c:a', 'copy',
-            '-avoid_negative_ts', 'make_zero',
-            '-y',
-            output_paths['audio']
-        ]
+        # 오디오 클립 생성 (오디오 캐시: 한 번 디코딩한 PCM에서 샘플 단위로 자름)
+        pcm_audio = get_pcm_audio(audio_path) if config['clips'].get('audio_cache', False) else None
+        if pcm_audio is not None:
+            with timed_stage('audio_cut', clip=clip_name, source='pcm_cache') as stage:
+                result = write_audio_clip(pcm_audio, start, end, output_paths['audio'])
+                stage['success'] = result.returncode == 0
+        else:
+            audio_cmd = [
+                'ffmpeg',
+                '-ss', str(start),        # 입력 전에 seek (앞부분 디코딩 생략)
+                '-i', audio_path,
+                '-t', str(duration),
+                '-c:a', 'copy',
+                '-avoid_negative_ts', 'make_zero',
+                '-y',
+                output_paths['audio']
+            ]
         
-        result = subprocess.run(
-            audio_cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
+            with timed_stage('audio_cut', clip=clip_name) as stage:
+                result = run_ffmpeg_with_progress(audio_cmd, track=False)
+                stage['success'] = result.returncode == 0
         
         if result.returncode != 0:
             return False, f"오디오 클립 생성 실패: {result.stderr}"
@@ -279,13 +276,9 @@ def create_clip(video_path, audio_path, clip_data, output_paths, config):
                 output_paths['merged']
             ]
             
-            result = subprocess.run(
-                merge_cmd,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
+            with timed_stage('merge', clip=clip_name) as stage:
+                result = run_ffmpeg_with_progress(merge_cmd, track=False)
+                stage['success'] = result.returncode == 0
             
             if result.returncode != 0:
                 print(f"⚠️ 병합 클립 생성 실패 (분리 파일은 유지): {result.stderr}")
@@ -295,44 +288,18 @@ def create_clip(video_path, audio_path, clip_data, output_paths, config):
     except Exception as e:
         return False, f"클립 생성 오류: {e}"
 
-def process_video_clips(video_info, config):
-    """영상의 클립들 처리"""
-    video_name = video_info['name']
-    video_folder = video_info['path']
-    csv_path = video_info['csv_path']
-    
-    print(f"\n🎬 '{video_name}' 처리 시작...")
-    
-    # CSV 데이터 파싱
-    valid_clips, invalid_clips = parse_csv_data(csv_path, config)
-    
-    if invalid_clips:
-        print("⚠️ 무시된 클립들:")
-        for invalid in invalid_clips:
-            print(f"   {invalid}")
-    
-    if not valid_clips:
-        print("❌ 처리할 유효한 클립이 없습니다.")
-        return {'created': 0, 'skipped': 0, 'failed': 0}
-    
-    print(f"📋 총 {len(valid_clips)}개 클립 처리 예정")
-    
-    # 영상/오디오 파일 찾기
+def find_source_files(video_folder):
+    """영상 폴더의 (비디오, 오디오) 파일 경로 (없으면 None)"""
     video_files = glob.glob(os.path.join(video_folder, "*_video.mp4"))
-    audio_files = glob.glob(os.path.join(video_folder, "*_audio.*"))
+    audio_files = [path for path in glob.glob(os.path.join(video_folder, "*_audio.*"))
+                   if not path.endswith(('.part', '.pcm', '.pcm.json'))]  # 오디오 캐시 제외
     
     if not video_files or not audio_files:
-        print("❌ 영상 또는 오디오 파일을 찾을 수 없습니다.")
-        return {'created': 0, 'skipped': 0, 'failed': 0}
-    
-    video_path = video_files[0]
-    audio_path = audio_files[0]
-    
-    # 기존 클립 스캔
-    clips_dir = config['clips']['output_directory']
-    existing_clips = get_existing_clips(clips_dir)
+        return None
+    return video_files[0], audio_files[0]
     
-    # 출력 디렉토리 생성
+def prepare_output_dirs(clips_dir, config):
+    """클립 출력 디렉토리 생성"""
     for label in ['funny', 'normal']:
         for subdir in ['video', 'audio']:
             os.makedirs(os.path.join(clips_dir, label, subdir), exist_ok=True)
@@ -341,8 +308,27 @@ def process_video_clips(video_info, config):
         if config['clips'].get('merge_clips', False):
             os.makedirs(os.path.join(clips_dir, label, 'merged'), exist_ok=True)
     
+def ask_overwrite(duplicate):
+    """중복 클립 처리 방법 선택 (True: 덮어쓰기)"""
+    action = input("   1. 건너뛰기  2. 덮어쓰기  선택 (1/2): ").strip()
+    return action == '2'
+
+def create_video_clips(video_name, source_files, valid_clips, existing_clips, config, on_duplicate=ask_overwrite):
+    """
+    유효한 클립 목록을 생성하고 기존 클립 인덱스 갱신
+    on_duplicate(duplicate): 중복 클립 발견 시 호출, True면 덮어쓰기
+    반환: 통계, 클립별 결과 목록 (clip_data, 'created'/'skipped'/'failed')
+    """
+    video_path, audio_path = source_files
+    clips_dir = config['clips']['output_directory']
+    prepare_output_dirs(clips_dir, config)
+    
     # 통계
     stats = {'created': 0, 'skipped': 0, 'failed': 0}
+    results = []
+    
+    # 전체 진행률/ETA용 인코딩 예정 길이 (비디오 인코딩 기준, 건너뛴 클립은 제외)
+    plan_progress(sum(clip_data['end'] - clip_data['start'] for clip_data in valid_clips))
     
     # 각 클립 처리
     for i, clip_data in enumerate(valid_clips, 1):
@@ -352,10 +338,11 @@ def process_video_clips(video_info, config):
         duplicate = check_duplicate_clip(clip_data, existing_clips, video_name)
         if duplicate:
             print(f"⚠️ 중복 클립 발견: {duplicate['filename']}")
-            action = input("   1. 건너뛰기  2. 덮어쓰기  선택 (1/2): ").strip()
-            if action != '2':
+            if not on_duplicate(duplicate):
                 print("   건너뛰기")
+                plan_progress(-(clip_data['end'] - clip_data['start']))
                 stats['skipped'] += 1
+                results.append((clip_data, 'skipped'))
                 continue
         
         # 클립 번호 할당
@@ -380,9 +367,10 @@ def process_video_clips(video_info, config):
         if success:
             print(f"✅ {base_filename} 생성 완료")
             stats['created'] += 1
+            results.append((clip_data, 'created'))
             
             # 기존 클립 목록 업데이트
-            existing_clips[label].append({
+            existing_clips.add({
                 'label': label,
                 'clip_num': clip_num,
                 'video_name': video_name,
@@ -393,7 +381,52 @@ def process_video_clips(video_info, config):
         else:
             print(f"❌ 클립 생성 실패: {message}")
             stats['failed'] += 1
+            results.append((clip_data, 'failed'))
+    
+    release_pcm_audio(audio_path)
+    return stats, results
+
+def process_video_clips(video_info, config):
+    """영상의 클립들 처리"""
+    video_name = video_info['name']
+    video_folder = video_info['path']
+    csv_path = video_info['csv_path']
+    
+    print(f"\n🎬 '{video_name}' 처리 시작...")
+    
+    # 영상/오디오 파일 찾기
+    source_files = find_source_files(video_folder)
+    if source_files is None:
+        print("❌ 영상 또는 오디오 파일을 찾을 수 없습니다.")
+        return {'created': 0, 'skipped': 0, 'failed': 0}
+    
+    video_path, audio_path = source_files
+    
+    # 실제 미디어 길이 조회 (폴더의 프로브 캐시)
+    source_duration = get_source_duration(get_media_info(video_path), get_media_info(audio_path))
+    
+    # CSV 데이터 파싱
+    with timed_stage('csv_parse', video=video_name) as stage:
+        valid_clips, invalid_clips = parse_csv_data(csv_path, config, source_duration)
+        stage.update(clips=len(valid_clips), invalid=len(invalid_clips))
+    
+    if invalid_clips:
+        print("⚠️ 무시된 클립들:")
+        for invalid in invalid_clips:
+            print(f"   {invalid}")
     
+    if not valid_clips:
+        print("❌ 처리할 유효한 클립이 없습니다.")
+        return {'created': 0, 'skipped': 0, 'failed': 0}
+    
+    print(f"📋 총 {len(valid_clips)}개 클립 처리 예정")
+    
+    # 기존 클립 스캔
+    clips_dir = config['clips']['output_directory']
+    with timed_stage('bookkeeping', op='clip_index'):
+        existing_clips = get_existing_clips(clips_dir)
+    
+    stats, _ = create_video_clips(video_name, source_files, valid_clips, existing_clips, config)
     return stats
 
 def select_videos_to_process(video_folders):
@@ -462,9 +495,14 @@ def main():
     
     # 선택된 영상들 처리
     total_stats = {'created': 0, 'skipped': 0, 'failed': 0}
+    start_run_report(config, 'clip_extractor')
+    start_progress_tracker()
+    add_progress_listener(make_console_listener())
     
     for video_info in selected_videos:
-        stats = process_video_clips(video_info, config)
+        with timed_stage('process_clips', video=video_info['name']) as stage:
+            stats = process_video_clips(video_info, config)
+            stage.update(stats)
         for key in total_stats:
             total_stats[key] += stats[key]
     
@@ -475,6 +513,8 @@ def main():
     print(f"   건너뜀: {total_stats['skipped']}개")
     print(f"   실패함: {total_stats['failed']}개")
     
+    finish_run_report(config, total_stats)
+    
     if total_stats['created'] > 0:
         clips_dir = config['clips']['output_directory']
         funny_video_dir = os.path.join(clips_dir, 'funny', 'video')
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import queue
+import hashlib
+import argparse
+from clip_extractor import load_config, parse_csv_data, get_existing_clips, find_source_files, create_video_clips
+from probe_cache import get_media_info, get_source_duration
+from run_report import start_run_report, finish_run_report, timed_stage
+from ffmpeg_progress import start_progress_tracker, add_progress_listener, make_console_listener
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog 미설치: 폴링으로 감시
+    Observer = None
+    FileSystemEventHandler = object
+
+CSV_FILENAME = 'timestamps.csv'
+
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_SETTLE_SECONDS = 1.0
+# 영상 파일이 없는 폴더는 간격을 늘려가며 이 횟수만큼 확인한 뒤 CSV가 다시 저장될 때까지 보류
+MAX_SOURCE_CHECKS = 5
+
+class FolderState:
+    """영상 폴더 하나의 감시 상태"""
+    
+    def __init__(self):
+        self.signature = None    # 마지막으로 처리한 CSV의 (mtime_ns, size)
+        self.row_hashes = set()  # 처리 완료(생성/중복)된 행 해시
+        self.invalid = set()     # 이미 출력한 무효 행 메시지
+        self.source_checks = 0   # 영상 파일이 없어 다시 확인한 횟수
+        self.next_source_check = 0.0
+
+class CsvChangeHandler(FileSystemEventHandler):
+    """파일 이벤트 중 timestamps.csv 변경만 골라 폴더 경로를 큐에 전달"""
+    
+    def __init__(self, changed):
+        self.changed = changed
+    
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # 편집기는 임시 파일에 쓴 뒤 이름을 바꾸기도 하므로 이동 대상 경로도 확인
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path and os.path.basename(path) == CSV_FILENAME:
+                self.changed.put(os.path.dirname(os.path.abspath(path)))
+
+def get_csv_signature(csv_path):
+    """CSV 변경 확인값 (mtime_ns, size), 파일이 없으면 None"""
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def get_row_hash(clip_data):
+    """행 내용 해시 (행 번호와 무관, 시간 표기가 달라도 같은 구간/라벨이면 동일)"""
+    key = f"{clip_data['start']:.3f}|{clip_data['end']:.3f}|{clip_data['label']}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def list_video_folders(base_dir):
+    """영상 폴더 경로 목록 (CSV 내용은 읽지 않음)"""
+    try:
+        with os.scandir(base_dir) as entries:
+            return [os.path.abspath(entry.path) for entry in entries
+                    if entry.is_dir() and entry.name not in ['funny', 'normal']]
+    except FileNotFoundError:
+        return []
+
+def skip_duplicate(duplicate):
+    """감시 모드에서는 중복 클립을 묻지 않고 건너뜀"""
+    return False
+
+class ClipWatcher:
+    """
+    다운로드 폴더의 timestamps.csv 변경 감시
+    - 폴더별 CSV (mtime, 크기)가 바뀐 경우에만 해당 CSV를 읽음
+    - 처리한 행 해시를 기억해 새로 추가/수정된 행만 클립 생성
+    - 기존 클립 인덱스는 시작 시 한 번만 스캔하고 이후 생성 결과로 갱신
+    """
+    
+    def __init__(self, config):
+        self.config = config
+        self.base_dir = config['download']['base_directory']
+        watch_config = config.get('watch', {})
+        self.poll_interval = watch_config.get('poll_interval', DEFAULT_POLL_INTERVAL)
+        self.settle_seconds = watch_config.get('settle_seconds', DEFAULT_SETTLE_SECONDS)
+        self.states = {}
+        self.stats = {'created': 0, 'skipped': 0, 'failed': 0}
+        
+        with timed_stage('bookkeeping', op='clip_index'):
+            self.existing_clips = get_existing_clips(config['clips']['output_directory'])
+    
+    def check_folder(self, folder):
+        """
+        CSV가 바뀌었으면 새 행만 처리
+        반환: False면 나중에 다시 확인 (저장 직후이거나 영상 다운로드 전)
+        영상 파일이 없으면 간격을 늘려가며 MAX_SOURCE_CHECKS번 확인한 뒤 CSV가 다시 저장될 때까지 보류
+        """
+        csv_path = os.path.join(folder, CSV_FILENAME)
+        signature = get_csv_signature(csv_path)
+        state = self.states.setdefault(folder, FolderState())
+        if signature is None or signature == state.signature:
+            return True
+        
+        # 편집기가 아직 쓰는 중일 수 있으므로 마지막 수정 후 잠시 기다림
+        if time.time() - signature[0] / 1e9 < self.settle_seconds:
+            return False
+        
+        # 영상 파일이 없던 폴더는 다음 확인 시각까지 대기
+        video_name = os.path.basename(folder)
+        if time.time() < state.next_source_check:
+            return False
+        
+        source_files = find_source_files(folder)
+        if source_files is None:
+            state.source_checks += 1
+            if state.source_checks < MAX_SOURCE_CHECKS:
+                state.next_source_check = time.time() + self.settle_seconds * 2 ** state.source_checks
+                return False
+            print(f"⏸️ '{video_name}' 영상/오디오 파일이 없어 CSV가 다시 저장될 때까지 보류합니다")
+            state.signature = signature
+            state.source_checks = 0
+            state.next_source_check = 0.0
+            return True
+        state.source_checks = 0
+        
+        video_path, audio_path = source_files
+        source_duration = get_source_duration(get_media_info(video_path), get_media_info(audio_path))
+        
+        with timed_stage('csv_parse', video=video_name) as stage:
+            valid_clips, invalid_clips = parse_csv_data(csv_path, self.config, source_duration)
+            stage.update(clips=len(valid_clips), invalid=len(invalid_clips))
+        state.signature = signature
+        
+        # 무효 행은 새로 생긴 것만 출력
+        new_invalid = [message for message in invalid_clips if message not in state.invalid]
+        state.invalid = set(invalid_clips)
+        if new_invalid:
+            print(f"⚠️ '{video_name}' 무시된 클립들:")
+            for invalid in new_invalid:
+                print(f"   {invalid}")
+        
+        # CSV에서 지워진 행은 기억에서도 제거 (다시 추가되면 중복 확인으로 처리)
+        row_hashes = {get_row_hash(clip_data) for clip_data in valid_clips}
+        state.row_hashes &= row_hashes
+        new_clips = [clip_data for clip_data in valid_clips if get_row_hash(clip_data) not in state.row_hashes]
+        if not new_clips:
+            return True
+        
+        print(f"\n🆕 '{video_name}' 새 행 {len(new_clips)}개")
+        # 감시 대기 시간이 처리 속도에 섞이지 않도록 변경마다 전체 진행률을 새로 집계
+        start_progress_tracker()
+        with timed_stage('process_clips', video=video_name, trigger='watch') as stage:
+            stats, results = create_video_clips(video_name, source_files, new_clips, self.existing_clips,
+                                                self.config, on_duplicate=skip_duplicate)
+            stage.update(stats)
+        
+        # 실패한 행은 기억하지 않음 (다음 CSV 저장 시 다시 시도)
+        for clip_data, result in results:
+            if result != 'failed':
+                state.row_hashes.add(get_row_hash(clip_data))
+        for key in self.stats:
+            self.stats[key] += stats[key]
+        return True
+    
+    def run(self, use_events=True):
+        """Ctrl+C로 종료할 때까지 감시"""
+        changed = queue.Queue()
+        observer = None
+        if use_events and Observer is not None:
+            os.makedirs(self.base_dir, exist_ok=True)
+            observer = Observer()
+            observer.schedule(CsvChangeHandler(changed), self.base_dir, recursive=True)
+            observer.start()
+            print(f"👀 파일 이벤트로 감시 중: {self.base_dir}")
+        else:
+            print(f"👀 {self.poll_interval}초 간격 폴링으로 감시 중: {self.base_dir}")
+        
+        # 시작 시 모든 폴더를 한 번 확인 (이후에는 변경된 폴더만)
+        pending = set(list_video_folders(self.base_dir))
+        try:
+            while True:
+                if observer is None:
+                    pending.update(list_video_folders(self.base_dir))
+                pending = {folder for folder in sorted(pending) if not self.check_folder(folder)}
+                
+                # 대기 중인 폴더가 있으면 저장이 끝날 때쯤 다시 확인
+                try:
+                    pending.add(changed.get(timeout=self.settle_seconds if pending else self.poll_interval))
+                    while True:
+                        pending.add(changed.get_nowait())
+                except queue.Empty:
+                    pass
+        except KeyboardInterrupt:
+            print("\n🛑 감시 종료")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+        
+        return self.stats
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="timestamps.csv 변경을 감시해 새 행만 바로 클립 생성")
+    parser.add_argument('--config', default='config.yaml', help="설정 파일 경로")
+    parser.add_argument('--poll', action='store_true', help="파일 이벤트 대신 폴링으로 감시")
+    args = parser.parse_args()
+    
+    config = load_config(args.config)
+    if not config:
+        return 1
+    
+    use_events = not args.poll and config.get('watch', {}).get('backend', 'auto') != 'poll'
+    if use_events and Observer is None:
+        print("ℹ️ watchdog이 설치되지 않아 폴링으로 감시합니다 (pip install watchdog)")
+    
+    start_run_report(config, 'clip_watcher')
+    add_progress_listener(make_console_listener())
+    
+    watcher = ClipWatcher(config)
+    stats = watcher.run(use_events)
+    
+    print(f"   생성됨: {stats['created']}개")
+    print(f"   건너뜀: {stats['skipped']}개")
+    print(f"   실패함: {stats['failed']}개")
+    finish_run_report(config, stats)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
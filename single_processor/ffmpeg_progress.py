@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import subprocess
+from collections import deque
+
+# ffmpeg stderr는 마지막 부분만 보관 (오류 메시지 확인용, 긴 작업에서도 메모리 고정)
+MAX_STDERR_CHARS = 64 * 1024
+
+# stdin 입력을 나눠 쓰는 단위
+STDIN_BLOCK_SIZE = 1024 * 1024
+
+# 콘솔 진행률 출력 간격(초)
+PRINT_INTERVAL = 2.0
+
+_listeners = []
+_listeners_lock = threading.Lock()
+_tracker = None
+
+class ProgressTracker:
+    """
+    배치 전체 진행률 집계 (단위: 미디어 초)
+    planned: 인코딩 예정 길이, done: 완료된 길이, active: 실행 중인 ffmpeg별 현재 위치
+    """
+    
+    def __init__(self):
+        self.planned = 0.0
+        self.done = 0.0
+        self.active = {}
+        self.started = None
+        self.lock = threading.Lock()
+    
+    def plan(self, seconds):
+        """인코딩 예정 길이 추가"""
+        with self.lock:
+            self.planned += seconds
+    
+    def update(self, token, position):
+        """실행 중인 ffmpeg의 현재 위치(초) 갱신"""
+        with self.lock:
+            if self.started is None:
+                self.started = time.monotonic()
+            self.active[token] = position
+    
+    def finish(self, token, seconds):
+        """ffmpeg 종료: 현재 위치 대신 전체 길이를 완료로 반영 (실패해도 예정 길이에서는 소진)"""
+        with self.lock:
+            self.active.pop(token, None)
+            self.done += seconds
+    
+    def snapshot(self):
+        """진행률/처리 속도/남은 시간"""
+        with self.lock:
+            processed = self.done + sum(self.active.values())
+            elapsed = time.monotonic() - self.started if self.started else 0.0
+            planned = max(self.planned, processed)
+        
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        return {
+            'processed': round(processed, 2),
+            'planned': round(planned, 2),
+            'percent': round(processed / planned * 100, 1) if planned else None,
+            'rate': round(rate, 3),  # 실시간 대비 배속 (전체 동시 실행 합계)
+            'eta': round((planned - processed) / rate, 1) if rate > 0 else None
+        }
+
+def add_progress_listener(listener):
+    """진행률 콜백 등록: listener(event) - event는 ffmpeg 진행 정보 + 'batch' 집계"""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+def remove_progress_listener(listener):
+    """진행률 콜백 해제"""
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+def start_progress_tracker():
+    """배치 진행률 집계 시작 (이후 plan_progress로 예정 길이 등록)"""
+    global _tracker
+    _tracker = ProgressTracker()
+    return _tracker
+
+def plan_progress(seconds):
+    """배치 진행률에 인코딩 예정 길이 추가 (집계 중이 아니면 무시)"""
+    if _tracker is not None:
+        _tracker.plan(seconds)
+
+def parse_out_time(progress):
+    """progress 블록의 출력 위치(초) (out_time_us, 없으면 out_time 'HH:MM:SS.micro')"""
+    value = progress.get('out_time_us') or progress.get('out_time_ms')
+    if value and value.lstrip('-').isdigit():
+        return max(0.0, int(value) / 1000000)
+    
+    out_time = progress.get('out_time')
+    if out_time and ':' in out_time:
+        try:
+            hours, minutes, seconds = out_time.split(':')
+            return max(0.0, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+        except ValueError:
+            return None
+    return None
+
+def parse_speed(value):
+    """'1.52x' → 1.52 (N/A면 None)"""
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None
+
+def build_event(progress, label, duration):
+    """ffmpeg progress 블록 → 콜백 이벤트"""
+    position = parse_out_time(progress)
+    try:
+        fps = float(progress.get('fps', ''))
+    except ValueError:
+        fps = None
+    
+    return {
+        'label': label,
+        'state': progress.get('progress'),  # continue / end
+        'frame': progress.get('frame'),
+        'fps': fps,
+        'speed': parse_speed(progress.get('speed')),
+        'bitrate': progress.get('bitrate'),
+        'out_time': position,
+        'duration': duration,
+        'percent': round(min(position / duration, 1.0) * 100, 1) if position is not None and duration else None
+    }
+
+def notify_listeners(event):
+    """등록된 콜백 호출 (콜백 오류는 인코딩에 영향 없도록 무시)"""
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception as e:
+            print(f"⚠️ 진행률 콜백 오류 (무시됨): {e}")
+
+def read_stderr(stream, tail):
+    """stderr를 줄 단위로 읽어 마지막 MAX_STDERR_CHARS만 유지"""
+    size = 0
+    for raw_line in stream:
+        line = raw_line.decode('utf-8', errors='ignore')
+        tail.append(line)
+        size += len(line)
+        while size > MAX_STDERR_CHARS and len(tail) > 1:
+            size -= len(tail.popleft())
+
+def write_stdin(stream, input_data):
+    """입력 데이터를 나눠서 stdin에 기록 (ffmpeg가 먼저 종료해도 오류 없이 중단)"""
+    view = memoryview(input_data).cast('B')
+    try:
+        for pos in range(0, len(view), STDIN_BLOCK_SIZE):
+            stream.write(view[pos:pos + STDIN_BLOCK_SIZE])
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            stream.close()
+        except OSError:
+            pass
+
+def run_ffmpeg_with_progress(cmd, label=None, duration=None, input_data=None, track=True):
+    """
+    ffmpeg를 -progress pipe:1로 실행하며 진행 정보를 콜백으로 전달
+    stderr는 스트리밍으로 읽고 마지막 부분만 보관
+    input_data: stdin(pipe:0)으로 보낼 바이트 버퍼 (memoryview 등, 복사 없이 전달)
+    track=False면 배치 전체 진행률에 포함하지 않음 (예정 길이에 없는 작업, 예: 오디오 캐시 디코딩)
+    반환: subprocess.CompletedProcess (stderr: 마지막 부분, progress: 마지막 진행 정보)
+    """
+    # -progress/-nostats는 전역 옵션이므로 ffmpeg 바로 뒤에 추가
+    cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+    tracker = _tracker if track else None
+    token = object()
+    
+    # stdin으로 바이너리 입력을 보낼 수 있도록 파이프는 바이트 모드 (출력은 직접 디코딩)
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL if input_data is None else subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    
+    stderr_tail = deque()
+    stderr_thread = threading.Thread(target=read_stderr, args=(process.stderr, stderr_tail), daemon=True)
+    stderr_thread.start()
+    
+    stdin_thread = None
+    if input_data is not None:
+        stdin_thread = threading.Thread(target=write_stdin, args=(process.stdin, input_data), daemon=True)
+        stdin_thread.start()
+    
+    progress = {}
+    last_event = {}
+    try:
+        for raw_line in process.stdout:
+            key, sep, value = raw_line.decode('utf-8', errors='ignore').strip().partition('=')
+            if not sep:
+                continue
+            progress[key] = value.strip()
+            
+            # 'progress=' 줄이 블록의 끝
+            if key == 'progress':
+                last_event = build_event(progress, label, duration)
+                if tracker is not None and last_event['out_time'] is not None:
+                    tracker.update(token, min(last_event['out_time'], duration or last_event['out_time']))
+                    last_event['batch'] = tracker.snapshot()
+                notify_listeners(last_event)
+                progress = {}
+    except BaseException:
+        # 중단(Ctrl+C 등) 시 ffmpeg가 남지 않도록 종료
+        process.kill()
+        raise
+    finally:
+        returncode = process.wait()
+        stderr_thread.join()
+        if stdin_thread is not None:
+            stdin_thread.join()
+        if tracker is not None:
+            tracker.finish(token, duration or 0.0)
+    
+    result = subprocess.CompletedProcess(cmd, returncode, stdout='', stderr=''.join(stderr_tail))
+    result.progress = last_event
+    return result
+
+def format_eta(seconds):
+    """초 → 'H:MM:SS'"""
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def make_console_listener(interval=PRINT_INTERVAL):
+    """콘솔 진행률 출력 콜백 (interval초마다 한 줄, 동시 실행 중이면 가장 최근 클립 기준)"""
+    state = {'last': 0.0}
+    lock = threading.Lock()
+    
+    def listener(event):
+        # 이름 없는 보조 실행(스마트 컷 구간 등)은 출력하지 않음
+        if not event['label']:
+            return
+        
+        now = time.monotonic()
+        with lock:
+            if event['state'] != 'end' and now - state['last'] < interval:
+                return
+            state['last'] = now
+        
+        line = f"⏳ {event['label'] or 'ffmpeg'}"
+        if event['percent'] is not None:
+            line += f" {event['percent']:.0f}%"
+        if event['fps'] is not None:
+            line += f" | {event['fps']:.0f}fps"
+        if event['speed'] is not None:
+            line += f" | {event['speed']:.2f}x"
+        if event['bitrate'] and event['bitrate'] != 'N/A':
+            line += f" | {event['bitrate']}"
+        
+        batch = event.get('batch')
+        if batch and batch['percent'] is not None:
+            line += f" | 전체 {batch['percent']:.0f}% ETA {format_eta(batch['eta'])}"
+        print(line)
+    
+    return listener
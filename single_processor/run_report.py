@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from collections import defaultdict
+
+DEFAULT_REPORT_DIR = "reports"
+
+_report = None
+_report_lock = threading.Lock()
+
+class RunReport:
+    """
+    실행 단위 단계별 시간 기록
+    - 기록마다 JSONL 한 줄 (stage, seconds + 영상/클립 정보)
+    - 종료 시 단계별 p50/p95 요약, 필요하면 Prometheus textfile 출력
+    """
+    
+    def __init__(self, report_path, tool):
+        self.report_path = report_path
+        self.tool = tool
+        self.run_id = os.path.splitext(os.path.basename(report_path))[0]
+        self.started = time.time()
+        self.durations = defaultdict(list)
+        self.totals = defaultdict(float)  # 단계별 누적 바이트
+        self.lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        self.file = open(report_path, 'a', encoding='utf-8')
+        self.write({'type': 'run_start', 'tool': tool})
+    
+    def write(self, record):
+        """JSONL 한 줄 기록"""
+        record = dict(record, run_id=self.run_id, ts=round(time.time(), 3))
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            # 종료 후 늦게 끝난 작업 스레드의 기록은 무시
+            if self.file.closed:
+                return
+            self.file.write(line)
+            self.file.flush()
+    
+    def record(self, stage, seconds, **fields):
+        """단계 하나의 실행 시간 기록"""
+        with self.lock:
+            self.durations[stage].append(seconds)
+            if fields.get('bytes'):
+                self.totals[f"{stage}_bytes"] += fields['bytes']
+        self.write(dict(fields, type='stage', stage=stage, seconds=round(seconds, 4)))
+    
+    def summarize(self):
+        """단계별 요약: {stage: {count, total, p50, p95, max}}"""
+        with self.lock:
+            durations = {stage: sorted(values) for stage, values in self.durations.items()}
+        
+        summary = {}
+        for stage, values in durations.items():
+            summary[stage] = {
+                'count': len(values),
+                'total': round(sum(values), 3),
+                'p50': round(percentile(values, 50), 4),
+                'p95': round(percentile(values, 95), 4),
+                'max': round(values[-1], 4)
+            }
+        return summary
+    
+    def close(self, stats=None):
+        """요약 기록 후 파일 닫기, 반환: 단계별 요약"""
+        summary = self.summarize()
+        self.write({
+            'type': 'run_end',
+            'tool': self.tool,
+            'wall_seconds': round(time.time() - self.started, 3),
+            'stats': stats or {},
+            'bytes': dict(self.totals),
+            'stages': summary
+        })
+        with self.lock:
+            self.file.close()
+        return summary
+
+def percentile(sorted_values, percent):
+    """정렬된 목록의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+def start_run_report(config, tool):
+    """실행 보고서 시작 (report.enabled가 false면 None, 이후 기록은 무시됨)"""
+    global _report
+    
+    report_config = config.get('report', {})
+    if not report_config.get('enabled', True):
+        return None
+    
+    report_dir = report_config.get('directory', DEFAULT_REPORT_DIR)
+    report_path = os.path.join(report_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    
+    with _report_lock:
+        _report = RunReport(report_path, tool)
+    return _report
+
+def record_stage(stage, seconds, **fields):
+    """현재 실행 보고서에 단계 기록 (보고서가 없으면 무시)"""
+    report = _report
+    if report is not None:
+        report.record(stage, seconds, **fields)
+
+@contextmanager
+def timed_stage(stage, **fields):
+    """with 블록 실행 시간을 단계 기록으로 남김 (블록 안에서 yield된 fields에 값 추가 가능)"""
+    started = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        fields['success'] = False
+        fields['error'] = str(e)[:200]
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started, **fields)
+
+def format_prometheus(summary, totals, stats, tool):
+    """단계별 요약을 Prometheus textfile 형식으로 변환"""
+    lines = [
+        "# HELP yt_clip_stage_seconds 단계별 실행 시간",
+        "# TYPE yt_clip_stage_seconds summary"
+    ]
+    for stage, values in sorted(summary.items()):
+        labels = f'tool="{tool}",stage="{stage}"'
+        lines.append(f'yt_clip_stage_seconds{{{labels},quantile="0.5"}} {values["p50"]}')
+        lines.append(f'yt_clip_stage_seconds{{{labels},quantile="0.95"}} {values["p95"]}')
+        lines.append(f'yt_clip_stage_seconds_sum{{{labels}}} {values["total"]}')
+        lines.append(f'yt_clip_stage_seconds_count{{{labels}}} {values["count"]}')
+    
+    lines += ["# HELP yt_clip_stage_bytes 단계별 처리 바이트", "# TYPE yt_clip_stage_bytes gauge"]
+    for name, value in sorted(totals.items()):
+        lines.append(f'yt_clip_stage_bytes{{tool="{tool}",stage="{name[:-len("_bytes")]}"}} {int(value)}')
+    
+    lines += ["# HELP yt_clip_run_items 마지막 실행 결과 개수", "# TYPE yt_clip_run_items gauge"]
+    for name, value in sorted((stats or {}).items()):
+        lines.append(f'yt_clip_run_items{{tool="{tool}",result="{name}"}} {value}')
+    
+    lines += ["# HELP yt_clip_run_timestamp_seconds 마지막 실행 종료 시각", "# TYPE yt_clip_run_timestamp_seconds gauge"]
+    lines.append(f'yt_clip_run_timestamp_seconds{{tool="{tool}"}} {time.time():.0f}')
+    return '\n'.join(lines) + '\n'
+
+def finish_run_report(config, stats=None):
+    """실행 보고서 종료: 요약 출력, JSONL 마무리, Prometheus textfile 출력 (옵션)"""
+    global _report
+    
+    with _report_lock:
+        report = _report
+        _report = None
+    if report is None:
+        return None
+    
+    summary = report.close(stats)
+    
+    if summary:
+        print(f"\n⏱️ 단계별 실행 시간 (p50 / p95 / 합계)")
+        for stage, values in sorted(summary.items(), key=lambda item: -item[1]['total']):
+            print(f"   {stage}: {values['p50']:.2f}s / {values['p95']:.2f}s / {values['total']:.1f}s ({values['count']}회)")
+    print(f"📄 실행 보고서: {report.report_path}")
+    
+    textfile = config.get('report', {}).get('prometheus_textfile')
+    if textfile:
+        # node_exporter가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = f"{textfile}.tmp"
+        os.makedirs(os.path.dirname(textfile) or '.', exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(format_prometheus(summary, report.totals, stats, report.tool))
+        os.replace(tmp_path, textfile)
+        print(f"📈 Prometheus textfile: {textfile}")
+    
+    return summary